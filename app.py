@@ -0,0 +1,1076 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import threading
+import queue
+import datetime
+import time
+import os
+
+from core import DETAIL_TAGS, TAG_COLUMNS, detail_key, format_bytes
+from dedup import DedupIndex, duplicate_rows
+from engine import default_workers
+from jobs import AnalysisJob, discard_job, interrupted_jobs
+from pipeline import watch
+from query import ResultIndex, parse_date
+from scan_cache import default_cache_dir
+from scanner import as_roots
+from spatial import SpatialIndex, parse_point
+from stats import RunStats, profile_call
+from store import ResultStore
+from tagdump import TagDumpLoader
+from thumbs import ThumbnailLoader, PREFETCH
+from virtual_table import VirtualTable
+
+# ОКНО ПРИЛОЖЕНИЯ (запуск - main.py). Pillow, экспорт и NumPy загружаются при первом использовании
+
+# Обновление таблицы и прогресса: не чаще раза в 50 мс и не больше строк за раз,
+# чтобы окно не зависало при любой скорости разбора
+UI_TICK_MS = 50
+MAX_ROWS_PER_TICK = 2000
+
+# Миниатюры предпросмотра на диске (вместе с кэшем результатов)
+THUMBS_DIR = os.path.join(default_cache_dir(), "thumbs")
+
+
+class PhotoAnalyzerApp(tk.Tk):
+    def __init__(self):
+        super().__init__()
+
+        self.title("EXIF MetadataAnalyzer")
+        self.geometry("1300x750")
+        self.configure(bg="#2b2b2b")
+
+        self.found_data = ResultStore()
+        self.is_processing = False
+        self.current_image_ref = None
+        self.thumbs = ThumbnailLoader()
+        self.thumb_polling = False
+        self.preview_path = None
+        self.preview_shown = False
+        self.ui_queue = queue.Queue()
+        self.progress_state = (0, 0, True)
+        self.analysis_params = None
+        self.selected_folders = []
+        self.watch_stop = None
+        self.watch_queue = queue.Queue()
+        self.spatial = None       # SpatialIndex, строится при первом поиске по месту
+        self.view = None          # номера строк хранилища, показанные в таблице (None - все)
+        self.base_query = None    # исходная выборка (поиск по месту, дубликаты) -> номера строк
+        self.filters = {}         # фильтры панели над таблицей (аргументы ResultIndex.select)
+        self.sort_state = (None, False)     # (колонка, по убыванию)
+        self.query_index = None   # ResultIndex, строится в фоне после анализа
+        self.index_prep = None    # (поток ResultIndex.prepare, Event его отмены)
+        self.run_stats = RunStats()
+        self.profile_report = None
+        self.dedup = None         # DedupIndex прогона (галочка "Дубликаты - разбирать один раз")
+        self.job = None           # AnalysisJob текущего анализа (пауза/остановка)
+        self.detail_tags = list(DETAIL_TAGS)    # колонки тегов для следующего анализа (core.TAG_COLUMNS)
+        self.analysis_tags = None                # ...и те, с которыми собраны текущие результаты
+        self.tag_dump = TagDumpLoader()          # полный набор тегов выбранного файла (по кнопке)
+        self.dump_path = None
+        self.dump_polling = False
+
+        self._init_styles()
+        self._build_ui()
+        self.after(300, self.offer_resume)
+
+    def _init_styles(self):
+        self.style = ttk.Style()
+        self.style.theme_use('clam')
+
+        self.colors = {
+            "bg": "#2b2b2b", "fg": "#e0e0e0", "panel": "#333333",
+            "accent": "#5c6bc0", "accent_hover": "#7986cb",
+            "border": "#45475a", "success": "#66bb6a"
+        }
+
+        self.style.configure("TFrame", background=self.colors["bg"])
+        self.style.configure("Panel.TFrame", background=self.colors["panel"], relief="flat")
+        self.style.configure("TLabel", background=self.colors["panel"], foreground=self.colors["fg"],
+                             font=("Segoe UI", 10))
+        self.style.configure("Title.TLabel", font=("Segoe UI", 12, "bold"), foreground="#89b4fa")
+
+        self.style.configure("TButton", background=self.colors["panel"], foreground=self.colors["fg"], borderwidth=1,
+                             font=("Segoe UI", 10))
+        self.style.map("TButton", background=[('active', self.colors["border"])])
+
+        self.style.configure("Accent.TButton", background=self.colors["accent"], foreground="white",
+                             font=("Segoe UI", 11, "bold"))
+        self.style.map("Accent.TButton", background=[('active', self.colors["accent_hover"])])
+
+        self.style.configure("TCheckbutton", background=self.colors["panel"], foreground=self.colors["fg"],
+                             font=("Segoe UI", 10))
+        self.style.map("TCheckbutton", background=[('active', self.colors["panel"])])
+
+        self.style.configure("Horizontal.TProgressbar", background=self.colors["success"], troughcolor="#1e1e1e",
+                             bordercolor=self.colors["border"])
+
+        self.style.configure("Treeview", background="#1e1e1e", foreground="#ffffff", fieldbackground="#1e1e1e",
+                             rowheight=25)
+        self.style.configure("Treeview.Heading", background="#333333", foreground="#ffffff",
+                             font=("Segoe UI", 10, "bold"))
+        self.style.map("Treeview", background=[('selected', self.colors["accent"])])
+
+    def _build_ui(self):
+        # 1. ЛЕВАЯ ПАНЕЛЬ (sidebar)
+        sidebar = ttk.Frame(self, style="Panel.TFrame", padding=15)
+        sidebar.pack(side="left", fill="y")
+
+        # Выбор папки
+        ttk.Label(sidebar, text="Источник данных", style="Title.TLabel").pack(anchor="w", pady=(0, 5))
+        self.lbl_path = ttk.Label(sidebar, text="Папка не выбрана", wraplength=200, font=("Segoe UI", 9, "italic"))
+        self.lbl_path.pack(anchor="w", pady=(0, 10))
+
+        ttk.Button(sidebar, text="📂 Обзор...", command=self.select_folder).pack(fill="x", pady=(0, 5))
+        ttk.Button(sidebar, text="➕ Добавить папку", command=self.add_folder).pack(fill="x", pady=(0, 10))
+
+        # Галочка: Рекурсия
+        self.var_recursive = tk.BooleanVar(value=True)
+        tk.Checkbutton(sidebar, text="Рекурсивный поиск", variable=self.var_recursive,
+                       bg=self.colors["panel"],  # Фон (как у панели)
+                       fg=self.colors["fg"],  # Текст (светлый)
+                       selectcolor=self.colors["panel"],  # Цвет квадратика внутри (чтобы не был белым)
+                       activebackground=self.colors["panel"],  # При наведении
+                       activeforeground=self.colors["fg"],
+                       font=("Segoe UI", 10),
+                       cursor="hand2").pack(anchor="w")
+
+        # Количество процессов для извлечения метаданных
+        workers_row = ttk.Frame(sidebar, style="Panel.TFrame")
+        workers_row.pack(fill="x", pady=(8, 0))
+        ttk.Label(workers_row, text="Процессов:").pack(side="left")
+        self.var_workers = tk.IntVar(value=default_workers())
+        ttk.Spinbox(workers_row, from_=1, to=256, width=5, textvariable=self.var_workers).pack(side="right")
+
+        # Галочка: Сетевой диск (много параллельных чтений заголовков вместо пула процессов)
+        self.var_network = tk.BooleanVar(value=False)
+        tk.Checkbutton(sidebar, text="Сетевой диск (SMB/NFS)", variable=self.var_network,
+                       bg=self.colors["panel"],
+                       fg=self.colors["fg"],
+                       selectcolor=self.colors["panel"],
+                       activebackground=self.colors["panel"],
+                       activeforeground=self.colors["fg"],
+                       font=("Segoe UI", 10),
+                       cursor="hand2").pack(anchor="w", pady=(8, 0))
+
+        # Галочка: Кэш результатов (повторный анализ разбирает только новые/измененные файлы)
+        self.var_use_cache = tk.BooleanVar(value=True)
+        tk.Checkbutton(sidebar, text="Кэш результатов", variable=self.var_use_cache,
+                       bg=self.colors["panel"],
+                       fg=self.colors["fg"],
+                       selectcolor=self.colors["panel"],
+                       activebackground=self.colors["panel"],
+                       activeforeground=self.colors["fg"],
+                       font=("Segoe UI", 10),
+                       cursor="hand2").pack(anchor="w", pady=(8, 0))
+
+        # Галочка: Дубликаты (одинаковые по содержимому файлы разбираются один раз)
+        self.var_dedup = tk.BooleanVar(value=False)
+        tk.Checkbutton(sidebar, text="Дубликаты: разбирать один раз", variable=self.var_dedup,
+                       bg=self.colors["panel"],
+                       fg=self.colors["fg"],
+                       selectcolor=self.colors["panel"],
+                       activebackground=self.colors["panel"],
+                       activeforeground=self.colors["fg"],
+                       font=("Segoe UI", 10),
+                       cursor="hand2").pack(anchor="w", pady=(8, 0))
+
+        # Галочка: Наблюдение (после анализа новые/измененные/удаленные файлы попадают в таблицу сами)
+        self.var_watch = tk.BooleanVar(value=False)
+        tk.Checkbutton(sidebar, text="Следить за папкой", variable=self.var_watch,
+                       command=self.toggle_watch,
+                       bg=self.colors["panel"],
+                       fg=self.colors["fg"],
+                       selectcolor=self.colors["panel"],
+                       activebackground=self.colors["panel"],
+                       activeforeground=self.colors["fg"],
+                       font=("Segoe UI", 10),
+                       cursor="hand2").pack(anchor="w", pady=(8, 0))
+
+        ttk.Separator(sidebar, orient="horizontal").pack(fill="x", pady=20)
+
+        # Фильтры форматов
+        ttk.Label(sidebar, text="Форматы файлов", style="Title.TLabel").pack(anchor="w", pady=(0, 5))
+        self.filter_vars = {
+            ".jpg": tk.BooleanVar(value=True),
+            ".jpeg": tk.BooleanVar(value=True),
+            ".png": tk.BooleanVar(value=False),
+            ".tiff": tk.BooleanVar(value=False),
+            ".webp": tk.BooleanVar(value=False),
+            ".heic": tk.BooleanVar(value=False)
+        }
+
+        for ext, var in self.filter_vars.items():
+            tk.Checkbutton(sidebar, text=f"Файлы {ext}", variable=var,
+                           bg=self.colors["panel"],
+                           fg=self.colors["fg"],
+                           selectcolor=self.colors["panel"],
+                           activebackground=self.colors["panel"],
+                           activeforeground=self.colors["fg"],
+                           font=("Segoe UI", 10),
+                           cursor="hand2").pack(anchor="w")
+
+        # Какие теги собирать в результаты (остальные - по кнопке "Все теги" для одного файла)
+        ttk.Button(sidebar, text="🏷 Колонки тегов...", command=self.choose_tags).pack(fill="x", pady=(8, 0))
+
+        ttk.Separator(sidebar, orient="horizontal").pack(fill="x", pady=20)
+
+        # Кнопка старт
+        self.btn_start = ttk.Button(sidebar, text="НАЧАТЬ АНАЛИЗ", style="Accent.TButton",
+                                    command=self.start_analysis_thread)
+        self.btn_start.pack(fill="x", pady=10)
+
+        # Пауза и остановка анализа (обработанное сохраняется, повторный запуск продолжит с того же места)
+        job_buttons = ttk.Frame(sidebar, style="Panel.TFrame")
+        job_buttons.pack(fill="x")
+        self.btn_pause = ttk.Button(job_buttons, text="⏸ Пауза", state="disabled", command=self.toggle_pause)
+        self.btn_pause.pack(side="left", fill="x", expand=True)
+        self.btn_stop = ttk.Button(job_buttons, text="⏹ Стоп", state="disabled", command=self.stop_analysis)
+        self.btn_stop.pack(side="left", fill="x", expand=True)
+
+        ttk.Separator(sidebar, orient="horizontal").pack(fill="x", pady=20)
+
+        # Поиск по месту: точка + радиус или прямоугольник (юг, запад, север, восток)
+        ttk.Label(sidebar, text="Поиск по месту", style="Title.TLabel").pack(anchor="w", pady=(0, 5))
+        ttk.Label(sidebar, text="Широта, долгота (или Ю, З, С, В):", font=("Segoe UI", 9)).pack(anchor="w")
+        self.var_geo_point = tk.StringVar()
+        ttk.Entry(sidebar, textvariable=self.var_geo_point).pack(fill="x", pady=(2, 5))
+        radius_row = ttk.Frame(sidebar, style="Panel.TFrame")
+        radius_row.pack(fill="x")
+        ttk.Label(radius_row, text="Радиус, км:").pack(side="left")
+        self.var_geo_radius = tk.StringVar(value="1")
+        ttk.Entry(radius_row, textvariable=self.var_geo_radius, width=8).pack(side="right")
+        geo_buttons = ttk.Frame(sidebar, style="Panel.TFrame")
+        geo_buttons.pack(fill="x", pady=(5, 0))
+        ttk.Button(geo_buttons, text="🔍 Найти", command=self.geo_search).pack(side="left", fill="x", expand=True)
+        ttk.Button(geo_buttons, text="Сброс", command=self.clear_view).pack(side="left", fill="x", expand=True)
+        ttk.Button(sidebar, text="👥 Группы дубликатов", command=self.show_duplicates).pack(fill="x", pady=(5, 0))
+
+        ttk.Separator(sidebar, orient="horizontal").pack(fill="x", pady=20)
+
+        # Экспорт
+        ttk.Label(sidebar, text="Экспорт", style="Title.TLabel").pack(anchor="w", pady=(0, 5))
+        self.btn_csv = ttk.Button(sidebar, text="💾 CSV", state="disabled", command=self.export_csv)
+        self.btn_csv.pack(fill="x", pady=2)
+        self.btn_html = ttk.Button(sidebar, text="🌐 HTML", state="disabled", command=self.export_html)
+        self.btn_html.pack(fill="x", pady=2)
+        # Для дальнейшей обработки: типизированные значения и все теги (Parquet/Arrow - нужен pyarrow)
+        self.btn_jsonl = ttk.Button(sidebar, text="🧾 JSON Lines", state="disabled", command=self.export_jsonl)
+        self.btn_jsonl.pack(fill="x", pady=2)
+        self.btn_columnar = ttk.Button(sidebar, text="📦 Parquet / Arrow", state="disabled",
+                                       command=self.export_columnar)
+        self.btn_columnar.pack(fill="x", pady=2)
+        self.export_buttons = (self.btn_csv, self.btn_html, self.btn_jsonl, self.btn_columnar)
+
+        # 2. ПРАВАЯ ПАНЕЛЬ (ПРЕДПРОСМОТР)
+        info_panel = ttk.Frame(self, style="Panel.TFrame", width=320, padding=10)
+        info_panel.pack(side="right", fill="y")
+        info_panel.pack_propagate(False)  # Фиксируем ширину
+
+        ttk.Label(info_panel, text="Предпросмотр", style="Title.TLabel").pack(pady=(0, 10))
+
+        # Виджет для картинки
+        self.lbl_preview = ttk.Label(info_panel, text="Нет изображения", anchor="center", background="#1e1e1e")
+        self.lbl_preview.pack(fill="x", ipady=20)
+
+        ttk.Separator(info_panel, orient="horizontal").pack(fill="x", pady=15)
+        details_header = ttk.Frame(info_panel, style="Panel.TFrame")
+        details_header.pack(fill="x", pady=(0, 5))
+        ttk.Label(details_header, text="Подробные метаданные", style="Title.TLabel").pack(side="left")
+        # Полный набор тегов (MakerNote, объектив, XMP) читается только по запросу
+        ttk.Button(details_header, text="🔎 Все теги", command=self.show_full_tags).pack(side="right")
+
+        # Текстовое поле для деталей
+        self.txt_details = tk.Text(info_panel, height=20, bg="#1e1e1e", fg="#a6adc8",
+                                   font=("Consolas", 9), bd=0, highlightthickness=0)
+        self.txt_details.pack(fill="both", expand=True)
+        self.txt_details.insert("1.0", "Выберите строку в таблице...")
+        self.txt_details.config(state="disabled")
+
+        # 3. ЦЕНТРАЛЬНАЯ ЧАСТЬ
+        main_area = ttk.Frame(self, padding=10)
+        main_area.pack(side="left", fill="both", expand=True)
+
+        headers = {
+            "filename": "Имя файла",
+            "size": "Размер",
+            "date": "Дата съемки",
+            "camera": "Камера",
+            "lat": "Широта",
+            "lon": "Долгота"
+        }
+        widths = [200, 80, 130, 150, 90, 90]
+
+        # Панель фильтров: камера, диапазон дат, наличие GPS, имя файла
+        filter_bar = ttk.Frame(main_area)
+        filter_bar.pack(side="top", fill="x", pady=(0, 5))
+        self.var_f_camera = tk.StringVar()
+        self.var_f_from = tk.StringVar()
+        self.var_f_to = tk.StringVar()
+        self.var_f_gps = tk.StringVar(value="все")
+        self.var_f_name = tk.StringVar()
+        for label, var, width in (("Камера:", self.var_f_camera, 16), ("Дата с:", self.var_f_from, 11),
+                                  ("по:", self.var_f_to, 11), ("Имя:", self.var_f_name, 16)):
+            ttk.Label(filter_bar, text=label, background=self.colors["bg"]).pack(side="left", padx=(5, 2))
+            entry = ttk.Entry(filter_bar, textvariable=var, width=width)
+            entry.pack(side="left")
+            entry.bind("<Return>", self.apply_filters)
+        ttk.Label(filter_bar, text="GPS:", background=self.colors["bg"]).pack(side="left", padx=(5, 2))
+        ttk.Combobox(filter_bar, textvariable=self.var_f_gps, values=("все", "есть", "нет"),
+                     width=5, state="readonly").pack(side="left")
+        ttk.Button(filter_bar, text="✕", width=3, command=self.reset_filters).pack(side="right")
+        ttk.Button(filter_bar, text="Фильтр", command=self.apply_filters).pack(side="right", padx=5)
+
+        # Виртуальная таблица: отрисовываются только видимые строки из self.found_data (ResultStore).
+        # Клик по заголовку - сортировка (повторный - в обратном порядке)
+        self.table = VirtualTable(main_area, headers, widths, on_select=self.on_row_select,
+                                  on_heading=self.sort_by)
+        self.table.selection_style(self.colors["accent"])
+        self.table.set_source(self.row_count, self.format_row)
+        self.table.pack(side="top", fill="both", expand=True)
+
+        # Нижняя панель
+        bottom_frame = ttk.Frame(main_area, padding=(0, 10, 0, 0))
+        bottom_frame.pack(side="bottom", fill="x")
+
+        self.lbl_status = ttk.Label(bottom_frame, text="Готов к работе", background=self.colors["bg"])
+        self.lbl_status.pack(anchor="w")
+        self.progress = ttk.Progressbar(bottom_frame, orient="horizontal", mode="determinate")
+        self.progress.pack(fill="x", pady=(2, 5))
+
+        self.log_text = tk.Text(bottom_frame, height=5, bg="#1e1e1e", fg="#a6adc8",
+                                font=("Consolas", 9), bd=1, relief="solid")
+        self.log_text.pack(fill="x")
+        self.log_text.config(state="disabled")
+
+        # Статистика прогона: краткая строка + подробное окно с экспортом в JSON
+        stats_row = ttk.Frame(bottom_frame)
+        stats_row.pack(fill="x", pady=(5, 0))
+        self.lbl_stats = ttk.Label(stats_row, text="", background=self.colors["bg"], font=("Consolas", 9))
+        self.lbl_stats.pack(side="left")
+        ttk.Button(stats_row, text="📊 Статистика", command=self.show_stats).pack(side="right")
+        self.var_profile = tk.BooleanVar(value=False)
+        tk.Checkbutton(stats_row, text="cProfile", variable=self.var_profile,
+                       bg=self.colors["bg"],
+                       fg=self.colors["fg"],
+                       selectcolor=self.colors["bg"],
+                       activebackground=self.colors["bg"],
+                       activeforeground=self.colors["fg"],
+                       font=("Segoe UI", 9),
+                       cursor="hand2").pack(side="right", padx=5)
+
+    # ЛОГИКА
+    def log(self, message):
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self.log_text.config(state="normal")
+        self.log_text.insert("end", f"[{timestamp}] {message}\n")
+        self.log_text.see("end")
+        self.log_text.config(state="disabled")
+
+    def select_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.set_folders([folder])
+            self.log(f"Выбрана папка: {folder}")
+
+    def add_folder(self):
+        # Несколько корневых папок анализируются как одна (общий кэш и одна таблица)
+        folder = filedialog.askdirectory()
+        if folder and folder not in self.selected_folders:
+            self.set_folders(self.selected_folders + [folder])
+            self.log(f"Добавлена папка: {folder}")
+
+    def set_folders(self, folders):
+        self.selected_folders = list(folders)
+        self.lbl_path.config(text="\n".join(self.selected_folders) or "Папка не выбрана")
+
+    def get_target_extensions(self):
+        exts = []
+        for ext, var in self.filter_vars.items():
+            if var.get(): exts.append(ext)
+        return tuple(exts)
+
+    def get_workers(self):
+        try:
+            return max(1, int(self.var_workers.get()))
+        except (tk.TclError, ValueError):
+            return default_workers()
+
+    def get_io_concurrency(self):
+        # Режим сетевого диска; netio (asyncio) загружается только для него
+        if not self.var_network.get(): return 0
+        from netio import DEFAULT_CONCURRENCY
+        return DEFAULT_CONCURRENCY
+
+    def start_analysis_thread(self):
+        if not self.selected_folders:
+            messagebox.showwarning("Внимание", "Пожалуйста, выберите папку.")
+            return
+        if self.is_processing: return
+
+        self.stop_watch()
+        self.is_processing = True
+        self.btn_start.config(state="disabled")
+        for button in self.export_buttons: button.config(state="disabled")
+
+        folders = self.selected_folders
+        root = folders[0] if len(folders) == 1 else tuple(folders)
+        self.analysis_params = (root, self.get_target_extensions(), self.var_recursive.get())
+        self.found_data = ResultStore()
+        self.spatial = None
+        self.query_index = None
+        self.view = None
+        self.base_query = None
+        self.filters = {}
+        self.sort_state = (None, False)
+        self.table.set_sort(None)
+        self.table.reset()
+        self.thumbs.cache.clear()
+        self.tag_dump.clear()
+        self.ui_queue = queue.Queue()
+        self.progress_state = (0, 0, False)
+        self.progress['value'] = 0
+        self.run_stats = RunStats()
+        self.profile_report = None
+        self.dedup = DedupIndex(self.run_stats) if self.var_dedup.get() else None
+        folder, target_exts, recursive = self.analysis_params
+        io_concurrency = self.get_io_concurrency()
+        self.analysis_tags = list(self.detail_tags)
+        self.job = AnalysisJob(folder, target_exts, recursive, workers=self.get_workers(),
+                               use_cache=self.var_use_cache.get(), io_concurrency=io_concurrency,
+                               stats=self.run_stats, dedup=self.dedup, log=self.post_log,
+                               tags=self.analysis_tags)
+        self.btn_pause.config(state="normal", text="⏸ Пауза")
+        self.btn_stop.config(state="normal")
+
+        threading.Thread(target=self.run_analysis, daemon=True).start()
+        self.after(UI_TICK_MS, self.drain_ui_queue)
+
+    # Фоновый поток не трогает виджеты: результаты и сообщения идут через очередь,
+    # а главный цикл забирает их пачкой раз в UI_TICK_MS
+    def run_analysis(self):
+        if not self.var_profile.get():
+            self.analyze()
+        else:
+            # Профилируется поток анализа (обход, кэш, раздача пачек); воркеры пула - нет
+            path = os.path.join(default_cache_dir(), f"profile_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            try:
+                os.makedirs(default_cache_dir(), exist_ok=True)
+                _, self.profile_report = profile_call(path, self.analyze)
+                self.post_log(f"Профиль сохранен: {path}")
+            except Exception as e:
+                self.post_log(f"Профилирование не удалось: {e}")
+        self.ui_queue.put(("done", None))
+
+    def analyze(self):
+        job = self.job
+        self.post_log("Сканирование...")
+
+        # Файлы разбираются по мере обнаружения, общее число растет во время обхода
+        try:
+            for i, rec in enumerate(job.run()):
+                self.ui_queue.put(("row", rec))
+                self.progress_state = (i + 1, job.scanner.found, job.scanner.finished)
+        except Exception as e:
+            self.run_stats.error("analysis", e)
+            self.post_log(f"Ошибка анализа: {e} (обработанное сохранено, повторный запуск продолжит)")
+
+        if job.scanner is not None:
+            self.post_log(f"Найдено изображений: {job.scanner.found}")
+        if job.cancelled:
+            self.post_log(f"Анализ остановлен: обработано {job.processed}")
+
+    def post_log(self, message):
+        self.ui_queue.put(("log", message))
+
+    def drain_ui_queue(self):
+        started = time.perf_counter()
+        self.run_stats.gauge("ui_queue", self.ui_queue.qsize())
+        rows = []
+        finished = False
+        try:
+            while len(rows) < MAX_ROWS_PER_TICK:
+                kind, payload = self.ui_queue.get_nowait()
+                if kind == "row":
+                    rows.append(payload)
+                elif kind == "log":
+                    self.log(payload)
+                elif kind == "done":
+                    finished = True
+                    break
+        except queue.Empty:
+            pass
+
+        if rows:
+            self.found_data.extend(rows)
+            self.spatial = None
+            self.query_index = None
+            self.table.refresh()
+        self.update_progress(*self.progress_state)
+        self.run_stats.add_time("ui_update", time.perf_counter() - started)
+        self.lbl_stats.config(text=self.run_stats.summary())
+
+        if finished:
+            self.finish_analysis()
+        else:
+            self.after(UI_TICK_MS, self.drain_ui_queue)
+
+    # Таблица показывает либо все хранилище, либо выборку (номера строк в self.view)
+    def row_count(self):
+        return len(self.view) if self.view is not None else len(self.found_data)
+
+    def store_index(self, index):
+        return self.view[index] if self.view is not None else index
+
+    def format_row(self, index):
+        meta = self.found_data[self.store_index(index)]
+        lat_str = f"{meta['lat']:.5f}" if meta['lat'] else "-"
+        lon_str = f"{meta['lon']:.5f}" if meta['lon'] else "-"
+        return (
+            meta['filename'],
+            meta['size'],
+            meta['date'],
+            meta['camera'],
+            lat_str,
+            lon_str
+        )
+
+    def update_progress(self, current, total, scan_finished=True):
+        self.progress['maximum'] = max(total, 1)
+        self.progress['value'] = current
+        if self.is_processing and self.job is not None and self.job.paused:
+            self.lbl_status.config(text=f"Пауза: {current}/{total}")
+        elif scan_finished:
+            self.lbl_status.config(text=f"Обработка: {current}/{total}")
+        else:
+            self.lbl_status.config(text=f"Обработка: {current}/{total}+ (поиск файлов...)")
+
+    def finish_analysis(self):
+        if self.dedup is not None:
+            self.found_data.duplicates = self.dedup.original
+        self.is_processing = False
+        self.btn_start.config(state="normal")
+        for button in self.export_buttons: button.config(state="normal")
+        self.btn_pause.config(state="disabled", text="⏸ Пауза")
+        self.btn_stop.config(state="disabled")
+        self.prepare_query_index()
+        if self.job.state != "done":
+            self.lbl_status.config(text="Остановлено" if self.job.cancelled else "Прервано")
+            return
+        self.lbl_status.config(text="Готово")
+        if self.var_watch.get():
+            self.start_watch()
+        messagebox.showinfo("Готово", "Анализ завершен!")
+
+    # ПАУЗА / ОСТАНОВКА / ПРОДОЛЖЕНИЕ ПРЕРВАННОГО АНАЛИЗА
+    def toggle_pause(self):
+        if self.job is None: return
+        if self.job.paused:
+            self.job.resume()
+            self.btn_pause.config(text="⏸ Пауза")
+            self.log("Анализ продолжен")
+        else:
+            self.job.pause()
+            self.btn_pause.config(text="▶ Продолжить")
+            self.log("Пауза")
+
+    def stop_analysis(self):
+        if self.job is None: return
+        self.job.cancel()
+        self.btn_pause.config(state="disabled")
+        self.btn_stop.config(state="disabled")
+        self.log("Остановка...")
+
+    def offer_resume(self):
+        # Только задания с форматами, которые есть в окне (консольные могут быть с другими);
+        # части распределенного анализа (cli.py --shard) продолжаются из консоли
+        jobs = [info for info in interrupted_jobs()
+                if set(info["exts"]) <= set(self.filter_vars) and not info.get("shard")]
+        if not jobs or self.is_processing: return
+        info = jobs[0]
+        folders = as_roots(info["root"])
+        if not all(os.path.isdir(folder) for folder in folders):
+            discard_job(info)
+            return
+        text = (f"Анализ папки\n{chr(10).join(folders)}\nбыл прерван: обработано {info['processed']} "
+                f"из {info.get('found', 0)}+.\n\nПродолжить с того же места?")
+        if not messagebox.askyesno("Прерванный анализ", text):
+            discard_job(info)
+            return
+        self.set_folders(folders)
+        for ext, var in self.filter_vars.items():
+            var.set(ext in info["exts"])
+        self.var_recursive.set(info["recursive"])
+        self.var_use_cache.set(info.get("use_cache", True))
+        self.detail_tags = info.get("tags") or list(DETAIL_TAGS)
+        self.start_analysis_thread()
+
+    # КОЛОНКИ ТЕГОВ
+    def choose_tags(self):
+        # Что собирать при анализе; действует со следующего запуска (для другого набора - свой кэш)
+        win = tk.Toplevel(self)
+        win.title("Колонки тегов")
+        win.configure(bg=self.colors["panel"])
+        win.transient(self)
+        ttk.Label(win, text="Теги в результатах и CSV:", style="Title.TLabel").pack(anchor="w", padx=10,
+                                                                                  pady=(10, 5))
+        chosen = {}
+        for name in TAG_COLUMNS:
+            var = chosen[name] = tk.BooleanVar(value=name in self.detail_tags)
+            tk.Checkbutton(win, text=detail_key(name), variable=var,
+                           bg=self.colors["panel"],
+                           fg=self.colors["fg"],
+                           selectcolor=self.colors["panel"],
+                           activebackground=self.colors["panel"],
+                           activeforeground=self.colors["fg"],
+                           font=("Segoe UI", 10),
+                           cursor="hand2").pack(anchor="w", padx=10)
+
+        def apply():
+            self.detail_tags = [name for name in TAG_COLUMNS if chosen[name].get()]
+            win.destroy()
+            if self.detail_tags != self.analysis_tags and self.analysis_tags is not None:
+                self.log("Колонки тегов изменены: действуют со следующего анализа")
+
+        def reset():
+            for name, var in chosen.items():
+                var.set(name in DETAIL_TAGS)
+
+        buttons = ttk.Frame(win, style="Panel.TFrame")
+        buttons.pack(fill="x", padx=10, pady=10)
+        ttk.Button(buttons, text="OK", command=apply).pack(side="right")
+        ttk.Button(buttons, text="По умолчанию", command=reset).pack(side="right", padx=5)
+
+    # СТАТИСТИКА
+    def show_stats(self):
+        win = tk.Toplevel(self)
+        win.title("Статистика прогона")
+        win.geometry("640x520")
+        win.configure(bg=self.colors["bg"])
+
+        text = tk.Text(win, bg="#1e1e1e", fg="#a6adc8", font=("Consolas", 9), bd=0)
+        report = self.run_stats.format()
+        if self.profile_report:
+            report += "\n\n[CPROFILE: ПОТОК АНАЛИЗА]\n" + self.profile_report
+        text.insert("1.0", report)
+        text.config(state="disabled")
+
+        def save():
+            path = filedialog.asksaveasfilename(parent=win, defaultextension=".json",
+                                                filetypes=[("JSON Files", "*.json")])
+            if not path: return
+            try:
+                extra = {"profile": self.profile_report} if self.profile_report else None
+                self.run_stats.save_json(path, extra)
+                self.log(f"Статистика сохранена: {path}")
+            except Exception as e:
+                messagebox.showerror("Ошибка", str(e), parent=win)
+
+        ttk.Button(win, text="💾 Сохранить JSON", command=save).pack(side="bottom", pady=5)
+        text.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+
+    # НАБЛЮДЕНИЕ ЗА ПАПКОЙ
+    # Фоновый поток гонит через конвейер только изменения; таблица и хранилище
+    # обновляются на месте в главном потоке (пока идет экспорт - события ждут в очереди)
+    def toggle_watch(self):
+        if not self.var_watch.get():
+            self.stop_watch()
+            self.log("Наблюдение остановлено")
+        elif self.analysis_params is None:
+            self.log("Наблюдение начнется после анализа папки")
+        elif not self.is_processing:
+            self.start_watch()
+
+    def start_watch(self):
+        if self.watch_stop is not None or self.analysis_params is None: return
+        folder, target_exts, recursive = self.analysis_params
+        stop = threading.Event()
+        self.watch_stop = stop
+        self.watch_queue = events = queue.Queue()
+        io_concurrency = self.get_io_concurrency()
+        workers = self.get_workers()
+        # Кэш, набор папок и дубликаты - те же, что у анализа: база задания без кэша уже удалена
+        job = self.job
+        use_cache = job.use_cache if job is not None else self.var_use_cache.get()
+        cache_path = job.checkpoint_path if job is not None and use_cache else None
+        tags = self.analysis_tags
+        dedup = self.dedup
+
+        def work():
+            try:
+                for event in watch(folder, target_exts, recursive, stop, workers=workers,
+                                   use_cache=use_cache, log=lambda m: events.put(("log", m)),
+                                   io_concurrency=io_concurrency, tags=tags, dedup=dedup,
+                                   cache_path=cache_path):
+                    events.put(event)
+            except Exception as e:
+                events.put(("log", f"Наблюдение прервано: {e}"))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.after(UI_TICK_MS, self.drain_watch_queue, stop)
+
+    def stop_watch(self):
+        if self.watch_stop is not None:
+            self.watch_stop.set()
+            self.watch_stop = None
+
+    def drain_watch_queue(self, stop):
+        if stop is not self.watch_stop:
+            return
+        if not self.is_processing and not self.watch_queue.empty() and not self.index_busy():
+            changed = False
+            try:
+                for _ in range(MAX_ROWS_PER_TICK):
+                    kind, payload = self.watch_queue.get_nowait()
+                    if kind == "log":
+                        self.log(payload)
+                    elif kind == "upsert":
+                        self.found_data.upsert(payload)
+                        changed = True
+                    elif kind == "remove":
+                        index = self.found_data.remove_path(payload)
+                        # На место удаленной строки встает последняя - выделение идет за ней
+                        if index is not None and index == self.table.selected_index:
+                            self.table.selected_index = None
+                        elif index is not None and self.table.selected_index == len(self.found_data):
+                            self.table.selected_index = index
+                        changed = True
+            except queue.Empty:
+                pass
+            if changed:
+                self.spatial = None
+                self.query_index = None
+                if self.view is not None:
+                    # Номера строк после удалений сдвигаются - выборку пересчитываем
+                    self.view = self.select_view()
+                    self.table.selected_index = None
+                self.table.refresh()
+                self.lbl_status.config(text=f"Наблюдение: {len(self.found_data)} файлов")
+        self.after(UI_TICK_MS, self.drain_watch_queue, stop)
+
+    # ОБРАБОТЧИК КЛИКА ПО СТРОКЕ (С фиксом для iPhone)
+    def on_row_select(self, index):
+        if index >= self.row_count(): return
+        meta = self.found_data[self.store_index(index)]
+
+        # 1. Текст
+        self.txt_details.config(state="normal")
+        self.txt_details.delete("1.0", "end")
+
+        info = f"Файл: {meta['filename']}\nПуть: {meta['path']}\n"
+        info += f"Камера: {meta['camera']}\n"
+        info += f"Размер: {meta['size']}\n"
+        if meta['lat']: info += f"GPS: {meta['lat']}, {meta['lon']}\n"
+        if meta['duplicate_of']: info += f"Копия файла: {meta['duplicate_of']}\n"
+
+        info += "\n[ТЕХНИЧЕСКИЕ ДАННЫЕ]\n"
+        for k, v in meta['details'].items():
+            info += f"{k}: {v}\n"
+
+        self.txt_details.insert("1.0", info)
+        # Отсюда и до конца - блок полного набора тегов (кнопка "Все теги")
+        self.txt_details.mark_set("full_tags", "end-1c")
+        self.txt_details.mark_gravity("full_tags", "left")
+        self.txt_details.config(state="disabled")
+        self.dump_path = None
+        tags = self.tag_dump.get(meta['path'])
+        if tags is not None:
+            self.set_full_tags_text(self.format_full_tags(tags))
+
+        # 2. Картинка: из LRU сразу, иначе загрузка в фоне; соседние строки грузятся заранее
+        self.preview_path = meta['path']
+        self.preview_shown = False
+        self.thumbs.disk_dir = THUMBS_DIR if self.var_use_cache.get() else None
+        neighbours = []
+        for distance in range(1, PREFETCH + 1):
+            for other in (index + distance, index - distance):
+                if 0 <= other < self.row_count():
+                    neighbours.append(self.found_data.paths[self.store_index(other)])
+        self.thumbs.request(meta['path'], neighbours)
+
+        img = self.thumbs.get(meta['path'])
+        if img is not None:
+            self.show_preview(img)
+        else:
+            self.lbl_preview.config(image="", text="Загрузка...")
+            if not self.thumb_polling:
+                self.thumb_polling = True
+                self.after(UI_TICK_MS, self.poll_thumbnails)
+
+    def poll_thumbnails(self):
+        for path, img in self.thumbs.poll():
+            if path == self.preview_path and not self.preview_shown:
+                self.show_preview(img)
+        if self.preview_shown:
+            self.thumb_polling = False
+        else:
+            self.after(UI_TICK_MS, self.poll_thumbnails)
+
+    # ПОЛНЫЙ НАБОР ТЕГОВ ВЫБРАННОГО ФАЙЛА
+    def show_full_tags(self):
+        if self.preview_path is None: return
+        tags = self.tag_dump.get(self.preview_path)
+        if tags is not None:
+            self.set_full_tags_text(self.format_full_tags(tags))
+            return
+        self.dump_path = self.preview_path
+        self.tag_dump.request(self.dump_path)
+        self.set_full_tags_text("\n[ВСЕ ТЕГИ]\nЗагрузка...\n")
+        if not self.dump_polling:
+            self.dump_polling = True
+            self.after(UI_TICK_MS, self.poll_full_tags)
+
+    def poll_full_tags(self):
+        for path, tags, error in self.tag_dump.poll():
+            if path == self.dump_path:
+                self.dump_path = None
+                self.set_full_tags_text(self.format_full_tags(tags, error))
+        if self.dump_path is None:
+            self.dump_polling = False
+        else:
+            self.after(UI_TICK_MS, self.poll_full_tags)
+
+    def format_full_tags(self, tags, error=None):
+        if error is not None:
+            return f"\n[ВСЕ ТЕГИ]\nНе удалось прочитать: {error}\n"
+        text = f"\n[ВСЕ ТЕГИ: {len(tags)}]\n"
+        for k, v in tags.items():
+            text += f"{k}: {v}\n"
+        return text
+
+    def set_full_tags_text(self, text):
+        self.txt_details.config(state="normal")
+        self.txt_details.delete("full_tags", "end")
+        self.txt_details.insert("end", text)
+        self.txt_details.config(state="disabled")
+
+    def show_preview(self, img):
+        self.preview_shown = True
+        if img is None:
+            self.lbl_preview.config(image="", text="❌ Формат не поддерживается")
+            return
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(img)
+        self.current_image_ref = photo
+        self.lbl_preview.config(image=photo, text="")
+
+    # ПОИСК ПО МЕСТУ
+    def geo_search(self):
+        if not len(self.found_data) or self.is_processing: return
+        text = self.var_geo_point.get().strip()
+        try:
+            parts = [float(p) for p in text.replace(';', ',').split(',')]
+            if len(parts) == 4:
+                query = lambda: self.get_spatial().bbox(*parts)
+                label = f"прямоугольник {text}"
+            else:
+                lat, lon = parse_point(text)
+                radius = float(self.var_geo_radius.get().replace(',', '.'))
+                query = lambda: [row for row, _ in self.get_spatial().within(lat, lon, radius)]
+                label = f"{radius:g} км от {lat}, {lon}"
+        except ValueError:
+            messagebox.showwarning("Внимание", "Введите 'широта, долгота' и радиус в км "
+                                               "или прямоугольник 'юг, запад, север, восток'.")
+            return
+
+        started = time.perf_counter()
+        self.base_query = query
+        self.apply_view()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.lbl_status.config(text=f"Найдено по месту: {self.row_count()}")
+        self.log(f"Поиск ({label}): {self.row_count()} фото за {elapsed:.1f} мс")
+
+    def get_spatial(self):
+        if self.spatial is None:
+            self.spatial = SpatialIndex.from_store(self.found_data)
+        return self.spatial
+
+    # ГРУППЫ ДУБЛИКАТОВ: оригинал, за ним его копии
+    def show_duplicates(self):
+        if self.is_processing: return
+        if self.dedup is None:
+            messagebox.showinfo("Дубликаты", "Включите \"Дубликаты: разбирать один раз\" и повторите анализ.")
+            return
+        self.base_query = lambda: duplicate_rows(self.found_data)
+        self.apply_view()
+        groups, copies, wasted = self.dedup.summary()
+        self.lbl_status.config(text=f"Групп дубликатов: {groups}, копий: {copies} ({format_bytes(wasted)} лишних)")
+
+    def clear_view(self):
+        if self.base_query is None: return
+        self.base_query = None
+        self.apply_view()
+        self.lbl_status.config(text=f"Показано: {self.row_count()} из {len(self.found_data)}")
+
+    # ФИЛЬТРЫ И СОРТИРОВКА (query.py): выборка = исходная выборка + фильтры панели + порядок колонки
+    def get_query_index(self):
+        if self.query_index is None:
+            self.query_index = ResultIndex(self.found_data)
+        return self.query_index
+
+    def prepare_query_index(self):
+        # Перестановки и индексы считаются в фоне, чтобы первый клик по заголовку не ждал
+        index = self.get_query_index()
+        cancel = threading.Event()
+        thread = threading.Thread(target=index.prepare, args=(cancel,), daemon=True)
+        self.index_prep = (thread, cancel)
+        thread.start()
+
+    def index_busy(self):
+        # Пока фоновый prepare читает found_data, хранилище менять нельзя: просим его остановиться
+        # (он закончит текущий шаг) и откладываем изменения до следующего тика
+        if self.index_prep is None:
+            return False
+        thread, cancel = self.index_prep
+        if thread.is_alive():
+            cancel.set()
+            return True
+        self.index_prep = None
+        return False
+
+    def select_view(self):
+        rows = self.base_query() if self.base_query is not None else None
+        column, descending = self.sort_state
+        return self.get_query_index().select(rows, sort=column, descending=descending, **self.filters)
+
+    def apply_view(self):
+        self.view = self.select_view()
+        self.table.reset()
+
+    def sort_by(self, column):
+        if self.is_processing or not len(self.found_data):
+            return
+        current, descending = self.sort_state
+        self.sort_state = (column, not descending if column == current else False)
+        started = time.perf_counter()
+        self.apply_view()
+        self.table.set_sort(*self.sort_state)
+        self.lbl_status.config(text=f"Сортировка: {(time.perf_counter() - started) * 1000:.0f} мс")
+
+    def apply_filters(self, event=None):
+        if self.is_processing or not len(self.found_data):
+            return
+        filters = {}
+        try:
+            if self.var_f_camera.get().strip():
+                filters["camera"] = self.var_f_camera.get().strip()
+            if self.var_f_from.get().strip():
+                filters["date_from"] = parse_date(self.var_f_from.get())
+            if self.var_f_to.get().strip():
+                filters["date_to"] = parse_date(self.var_f_to.get(), end=True)
+        except ValueError:
+            messagebox.showwarning("Внимание", "Дата: ДД.ММ.ГГГГ, ГГГГ-ММ-ДД или ГГГГ.")
+            return
+        gps = self.var_f_gps.get()
+        if gps != "все":
+            filters["has_gps"] = gps == "есть"
+        if self.var_f_name.get().strip():
+            filters["name"] = self.var_f_name.get().strip()
+        self.filters = filters
+        started = time.perf_counter()
+        self.apply_view()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.lbl_status.config(text=f"Показано: {self.row_count()} из {len(self.found_data)} ({elapsed:.0f} мс)")
+
+    def reset_filters(self):
+        for var in (self.var_f_camera, self.var_f_from, self.var_f_to, self.var_f_name):
+            var.set("")
+        self.var_f_gps.set("все")
+        self.sort_state = (None, False)
+        self.table.set_sort(None)
+        if self.is_processing: return
+        self.filters = {}
+        self.apply_view()
+        self.lbl_status.config(text=f"Показано: {self.row_count()} из {len(self.found_data)}")
+
+    def export_csv(self):
+        if not self.found_data: return
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
+        if path:
+            # Выбранные колонки тегов попадают в CSV (набор по умолчанию - прежний формат)
+            tags = self.analysis_tags or DETAIL_TAGS
+            columns = () if tags == DETAIL_TAGS else tuple(detail_key(t) for t in tags)
+            from exporters import export_csv
+            self.start_export("CSV", export_csv, path, tag_columns=columns, duplicates=self.dedup is not None)
+
+    def export_html(self):
+        if not self.found_data:
+            return
+
+        path = filedialog.asksaveasfilename(defaultextension=".html",
+                                            filetypes=[("HTML Files", "*.html")])
+        if not path:
+            return
+
+        from exporters import export_html
+        self.start_export("HTML отчет", export_html, path, self.row_count())
+
+    def export_jsonl(self):
+        if not self.found_data: return
+        path = filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=[("JSON Lines", "*.jsonl")])
+        if path:
+            from exporters import export_jsonl
+            self.start_export("JSON Lines", export_jsonl, path, self.found_data.duplicates, records=True)
+
+    def export_columnar(self):
+        if not self.found_data: return
+        path = filedialog.asksaveasfilename(defaultextension=".parquet",
+                                            filetypes=[("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow *.feather")])
+        if path:
+            # Колонка на каждый тег, который есть в результатах
+            from exporters import export_columnar
+            self.start_export("Parquet/Arrow", export_columnar, path, list(self.found_data.details),
+                              self.found_data.duplicates, records=True)
+
+    # Экспорт идет в фоновом потоке, прогресс забирается по таймеру главного цикла.
+    # Выгружается то, что показано в таблице: выборка, фильтры и порядок сортировки.
+    # records=True - экспорту нужны "сырые" записи (PhotoRecord), а не строки таблицы
+    def start_export(self, label, exporter, path, *args, records=False, **kwargs):
+        if self.is_processing: return
+        store, view = self.found_data, self.view
+        if records:
+            rows = (store.record(i) for i in (range(len(store)) if view is None else view))
+        else:
+            rows = store if view is None else (store[i] for i in view)
+        self.is_processing = True
+        self.btn_start.config(state="disabled")
+        for button in self.export_buttons: button.config(state="disabled")
+
+        state = {"label": label, "done": 0, "total": self.row_count(),
+                 "paths": None, "error": None, "finished": False}
+        self.export_state = state
+
+        def work():
+            try:
+                state["paths"] = exporter(rows, path, *args,
+                                          progress=lambda n: state.update(done=n), **kwargs)
+            except Exception as e:
+                state["error"] = e
+            finally:
+                state["finished"] = True
+
+        threading.Thread(target=work, daemon=True).start()
+        self.after(UI_TICK_MS, self.poll_export)
+
+    def poll_export(self):
+        state = self.export_state
+        self.progress['maximum'] = max(state["total"], 1)
+        self.progress['value'] = state["done"]
+        self.lbl_status.config(text=f"Экспорт: {state['done']}/{state['total']}")
+        if not state["finished"]:
+            self.after(UI_TICK_MS, self.poll_export)
+            return
+
+        self.is_processing = False
+        self.btn_start.config(state="normal")
+        for button in self.export_buttons: button.config(state="normal")
+        self.progress['value'] = state["total"]
+        self.lbl_status.config(text="Готово")
+        if state["error"] is not None:
+            messagebox.showerror("Ошибка экспорта", str(state["error"]))
+            return
+        paths = state["paths"]
+        if len(paths) > 1:
+            self.log(f"{state['label']} сохранен: {paths[0]} (страниц: {len(paths)})")
+        else:
+            self.log(f"{state['label']} сохранен: {paths[0]}")
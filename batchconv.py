@@ -0,0 +1,124 @@
+import datetime
+from itertools import chain
+
+from startup import optional
+
+# ПАКЕТНОЕ ПРЕОБРАЗОВАНИЕ ДАТ И GPS
+# Даты 'YYYY:MM:DD HH:MM:SS' разбираются по фиксированным позициям символов (без strptime),
+# координаты (градусы, минуты, секунды дробями) считаются для всей пачки сразу.
+# С NumPy - векторно, без него - тем же способом в цикле. NumPy загружается при первой пачке
+# (startup.optional): процесс пула, которому пачки не достались, его не импортирует.
+# None в результате - значение нестандартное: его разбирает обычный (медленный) путь в core.py.
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_SEPARATORS = {4: ':', 7: ':', 10: ' ', 13: ':', 16: ':'}
+_MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+# ДАТЫ
+def parse_timestamp(text):
+    # Одна строка -> секунды от 1970-01-01 или None
+    if len(text) != 19 or not text.isascii():
+        return None
+    for pos, sep in _SEPARATORS.items():
+        if text[pos] != sep: return None
+    if not all('0' <= text[pos] <= '9' for pos in _DIGITS):
+        return None
+    hour, minute, second = int(text[11:13]), int(text[14:16]), int(text[17:19])
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    try:
+        days = datetime.date(int(text[0:4]), int(text[5:7]), int(text[8:10])).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return None
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def parse_timestamps(texts):
+    np = optional("numpy")
+    if np is None:
+        return [parse_timestamp(t) for t in texts]
+    if not texts:
+        return []
+    raw = np.array([t.encode('ascii', 'replace') if len(t) == 19 else b'' for t in texts], dtype='S19')
+    chars = raw.view(np.uint8).reshape(len(texts), 19).astype(np.int64)
+    digits = chars - ord('0')
+
+    ok = ((digits[:, _DIGITS] >= 0) & (digits[:, _DIGITS] <= 9)).all(axis=1)
+    for pos, sep in _SEPARATORS.items():
+        ok &= chars[:, pos] == ord(sep)
+
+    def number(start, width):
+        value = np.zeros(len(texts), dtype=np.int64)
+        for pos in range(start, start + width):
+            value = value * 10 + digits[:, pos]
+        return value
+
+    year, month, day = number(0, 4), number(5, 2), number(8, 2)
+    hour, minute, second = number(11, 2), number(14, 2), number(17, 2)
+
+    ok &= (year >= 1) & (month >= 1) & (month <= 12) & (hour <= 23) & (minute <= 59) & (second <= 59)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = np.array(_MONTH_DAYS, dtype=np.int64)[np.clip(month, 1, 12) - 1] + (leap & (month == 2))
+    ok &= (day >= 1) & (day <= month_days)
+
+    # Номер дня от 1970-01-01 по григорианскому календарю (алгоритм days_from_civil)
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+
+    stamps = days * 86400 + hour * 3600 + minute * 60 + second
+    return [int(s) if good else None for s, good in zip(stamps.tolist(), ok.tolist())]
+
+
+# GPS
+def _degrees(value, ref, negative):
+    (dn, dd), (mn, md), (sn, sd) = value
+    if not (dd and md and sd):
+        return None
+    deg = float(dn) / float(dd) + (float(mn) / float(md) / 60.0) + (float(sn) / float(sd) / 3600.0)
+    return round(-deg if ref == negative else deg, 6)
+
+
+def _is_triple(value):
+    return len(value) == 3 and all(len(pair) == 2 for pair in value)
+
+
+def convert_gps(values, refs, negative):
+    # values - дроби [(числитель, знаменатель)] x 3, refs - 'N'/'S' или 'E'/'W';
+    # negative - полушарие со знаком минус ('S' или 'W')
+    np = optional("numpy")
+    if np is None or not values:
+        return [_degrees(v, r, negative) if _is_triple(v) else None for v, r in zip(values, refs)]
+
+    picked = range(len(values))
+    if not all(len(v) == 3 for v in values):
+        picked = [i for i, value in enumerate(values) if _is_triple(value)]
+    try:
+        # Плоский поток чисел быстрее, чем np.array по вложенным спискам
+        flat = chain.from_iterable(chain.from_iterable(values[i]) for i in picked)
+        parts = np.fromiter(flat, dtype=np.float64, count=len(picked) * 6).reshape(-1, 3, 2)
+    except (TypeError, ValueError):
+        return [_degrees(v, r, negative) if _is_triple(v) else None for v, r in zip(values, refs)]
+
+    nums, dens = parts[:, :, 0], parts[:, :, 1]
+    ok = (dens != 0).all(axis=1)
+    ratios = nums / np.where(dens != 0, dens, 1.0)
+    deg = ratios[:, 0] + ratios[:, 1] / 60.0 + ratios[:, 2] / 3600.0
+    south = np.fromiter((refs[i] == negative for i in picked), dtype=bool, count=len(picked))
+    deg = np.where(south, -deg, deg)
+    rounded = np.round(deg, 6)
+    # np.round (умножение и rint) на "половинках" иногда расходится с round() на единицу
+    # в 6-м знаке: такие значения досчитываются обычным round, чтобы результат не зависел от пути
+    scaled = np.abs(deg) * 1e6
+    for k in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[k] = round(float(deg[k]), 6)
+
+    result = [None] * len(values)
+    for i, value, good in zip(picked, rounded.tolist(), ok.tolist()):
+        if good: result[i] = value
+    return result
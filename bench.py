@@ -0,0 +1,374 @@
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+from core import process_image
+from engine import ExtractionEngine, default_workers
+from exporters import export_csv, export_html
+from scanner import iter_images
+from store import ResultStore
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# ЗАМЕРЫ ПРОИЗВОДИТЕЛЬНОСТИ
+# python -m bench generate D:\corpus --count 20000 --formats jpg=8,png=1,tiff=1 --gps 0.6 --depth 3
+# python -m bench run D:\corpus -o report.json
+# python -m bench run --synthetic 5000            (временный набор, удаляется после замера)
+#
+# Этапы замеряются по отдельности: scan (обход), extract (process_image по одному файлу,
+# задержки p50/p99), engine (пул процессов), export (CSV + HTML), preview (миниатюры).
+# Отчет - JSON. "MB read" - байты, прочитанные процессом (/proc/self/io, только Linux);
+# файлы обычно уже в кэше ОС, т.е. замер "теплый".
+
+FORMATS = {"jpg": "JPEG", "png": "PNG", "tiff": "TIFF"}
+EXIF_LEVELS = ("none", "basic", "full")
+CAMERAS = [("Canon", "Canon EOS 40D"), ("NIKON", "COOLPIX P6000"), ("FUJIFILM", "FinePix6900ZOOM"),
+           ("Apple", "iPhone 15"), ("SONY", "ILCE-7M3")]
+STAGES = ("scan", "extract", "engine", "export", "preview")
+PREVIEW_SAMPLE = 200
+
+
+# СИНТЕТИЧЕСКИЙ НАБОР ФАЙЛОВ
+def parse_mix(text):
+    # "jpg=8,png=1" -> {"jpg": 8.0, "png": 1.0}
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip().lower()
+        if name not in FORMATS:
+            raise ValueError(f"Неизвестный формат: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _rational(value, den=10000):
+    from PIL import TiffImagePlugin
+    return TiffImagePlugin.IFDRational(int(round(value * den)), den)
+
+
+def _make_exif(rnd, level, gps):
+    from PIL import Image
+    exif = Image.Exif()
+    if level == "none" and not gps:
+        return None
+    if level != "none":
+        make, model = rnd.choice(CAMERAS)
+        date = (f"{rnd.randint(2000, 2025):04d}:{rnd.randint(1, 12):02d}:{rnd.randint(1, 28):02d} "
+                f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}")
+        exif[0x010F] = make
+        exif[0x0110] = model
+        exif[0x0132] = date
+        if level == "full":
+            exif[0x0131] = "bench 1.0"
+            sub = exif.get_ifd(0x8769)
+            sub[0x9003] = date
+            sub[0x8827] = rnd.choice([100, 200, 400, 800, 1600])
+            sub[0x829A] = _rational(1 / rnd.choice([60, 125, 250, 500]), 10000)
+            sub[0x829D] = _rational(rnd.choice([1.8, 2.8, 4.0, 5.6, 8.0]), 10)
+            sub[0x920A] = _rational(rnd.choice([24, 35, 50, 85]), 1)
+            sub[0x9209] = rnd.choice([0, 1, 16, 24])
+    if gps:
+        lat, lon = rnd.uniform(-80, 80), rnd.uniform(-180, 180)
+        info = exif.get_ifd(0x8825)
+        for ref_tag, value_tag, value, refs in ((1, 2, lat, "NS"), (3, 4, lon, "EW")):
+            value_abs = abs(value)
+            minutes = (value_abs - int(value_abs)) * 60
+            info[ref_tag] = refs[value < 0]
+            info[value_tag] = (_rational(int(value_abs), 1), _rational(int(minutes), 1),
+                               _rational((minutes - int(minutes)) * 60, 100))
+    return exif
+
+
+def _jpeg_with_exif(base, exif):
+    # Готовый JPEG без EXIF + сегмент APP1 сразу после SOI: без повторного сжатия на каждый файл
+    if exif is None:
+        return base
+    payload = exif.tobytes()
+    return base[:2] + b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload + base[2:]
+
+
+def _png_with_exif(base, exif):
+    # Чанк eXIf сразу после IHDR (8 байт сигнатуры + 25 байт IHDR)
+    if exif is None:
+        return base
+    payload = exif.tobytes()[6:]    # без "Exif\0\0"
+    chunk = (struct.pack('>I', len(payload)) + b'eXIf' + payload +
+             struct.pack('>I', zlib.crc32(b'eXIf' + payload)))
+    return base[:33] + chunk + base[33:]
+
+
+def generate_corpus(dest, count, mix=None, exif_level="full", gps_ratio=0.5, depth=2, fanout=4,
+                    size=(640, 480), seed=0):
+    # Набор из count файлов в дереве глубиной depth (по fanout подпапок на уровень).
+    # Возвращает сводку набора
+    from PIL import Image
+    rnd = random.Random(seed)
+    mix = mix or {"jpg": 1.0}
+    names, weights = list(mix), list(mix.values())
+
+    # Одно "фото" (сглаженный шум) на весь набор: JPEG и PNG кодируются один раз,
+    # EXIF каждого файла вклеивается в готовые байты
+    small = (max(1, size[0] // 16), max(1, size[1] // 16))
+    img = Image.frombytes("RGB", small, rnd.randbytes(small[0] * small[1] * 3)).resize(size, Image.BICUBIC)
+    bases = {}
+    for fmt in ("jpg", "png"):
+        buf = io.BytesIO()
+        img.save(buf, FORMATS[fmt], **({"quality": 85} if fmt == "jpg" else {}))
+        bases[fmt] = buf.getvalue()
+
+    folders = [dest]
+    for _ in range(depth):
+        folders = [os.path.join(f, f"d{i}") for f in folders for i in range(fanout)]
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    counts = dict.fromkeys(names, 0)
+    total_bytes = 0
+    for n in range(count):
+        fmt = rnd.choices(names, weights)[0]
+        exif = _make_exif(rnd, exif_level, rnd.random() < gps_ratio)
+        path = os.path.join(folders[n % len(folders)], f"img{n:07d}.{fmt}")
+        if fmt == "jpg":
+            data = _jpeg_with_exif(bases["jpg"], exif)
+        elif fmt == "png":
+            data = _png_with_exif(bases["png"], exif)
+        else:
+            out = io.BytesIO()
+            img.save(out, FORMATS[fmt], **({"exif": exif} if exif is not None else {}))
+            data = out.getvalue()
+        with open(path, 'wb') as f:
+            f.write(data)
+        counts[fmt] += 1
+        total_bytes += len(data)
+    return {"root": dest, "files": count, "formats": counts, "mb": round(total_bytes / 2 ** 20, 2),
+            "exif": exif_level, "gps_ratio": gps_ratio, "depth": depth, "folders": len(folders)}
+
+
+# ИЗМЕРЕНИЯ
+def _bytes_read():
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb(who="self"):
+    # Пик с начала процесса (ru_maxrss не сбрасывается): у каждого этапа - пик "на момент конца этапа"
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / 2 ** 20, 1)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    # Ближайший ранг: p50 из 100 значений - 50-е по порядку
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+class Stage:
+    # with Stage("extract") as st: ... st.latencies.append(секунды) ... -> st.report()
+    def __init__(self, name, files=0):
+        self.name = name
+        self.files = files
+        self.latencies = []
+        self.extra = {}
+
+    def __enter__(self):
+        self._read = _bytes_read()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        read = _bytes_read()
+        self.mb_read = None if read is None or self._read is None else round((read - self._read) / 2 ** 20, 2)
+        self.peak_rss_mb = _peak_rss_mb()
+
+    def report(self):
+        files = self.files or len(self.latencies)
+        result = {"files": files, "seconds": round(self.seconds, 4),
+                  "files_per_s": round(files / self.seconds, 1) if self.seconds else None,
+                  "mb_read": self.mb_read, "peak_rss_mb": self.peak_rss_mb}
+        if self.latencies:
+            lat = sorted(self.latencies)
+            result["latency_ms"] = {"p50": round(percentile(lat, 50) * 1000, 3),
+                                    "p99": round(percentile(lat, 99) * 1000, 3),
+                                    "max": round(lat[-1] * 1000, 3)}
+        result.update(self.extra)
+        return result
+
+
+def run_benchmark(root, target_exts=(".jpg", ".jpeg", ".png", ".tiff"), workers=None,
+                  stages=STAGES, preview_sample=PREVIEW_SAMPLE):
+    report = {"environment": environment(), "root": root, "stages": {}}
+    workers = workers or default_workers()
+
+    with Stage("scan") as st:
+        entries = list(iter_images(root, target_exts))
+    st.files = len(entries)
+    st.extra["mb_total"] = round(sum(e[1] for e in entries) / 2 ** 20, 2)
+    report["stages"]["scan"] = st.report()
+
+    records = []
+    if "extract" in stages or "export" in stages:
+        with Stage("extract") as st:
+            for path, size, _ in entries:
+                started = time.perf_counter()
+                records.append(process_image(path, size))
+                st.latencies.append(time.perf_counter() - started)
+        st.extra["with_gps"] = sum(1 for r in records if r.lat is not None)
+        st.extra["with_date"] = sum(1 for r in records if r.date is not None)
+        if "extract" in stages:
+            report["stages"]["extract"] = st.report()
+
+    if "engine" in stages:
+        with Stage("engine", len(entries)) as st:
+            done = sum(1 for _ in ExtractionEngine(workers=workers).run(entries))
+        st.extra["workers"] = workers
+        st.extra["results"] = done
+        st.extra["children_peak_rss_mb"] = _peak_rss_mb("children")
+        report["stages"]["engine"] = st.report()
+
+    if "export" in stages:
+        store = ResultStore()
+        store.extend(records)
+        out_dir = tempfile.mkdtemp(prefix="exif-bench-")
+        try:
+            with Stage("export", len(store) * 2) as st:
+                export_csv(store, os.path.join(out_dir, "report.csv"))
+                pages = export_html(store, os.path.join(out_dir, "report.html"), len(store))
+            written = sum(os.path.getsize(os.path.join(out_dir, n)) for n in os.listdir(out_dir))
+            st.extra["mb_written"] = round(written / 2 ** 20, 2)
+            st.extra["html_pages"] = len(pages)
+            report["stages"]["export"] = st.report()
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    if "preview" in stages:
+        from thumbs import load_thumbnail
+        sample = entries[::max(1, len(entries) // preview_sample)][:preview_sample]
+        failed = 0
+        with Stage("preview") as st:
+            for path, _, _ in sample:
+                started = time.perf_counter()
+                try:
+                    load_thumbnail(path)
+                except Exception:
+                    failed += 1
+                st.latencies.append(time.perf_counter() - started)
+        st.extra["failed"] = failed
+        report["stages"]["preview"] = st.report()
+    return report
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "numpy": numpy_version,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+# КОНСОЛЬ
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Замеры производительности EXIF MetadataAnalyzer")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def corpus_options(p):
+        p.add_argument("--formats", type=parse_mix, default="jpg", help="доли форматов, например jpg=8,png=1,tiff=1")
+        p.add_argument("--exif", choices=EXIF_LEVELS, default="full", help="набор тегов в файлах")
+        p.add_argument("--gps", type=float, default=0.5, help="доля файлов с координатами (0..1)")
+        p.add_argument("--depth", type=int, default=2, help="глубина дерева папок")
+        p.add_argument("--fanout", type=int, default=4, help="подпапок на каждом уровне")
+        p.add_argument("--size", default="640x480", help="размер изображений, ШxВ")
+        p.add_argument("--seed", type=int, default=0)
+
+    gen = sub.add_parser("generate", help="создать синтетический набор файлов")
+    gen.add_argument("dest")
+    gen.add_argument("--count", type=int, default=1000)
+    corpus_options(gen)
+
+    run = sub.add_parser("run", help="замерить этапы на папке или временном наборе")
+    run.add_argument("root", nargs="?", help="папка с файлами (не нужна при --synthetic)")
+    run.add_argument("--synthetic", type=int, metavar="N", help="создать временный набор из N файлов")
+    run.add_argument("-w", "--workers", type=int, default=default_workers())
+    run.add_argument("--stages", default=",".join(STAGES), help="этапы через запятую: %(default)s")
+    run.add_argument("--preview-sample", type=int, default=PREVIEW_SAMPLE)
+    run.add_argument("-o", "--output", default="-", help="файл JSON-отчета ('-' - stdout)")
+    corpus_options(run)
+    return parser
+
+
+def _size(text):
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        summary = generate_corpus(args.dest, args.count, args.formats, args.exif, args.gps,
+                                  args.depth, args.fanout, _size(args.size), args.seed)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"неизвестные этапы: {', '.join(sorted(unknown))}")
+    if not args.root and not args.synthetic:
+        parser.error("укажите папку или --synthetic N")
+
+    temp_dir = None
+    corpus = None
+    root = args.root
+    try:
+        if args.synthetic:
+            temp_dir = root = tempfile.mkdtemp(prefix="exif-corpus-")
+            corpus = generate_corpus(root, args.synthetic, args.formats, args.exif, args.gps,
+                                     args.depth, args.fanout, _size(args.size), args.seed)
+        report = run_benchmark(root, workers=args.workers, stages=stages, preview_sample=args.preview_sample)
+        if corpus:
+            report["corpus"] = corpus
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+from core import DETAIL_TAGS, TAG_COLUMNS, detail_key, format_record, normalize_tags
+from dedup import DedupIndex, duplicate_rows
+from engine import default_workers
+from exporters import WRITE_BUFFER, csv_row, export_columnar, export_html, write_csv, write_html, write_jsonl
+from jobs import AnalysisJob
+from pipeline import watch
+from query import SORT_COLUMNS, ResultIndex, parse_date
+from scanner import parse_shard
+from spatial import SpatialIndex, parse_point
+from stats import RunStats, profile_call
+from store import ResultStore
+
+# КОНСОЛЬНЫЙ РЕЖИМ (без tkinter)
+# python -m cli /path/to/photos --ext .jpg .png --workers 8 --format csv -o report.csv
+# Часть распределенного анализа (слияние частей - shards.py):
+# python -m cli /mnt/vol1 /mnt/vol2 --shard 3/8 --partial part_3.sqlite
+
+DEFAULT_EXTS = ['.jpg', '.jpeg']
+FORMATS = ('csv', 'html', 'jsonl', 'parquet', 'arrow')
+# Колоночные форматы пишутся только в файл (pyarrow)
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli",
+                                     description="EXIF MetadataAnalyzer: анализ метаданных без графического интерфейса")
+    parser.add_argument("root", nargs="+", help="папка с фотографиями (можно несколько)")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false",
+                        help="не заходить во вложенные папки")
+    parser.add_argument("--ext", nargs="+", default=DEFAULT_EXTS,
+                        help="расширения файлов (по умолчанию: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=default_workers(),
+                        help="число процессов (по умолчанию: %(default)s)")
+    parser.add_argument("--io-concurrency", type=int, default=0, metavar="N",
+                        help="режим сетевого диска: N параллельных чтений заголовков вместо пула процессов")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="csv",
+                        help="формат вывода (jsonl - JSON Lines с типами и всеми тегами; parquet/arrow - "
+                             "колоночный файл, нужен pyarrow)")
+    parser.add_argument("-o", "--output", default="-", help="файл отчета ('-' - stdout)")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="не использовать кэш результатов")
+    parser.add_argument("--near", metavar="LAT,LON,KM",
+                        help="только фото не дальше KM км от точки (ближние первыми)")
+    parser.add_argument("--bbox", metavar="S,W,N,E",
+                        help="только фото внутри прямоугольника: юг, запад, север, восток")
+    parser.add_argument("--camera", metavar="TEXT", help="только камеры, в названии которых есть TEXT")
+    parser.add_argument("--from", dest="date_from", metavar="DATE",
+                        help="снятые не раньше DATE (ДД.ММ.ГГГГ, ГГГГ-ММ-ДД или ГГГГ)")
+    parser.add_argument("--to", dest="date_to", metavar="DATE", help="снятые не позже DATE")
+    parser.add_argument("--gps", choices=("yes", "no"), help="только с координатами / только без них")
+    parser.add_argument("--name", metavar="TEXT", help="только файлы, в имени которых есть TEXT")
+    parser.add_argument("--sort", metavar="COLUMN[:desc]",
+                        help=f"порядок строк: {', '.join(SORT_COLUMNS)}; ':desc' - по убыванию")
+    parser.add_argument("--tags", nargs="+", metavar="TAG",
+                        help="колонки тегов в результате вместо набора по умолчанию (и в CSV): "
+                             + ", ".join(detail_key(t) for t in TAG_COLUMNS))
+    parser.add_argument("--shard", metavar="K/N",
+                        help="только часть K из N (0 <= K < N): файлы делятся по хэшу пути относительно корня")
+    parser.add_argument("--partial", metavar="FILE",
+                        help="записать результаты в файл части (SQLite) вместо отчета; слияние: python -m shards merge")
+    parser.add_argument("--dedup", action="store_true",
+                        help="одинаковые по содержимому файлы разбирать один раз (колонка 'Копия файла')")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="только группы дубликатов: оригинал, за ним его копии (включает --dedup)")
+    parser.add_argument("--watch", action="store_true",
+                        help="после отчета следить за папкой и дописывать новые/измененные файлы (только csv)")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="сохранить статистику прогона (счетчики, время этапов, ошибки) в JSON ('-' - stderr)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="cProfile основного процесса в FILE (смотреть: python -m pstats FILE)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не писать ход работы в stderr")
+    return parser
+
+
+def normalize_exts(exts):
+    return tuple(e.lower() if e.startswith('.') else '.' + e.lower() for e in exts)
+
+
+def open_output(path):
+    if path == "-":
+        return open(sys.stdout.fileno(), 'w', newline='', encoding='utf-8', closefd=False)
+    return open(path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER)
+
+
+def parse_geo(args, parser):
+    # (функция выборки строк хранилища) или None, если фильтра по месту нет
+    try:
+        if args.near:
+            point, radius = args.near.rsplit(',', 1)
+            lat, lon = parse_point(point)
+            radius = float(radius)
+            return lambda store: [row for row, _ in SpatialIndex.from_store(store).within(lat, lon, radius)]
+        if args.bbox:
+            south, west, north, east = (float(p) for p in args.bbox.split(','))
+            return lambda store: SpatialIndex.from_store(store).bbox(south, west, north, east)
+    except ValueError:
+        parser.error("--near ожидает LAT,LON,KM, --bbox - S,W,N,E")
+    return None
+
+
+def parse_filters(args, parser):
+    # Аргументы ResultIndex.select: фильтры и сортировка
+    filters = {}
+    if args.camera: filters["camera"] = args.camera
+    if args.name: filters["name"] = args.name
+    if args.gps: filters["has_gps"] = args.gps == "yes"
+    try:
+        if args.date_from: filters["date_from"] = parse_date(args.date_from)
+        if args.date_to: filters["date_to"] = parse_date(args.date_to, end=True)
+    except ValueError:
+        parser.error("--from/--to ожидают ДД.ММ.ГГГГ, ГГГГ-ММ-ДД или ГГГГ")
+    if args.sort:
+        column, _, order = args.sort.partition(':')
+        if column not in SORT_COLUMNS or order not in ("", "asc", "desc"):
+            parser.error(f"--sort: колонка из {', '.join(SORT_COLUMNS)}, порядок :asc или :desc")
+        filters["sort"] = column
+        filters["descending"] = order == "desc"
+    return filters
+
+
+def parse_tags(args, parser):
+    # --tags -> (колонки для разбора, колонки CSV); без --tags - набор по умолчанию, CSV как раньше
+    if not args.tags:
+        return None, ()
+    try:
+        tags = normalize_tags(args.tags)
+    except ValueError as e:
+        parser.error(f"--tags: {e}")
+    return tags, tuple(detail_key(t) for t in tags)
+
+
+def follow(args, out, log, job, dedup=None):
+    # Режим --watch: строки новых и измененных файлов дописываются в CSV, удаления - в stderr.
+    # Кэш, папки и поиск дубликатов - те же, что у анализа перед ним (job). Остановка - Ctrl+C
+    writer = csv.writer(out)
+    try:
+        for kind, payload in watch(job.root, normalize_exts(args.ext), args.recursive,
+                                   workers=args.workers, use_cache=args.use_cache, log=log,
+                                   io_concurrency=args.io_concurrency, tags=args.tags, dedup=dedup,
+                                   cache_path=job.checkpoint_path if args.use_cache else None):
+            if kind == "upsert":
+                item = format_record(payload)
+                if dedup: item['duplicate_of'] = dedup.original.get(payload.path, "")
+                writer.writerow(csv_row(item, args.tag_columns, dedup is not None))
+                out.flush()
+            else:
+                log(f"Удален: {payload}")
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.watch and args.format != "csv":
+        parser.error("--watch поддерживается только для --format csv")
+    if args.format in COLUMNAR_FORMATS and args.output == "-":
+        parser.error(f"--format {args.format} пишется только в файл: укажите -o")
+    geo_query = parse_geo(args, parser)
+    if geo_query and args.duplicates:
+        parser.error("--duplicates нельзя совмещать с --near/--bbox")
+    if args.duplicates:
+        geo_query = duplicate_rows
+    filters = parse_filters(args, parser)
+    args.tags, args.tag_columns = parse_tags(args, parser)
+    try:
+        args.shard = parse_shard(args.shard) if args.shard else None
+    except ValueError:
+        parser.error("--shard ожидает K/N, где 0 <= K < N")
+    if args.partial and (args.watch or geo_query or filters):
+        parser.error("--partial нельзя совмещать с --watch и выборкой строк")
+    if args.watch and args.shard:
+        parser.error("--watch нельзя совмещать с --shard")
+    if args.watch and (geo_query or filters):
+        parser.error("--watch нельзя совмещать с выборкой строк (--near/--bbox/--duplicates, фильтры, --sort)")
+    selection = None
+    if geo_query or filters:
+        def selection(store):
+            # Исходная выборка (по месту, дубликаты), затем фильтры и сортировка по индексу хранилища
+            rows = geo_query(store) if geo_query else None
+            return ResultIndex(store).select(rows, **filters) if filters else rows
+    for root in args.root:
+        if not os.path.isdir(root):
+            print(f"Папка не найдена: {root}", file=sys.stderr)
+            return 2
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    stats = RunStats() if args.stats else None
+    try:
+        if args.profile:
+            profile_call(args.profile, run, args, selection, log, stats)
+            log(f"Профиль сохранен: {args.profile}")
+        else:
+            run(args, selection, log, stats)
+    except KeyboardInterrupt:
+        # Обработанные файлы уже в контрольной точке (jobs.py)
+        log("Прервано: повторный запуск с теми же параметрами продолжит с того же места")
+        return 130
+    finally:
+        if stats is not None:
+            if args.stats == "-":
+                print(json.dumps(stats.snapshot(), ensure_ascii=False, indent=2), file=sys.stderr)
+            else:
+                stats.save_json(args.stats)
+    return 0
+
+
+def run(args, selection, log, stats=None):
+    dedup = DedupIndex(stats) if args.dedup or args.duplicates else None
+    roots = args.root[0] if len(args.root) == 1 else args.root
+    job = AnalysisJob(roots, normalize_exts(args.ext), args.recursive, workers=args.workers,
+                      use_cache=args.use_cache, io_concurrency=args.io_concurrency, stats=stats,
+                      dedup=dedup, log=log, tags=args.tags, shard=args.shard)
+    results = job.run()
+
+    if args.partial:
+        # Файл части: записи по мере готовности, отметка о завершении - в самом конце
+        from shards import write_partial
+        count = write_partial(args.partial, results, args.root, normalize_exts(args.ext), args.recursive,
+                              args.tags, args.shard, dedup.original if dedup else None)
+        log(f"Найдено изображений: {job.scanner.found}")
+        log(f"Часть сохранена: {args.partial} ({count} записей)")
+        return
+
+    def row(rec):
+        item = format_record(rec)
+        if dedup: item['duplicate_of'] = dedup.original.get(rec.path, "")
+        return item
+
+    if selection:
+        # Выборка (по месту, группы дубликатов, фильтры, сортировка): собираем хранилище
+        # и выводим только найденные строки
+        store = ResultStore()
+        store.extend(results)
+        if dedup: store.duplicates = dedup.original
+        rows = selection(store)
+        log(f"Отобрано: {len(rows)} из {len(store)}")
+        selected = (store[i] for i in rows)
+        if args.format in ("jsonl",) + COLUMNAR_FORMATS:
+            write_records(args, (store.record(i) for i in rows), store.duplicates)
+        elif args.format == "csv":
+            with open_output(args.output) as out:
+                write_csv(selected, out, tag_columns=args.tag_columns, duplicates=dedup is not None)
+        elif args.output == "-":
+            with open_output(args.output) as out:
+                write_html(selected, out, len(rows))
+        else:
+            export_html(selected, args.output, len(rows))
+    elif args.format == "csv":
+        # CSV пишется построчно по мере готовности результатов
+        with open_output(args.output) as out:
+            write_csv((row(rec) for rec in results), out, tag_columns=args.tag_columns, duplicates=dedup is not None)
+            if args.watch:
+                out.flush()
+                log(f"Найдено изображений: {job.scanner.found}")
+                follow(args, out, log, job, dedup)
+                return
+    elif args.format in ("jsonl",) + COLUMNAR_FORMATS:
+        # Тоже по мере готовности: JSON Lines - построчно, Parquet/Arrow - группами строк
+        write_records(args, results, dedup.original if dedup else None)
+    else:
+        # Для HTML нужно общее число строк: сначала собираем компактное хранилище
+        store = ResultStore()
+        store.extend(results)
+        if dedup: store.duplicates = dedup.original
+        if args.output == "-":
+            with open_output(args.output) as out:
+                write_html(store, out, len(store))
+        else:
+            pages = export_html(store, args.output, len(store))
+            if len(pages) > 1: log(f"Страниц отчета: {len(pages)}")
+    log(f"Найдено изображений: {job.scanner.found}")
+    if args.output != "-":
+        log(f"Отчет сохранен: {args.output}")
+
+
+def write_records(args, records, duplicates=None):
+    # JSON Lines / Parquet / Arrow из "сырых" записей (PhotoRecord)
+    if args.format == "jsonl":
+        with open_output(args.output) as out:
+            write_jsonl(records, out, duplicates)
+        return
+    detail_keys = [detail_key(t) for t in (args.tags or DETAIL_TAGS)]
+    export_columnar(records, args.output, detail_keys, duplicates, fmt=args.format)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import os
+import datetime
+import struct
+import time
+from collections import namedtuple
+
+import batchconv
+import fastexif
+import readers
+from stats import NULL_STATS, RunStats
+
+
+# ХЕЛПЕРЫ ДЛЯ РАБОТЫ С GPS
+# value - список дробей (числитель, знаменатель): градусы, минуты, секунды
+def _convert_to_degrees(value):
+    d = float(value[0][0]) / float(value[0][1])
+    m = float(value[1][0]) / float(value[1][1])
+    s = float(value[2][0]) / float(value[2][1])
+    return d + (m / 60.0) + (s / 3600.0)
+
+
+def get_gps_coords(tags):
+    try:
+        if 'GPS GPSLatitude' in tags and 'GPS GPSLongitude' in tags:
+            lat = _convert_to_degrees(tags['GPS GPSLatitude'])
+            lon = _convert_to_degrees(tags['GPS GPSLongitude'])
+            if tags.get('GPS GPSLatitudeRef', '') == 'S': lat = -lat
+            if tags.get('GPS GPSLongitudeRef', '') == 'W': lon = -lon
+            return round(lat, 6), round(lon, 6)
+    except Exception:
+        return None, None
+    return None, None
+
+
+def format_bytes(size):
+    power = 2 ** 10
+    n = 0
+    power_labels = {0: '', 1: 'KB', 2: 'MB', 3: 'GB'}
+    while size > power:
+        size /= power
+        n += 1
+    return f"{size:.2f} {power_labels[n]}"
+
+
+# ДАТЫ: храним как секунды от 1970-01-01 (время съемки без часового пояса, как в EXIF)
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_exif_timestamp(date_str):
+    # 'YYYY:MM:DD HH:MM:SS' -> int или None, если строку разобрать не удалось.
+    # Обычная запись разбирается по позициям символов, strptime - только для нестандартной
+    text = str(date_str).strip()
+    ts = batchconv.parse_timestamp(text)
+    if ts is not None:
+        return ts
+    try:
+        dt_obj = datetime.datetime.strptime(text, '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None
+    return int((dt_obj - _EPOCH).total_seconds())
+
+
+def format_timestamp(ts):
+    return (_EPOCH + datetime.timedelta(seconds=ts)).strftime('%d.%m.%Y %H:%M')
+
+
+# Технические теги, которые попадают в details (набор по умолчанию)
+DETAIL_TAGS = ['Image Software', 'EXIF ISOSpeedRatings', 'EXIF ExposureTime',
+               'EXIF FNumber', 'EXIF FocalLength', 'EXIF Flash']
+# Все теги, которые можно выбрать колонками результата: их читает и быстрый путь (fastexif).
+# Остальное (MakerNote, XMP) - только полный набор тегов одного файла по запросу (tagdump.py)
+TAG_COLUMNS = DETAIL_TAGS + ['EXIF LensMake', 'EXIF LensModel', 'EXIF FocalLengthIn35mmFilm',
+                             'EXIF ExposureProgram', 'EXIF ExposureBiasValue', 'EXIF MeteringMode',
+                             'EXIF WhiteBalance', 'EXIF ExifImageWidth', 'EXIF ExifImageLength',
+                             'EXIF BodySerialNumber', 'Image Orientation', 'Image Artist',
+                             'Image Copyright', 'GPS GPSAltitude']
+_GPS_KEYS = ('GPS GPSLatitude', 'GPS GPSLatitudeRef', 'GPS GPSLongitude', 'GPS GPSLongitudeRef')
+# Нужны всегда: дата, камера, координаты
+BASE_TAGS = ('EXIF DateTimeOriginal', 'Image DateTime', 'Image Make', 'Image Model') + _GPS_KEYS
+
+
+def detail_key(name):
+    # 'EXIF LensModel' -> 'LensModel': так тег называется в details и в колонках отчета
+    return name.replace('EXIF ', '').replace('Image ', '').replace('GPS ', '')
+
+
+def normalize_tags(names):
+    # Выбор колонок (полные или короткие имена) -> список полных имен из TAG_COLUMNS.
+    # None - набор по умолчанию; неизвестное имя - ValueError
+    if names is None:
+        return list(DETAIL_TAGS)
+    by_key = {detail_key(name).lower(): name for name in TAG_COLUMNS}
+    tags = []
+    for name in names:
+        full = name if name in TAG_COLUMNS else by_key.get(name.lower())
+        if full is None:
+            raise ValueError(f"Неизвестный тег: {name}")
+        if full not in tags: tags.append(full)
+    return tags
+
+
+_wanted_cache = {}
+
+
+def _wanted(tags):
+    # Какие теги читать из файла: обязательные + выбранные колонки (множество строится один раз)
+    key = tuple(tags)
+    names = _wanted_cache.get(key)
+    if names is None:
+        names = _wanted_cache[key] = frozenset(BASE_TAGS + key)
+    return names
+
+
+# ЧТЕНИЕ ТЕГОВ
+def _plain_tags(tags, names=None):
+    # Теги exifread -> тот же вид, что отдает fastexif (строки и дроби для координат)
+    plain = {}
+    for name in names or fastexif.WANTED_TAGS:
+        tag = tags.get(name)
+        if tag is None: continue
+        if name in fastexif.RATIONAL_TAGS:
+            plain[name] = [(v.num, v.den) for v in tag.values]
+        else:
+            plain[name] = tag.printable
+    return plain
+
+
+def read_tags(filepath, header=None, stats=NULL_STATS, names=None):
+    # Быстрый путь: заголовок файла и читатель его формата (readers.py); exifread - если разобрать не вышло.
+    # header - уже прочитанные первые байты файла (например, асинхронной предвыборкой),
+    # names - какие теги нужны (None - все, что знает fastexif)
+    try:
+        if header is None:
+            started = time.perf_counter()
+            header = fastexif.read_header(filepath)
+            stats.add_time("read_header", time.perf_counter() - started)
+            stats.add("bytes_read", len(header))
+        started = time.perf_counter()
+        tags = readers.read_tags(filepath, header, names, stats)
+        stats.add_time("parse_header", time.perf_counter() - started)
+        return tags
+    except (fastexif.HeaderError, struct.error) as e:
+        # Не ошибка: формат/раскладка не для быстрого пути
+        stats.add(f"fallback: {type(e).__name__}")
+    # exifread импортируется только здесь: воркер, которому хватило быстрого пути, его не загружает
+    import exifread
+    started = time.perf_counter()
+    with open(filepath, 'rb') as f:
+        tags = _plain_tags(exifread.process_file(f, details=False), names)
+        stats.add("bytes_read", f.tell())
+    stats.add_time("exifread", time.perf_counter() - started)
+    stats.add("files_exifread")
+    return tags
+
+
+# ИЗВЛЕЧЕНИЕ МЕТАДАННЫХ
+# Результат разбора - "сырые" значения без форматирования:
+# size - байты, date - секунды (см. выше), date_raw - исходная строка, если дата не разобрана,
+# lat/lon - float или None, camera - строка ('' если нет), details - {тег: значение}
+# только для выбранных колонок (tags, по умолчанию DETAIL_TAGS).
+# Форматирование ("1.23 MB", "30.05.2008 15:56") - только при показе и экспорте (format_record).
+PhotoRecord = namedtuple("PhotoRecord", "path size date date_raw lat lon camera details")
+
+
+# Разбор идет в два этапа: _read_raw читает теги файла без преобразований,
+# _finish переводит дату и GPS. process_batch делает второй этап сразу для всей пачки
+# (batchconv.py); на маленьких пачках NumPy не окупается - там тот же _finish по одному.
+BATCH_MIN = 64
+
+
+def _read_raw(filepath, size=None, header=None, stats=NULL_STATS, tags=None):
+    # -> (путь, размер, строка даты, GPS-теги или None, камера, details)
+    dt = gps = None
+    camera = ''
+    details = {}
+    stats.add("files_parsed")
+    try:
+        if size is None: size = os.path.getsize(filepath)
+
+        if tags is None: tags = DETAIL_TAGS
+        values = read_tags(filepath, header, stats, _wanted(tags))
+        if not values: stats.add("files_without_exif")
+
+        dt = values.get('EXIF DateTimeOriginal') or values.get('Image DateTime')
+
+        make = str(values.get('Image Make', '')).strip()
+        model = str(values.get('Image Model', '')).strip()
+        camera = f"{make} {model}".strip()
+
+        if 'GPS GPSLatitude' in values and 'GPS GPSLongitude' in values:
+            gps = {k: values[k] for k in _GPS_KEYS if k in values}
+
+        for k in tags:
+            if k in values:
+                details[detail_key(k)] = str(values[k])
+    except Exception as e:
+        # Файл все равно попадает в результаты (без метаданных), ошибка - в статистику
+        stats.error("extract", e, filepath)
+    return filepath, size or 0, dt, gps, camera, details
+
+
+def _finish(raw, date=None, coords=(None, None)):
+    # date/coords - готовые значения пакетного преобразования; чего нет - считается здесь
+    path, size, dt, gps, camera, details = raw
+    date_raw = None
+    if dt:
+        if date is None: date = parse_exif_timestamp(dt)
+        if date is None: date_raw = str(dt)
+    lat, lon = coords
+    if gps and (lat is None or lon is None):
+        lat, lon = get_gps_coords(gps)
+    if not lat: lat = lon = None
+    return PhotoRecord(path, size, date, date_raw, lat, lon, camera, details)
+
+
+# Функции уровня модуля: их можно отдавать в пул процессов (pickle по имени)
+def process_image(filepath, size=None, header=None, stats=NULL_STATS, tags=None):
+    # size можно передать из сканера (DirEntry.stat), чтобы не делать лишний stat;
+    # tags - колонки details (см. TAG_COLUMNS), None - DETAIL_TAGS
+    raw = _read_raw(filepath, size, header, stats, tags)
+    with stats.timer("convert"):
+        return _finish(raw)
+
+
+def format_record(rec):
+    # Запись -> строки для таблицы/отчетов (прежний формат словаря результата)
+    if rec.date is not None:
+        date = format_timestamp(rec.date)
+    else:
+        date = rec.date_raw or "-"
+    has_gps = rec.lat is not None
+    return {
+        "path": rec.path,
+        "filename": os.path.basename(rec.path),
+        "date": date,
+        "lat": round(rec.lat, 6) if has_gps else "",
+        "lon": round(rec.lon, 6) if has_gps else "",
+        "camera": rec.camera or "-",
+        "size": format_bytes(rec.size),
+        "details": rec.details,
+        "duplicate_of": "",
+    }
+
+
+def process_batch(entries, stats=NULL_STATS, tags=None):
+    # Пакет файлов за один вызов: меньше накладных расходов на передачу между процессами.
+    # entries - пути или записи сканера (путь, размер, mtime_ns)
+    raws = [_read_raw(e, stats=stats, tags=tags) if isinstance(e, str) else
+            _read_raw(e[0], e[1], stats=stats, tags=tags) for e in entries]
+    with stats.timer("convert"):
+        return _finish_batch(raws)
+
+
+def process_batch_stats(entries, tags=None):
+    # Для пула процессов: результаты пачки + статистика воркера (родитель делает merge)
+    stats = RunStats()
+    return process_batch(entries, stats, tags), stats.snapshot()
+
+
+def _finish_batch(raws):
+    if len(raws) < BATCH_MIN:
+        return [_finish(raw) for raw in raws]
+
+    dated = [i for i, raw in enumerate(raws) if raw[2]]
+    dates = batchconv.parse_timestamps([str(raws[i][2]).strip() for i in dated])
+    dates = dict(zip(dated, dates))
+
+    located = [i for i, raw in enumerate(raws) if raw[3]]
+    gps = [raws[i][3] for i in located]
+    lats = batchconv.convert_gps([g['GPS GPSLatitude'] for g in gps],
+                                 [g.get('GPS GPSLatitudeRef', '') for g in gps], 'S')
+    lons = batchconv.convert_gps([g['GPS GPSLongitude'] for g in gps],
+                                 [g.get('GPS GPSLongitudeRef', '') for g in gps], 'W')
+    coords = dict(zip(located, zip(lats, lons)))
+
+    return [_finish(raw, dates.get(i), coords.get(i, (None, None))) for i, raw in enumerate(raws)]
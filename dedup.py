@@ -0,0 +1,207 @@
+import hashlib
+import threading
+
+from stats import NULL_STATS
+
+# ПОИСК ДУБЛИКАТОВ ПО СОДЕРЖИМОМУ
+# Одинаковые по байтам файлы (копии в разных папках) разбираются один раз:
+# копия получает готовые метаданные оригинала со своим путем.
+# Сравнение в три ступени, каждая - только если совпала предыдущая:
+#   1) размер (уже известен из сканера, чтение не нужно);
+#   2) быстрый отпечаток - хэш первого и последнего блоков файла;
+#   3) полный хэш - подтверждение, что совпадает все содержимое.
+# Файл с уникальным размером не читается вовсе.
+# Посчитанные отпечатки сохраняются в кэше анализа (scan_cache.py): у неизмененного файла
+# они берутся оттуда (seed), и повторный прогон ничего не хэширует заново.
+# Копия уже разобранного оригинала получает его запись по пути (record): из кэша анализа,
+# если конвейер его передал (source), иначе индекс сам держит записи разобранных оригиналов.
+
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 64 * 1024
+FULL_CHUNK = 1024 * 1024
+
+
+def quick_digest(path, size):
+    # Хэш начала и конца файла. Для файлов не больше HEAD_BYTES + TAIL_BYTES это хэш всего содержимого
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= HEAD_BYTES + TAIL_BYTES:
+            h.update(f.read())
+        else:
+            h.update(f.read(HEAD_BYTES))
+            f.seek(-TAIL_BYTES, 2)
+            h.update(f.read(TAIL_BYTES))
+    return h.digest()
+
+
+def full_digest(path):
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(FULL_CHUNK), b''):
+            h.update(block)
+    return h.digest()
+
+
+class DedupIndex:
+    # match() вызывает поток, раздающий файлы в разбор, add() - поток, получающий результаты
+    # (у асинхронного режима это разные потоки): общее состояние под блокировкой.
+    def __init__(self, stats=None):
+        self.stats = stats or NULL_STATS
+        self.original = {}      # путь копии -> путь оригинала (первого файла с тем же содержимым)
+        self._by_size = {}      # размер -> путь или [пути] файлов с разным содержимым
+        self._quick = {}
+        self._full = {}
+        self._sizes = {}        # путь оригинала -> размер (для сводки)
+        self._new = set()       # пути, чьи отпечатки посчитаны в этом прогоне (еще не в кэше)
+        self._done = set()      # оригиналы, уже вернувшиеся из разбора
+        self._waiting = {}      # путь оригинала -> [записи копий], пока оригинал в разборе
+        self._ready = []        # [(запись копии, путь оригинала)] - оригинал уже разобран
+        self.source = None      # путь -> PhotoRecord или None (ScanCache.get); None - записи в _records
+        self._records = {}      # путь оригинала -> PhotoRecord, только без source
+        self._lock = threading.Lock()
+
+    # СРАВНЕНИЕ
+    def seed(self, path, quick=None, full=None):
+        # Отпечатки неизмененного файла из кэша анализа
+        if quick is not None: self._quick[path] = quick
+        if full is not None: self._full[path] = full
+
+    def new_digests(self):
+        # [(быстрый, полный, путь)] посчитанных с прошлого вызова - для ScanCache.put_digests
+        rows = [(self._quick.get(p), self._full.get(p), p) for p in self._new]
+        self._new = set()
+        return rows
+
+    def _digest(self, cache, func, path, *args):
+        digest = cache.get(path)
+        if digest is None:
+            digest = cache[path] = func(path, *args)
+            self._new.add(path)
+            if func is full_digest: self.stats.add("dedup_full_hashes")
+        return digest
+
+    def _same(self, a, b, size):
+        if self._digest(self._quick, quick_digest, a, size) != self._digest(self._quick, quick_digest, b, size):
+            return False
+        if size <= HEAD_BYTES + TAIL_BYTES:
+            return True
+        return self._digest(self._full, full_digest, a) == self._digest(self._full, full_digest, b)
+
+    def match(self, path, size):
+        # Регистрирует файл; возвращает путь оригинала, если такое содержимое уже встречалось
+        known = self._by_size.get(size)
+        if known is None:
+            self._by_size[size] = path
+            self._sizes[path] = size
+            return None
+        candidates = [known] if isinstance(known, str) else known
+        try:
+            with self.stats.timer("dedup_hash"):
+                for other in candidates:
+                    if self._same(other, path, size):
+                        self.original[path] = other
+                        self.stats.add("duplicates")
+                        return other
+        except OSError as e:
+            # Не прочитался - считаем уникальным и больше не сравниваем
+            self.stats.error("dedup", e, path)
+            return None
+        self._by_size[size] = candidates + [path]
+        self._sizes[path] = size
+        return None
+
+    # ОБМЕН ЗАПИСЯМИ
+    def defer(self, entry, original):
+        # Копия ждет оригинал в разборе или, если он уже разобран, - в take_ready
+        with self._lock:
+            if original in self._done:
+                self._ready.append((entry, original))
+            else:
+                self._waiting.setdefault(original, []).append(entry)
+
+    def add(self, rec):
+        # Результат разбора -> [он же и записи копий, которые его ждали]
+        if rec.path in self.original or rec.path not in self._sizes:
+            return [rec]
+        with self._lock:
+            self._done.add(rec.path)
+            if self.source is None:
+                self._records[rec.path] = rec
+            copies = self._waiting.pop(rec.path, ())
+        return [rec] + [rec._replace(path=entry[0]) for entry in copies]
+
+    def take_ready(self):
+        # Копии уже разобранных оригиналов: [(запись копии, путь оригинала)], запись - через record
+        with self._lock:
+            ready, self._ready = self._ready, []
+        return ready
+
+    def record(self, path):
+        # Запись разобранного оригинала или None (тогда копия разбирается сама)
+        if self.source is not None:
+            return self.source(path)
+        return self._records.get(path)
+
+    def forget(self, path):
+        # Файл изменился или удален (режим наблюдения): прежние отпечатки и связи больше не верны.
+        # Если это был оригинал группы, оригиналом становится первая из его копий
+        with self._lock:
+            self._quick.pop(path, None)
+            self._full.pop(path, None)
+            self._new.discard(path)
+            self._done.discard(path)
+            rec = self._records.pop(path, None)
+            self.original.pop(path, None)
+            size = self._sizes.pop(path, None)
+            if size is None:
+                return
+            known = self._by_size.get(size)
+            candidates = [known] if isinstance(known, str) else list(known or ())
+            if path in candidates: candidates.remove(path)
+            copies = [c for c, o in self.original.items() if o == path]
+            if copies:
+                heir = copies[0]
+                del self.original[heir]
+                for copy in copies[1:]:
+                    self.original[copy] = heir
+                self._sizes[heir] = size
+                candidates.append(heir)
+                if rec is not None: self._records[heir] = rec._replace(path=heir)
+            if not candidates:
+                self._by_size.pop(size, None)
+            else:
+                self._by_size[size] = candidates[0] if len(candidates) == 1 else candidates
+
+    def take_waiting(self):
+        # Копии, чей оригинал так и не вернулся из разбора (разбираются сами)
+        with self._lock:
+            entries = [e for copies in self._waiting.values() for e in copies]
+            self._waiting = {}
+        return entries
+
+    # ГРУППЫ
+    def groups(self):
+        # [(размер, [оригинал, копии...])] в порядке обнаружения
+        groups = {}
+        for copy, original in self.original.items():
+            groups.setdefault(original, [original]).append(copy)
+        return [(self._sizes.get(paths[0], 0), paths) for paths in groups.values()]
+
+    def summary(self):
+        groups = self.groups()
+        copies = sum(len(paths) - 1 for _, paths in groups)
+        wasted = sum(size * (len(paths) - 1) for size, paths in groups)
+        return len(groups), copies, wasted
+
+
+def duplicate_rows(store):
+    # Номера строк хранилища для вида "группы дубликатов": оригинал, за ним его копии
+    groups = {}
+    for copy, original in store.duplicates.items():
+        groups.setdefault(original, []).append(copy)
+    rows = []
+    for original, copies in groups.items():
+        members = [store.index_of(p) for p in [original] + copies]
+        members = [i for i in members if i is not None]
+        if len(members) > 1: rows.extend(members)
+    return rows
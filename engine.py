@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from core import BATCH_MIN, PhotoRecord, process_batch, process_batch_stats
+from stats import NULL_STATS
+
+DEFAULT_CHUNK_SIZE = 64
+MIN_CHUNK_SIZE = 4
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class ExtractionEngine:
+    # Параллельное извлечение метаданных пулом процессов.
+    # Файлы отправляются пачками (chunk), результаты отдаются в порядке готовности.
+    # Вход - любой итератор (в т.ч. потоковый сканер): весь список заранее не нужен.
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_pending=None, stats=None, tags=None):
+        self.workers = max(1, workers or default_workers())
+        self.chunk_size = max(1, chunk_size)
+        # Сколько пачек может быть "в полете": ограничивает память на огромных папках
+        self.max_pending = max_pending or self.workers * 4
+        # С RunStats воркеры возвращают и свою статистику (process_batch_stats)
+        self.stats = stats or NULL_STATS
+        self._task = process_batch_stats if stats is not None else process_batch
+        # Колонки details (core.TAG_COLUMNS): передаются воркерам вместе с каждой пачкой
+        self.tags = tags
+
+    def run(self, items):
+        # items: пути или записи сканера (путь, размер, mtime_ns).
+        # Готовые результаты (PhotoRecord, например из кэша) проходят насквозь без пула.
+        if self.workers == 1:
+            yield from self._run_local(items)
+            return
+
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        pending = {}
+        chunk = []
+        # Первые пачки маленькие, чтобы быстрее загрузить все процессы и показать первые строки
+        chunk_size = MIN_CHUNK_SIZE
+        submitted = 0
+        broken = False
+        finished = False
+        try:
+            for item in items:
+                if isinstance(item, PhotoRecord):
+                    yield item
+                    continue
+                chunk.append(item)
+                if len(chunk) < chunk_size:
+                    continue
+
+                try:
+                    if broken: raise BrokenProcessPool()
+                    pending[pool.submit(self._task, chunk, tags=self.tags)] = chunk
+                except BrokenProcessPool as e:
+                    # Пул упал (например, воркер убит) - дорабатываем в текущем процессе
+                    if not broken: self.stats.error("pool", e)
+                    broken = True
+                    yield from process_batch(chunk, self.stats, self.tags)
+                chunk = []
+                submitted += 1
+                if submitted >= self.workers:
+                    chunk_size = min(self.chunk_size, chunk_size * 2)
+                self.stats.gauge("pending_chunks", len(pending))
+
+                if len(pending) >= self.max_pending:
+                    yield from self._drain(pending, FIRST_COMPLETED)
+                else:
+                    yield from self._collect_done(pending)
+
+            if chunk:
+                try:
+                    if broken: raise BrokenProcessPool()
+                    pending[pool.submit(self._task, chunk, tags=self.tags)] = chunk
+                except BrokenProcessPool:
+                    yield from process_batch(chunk, self.stats, self.tags)
+            while pending:
+                yield from self._drain(pending, FIRST_COMPLETED)
+            finished = True
+        finally:
+            # Обычное завершение - дожидаемся выхода воркеров (их чтение засчитывается процессу
+            # при завершении, а не позже); ошибка или закрытый генератор - не ждем, очередь отменяем
+            pool.shutdown(wait=finished, cancel_futures=not finished)
+
+    def _run_local(self, items):
+        # В одном процессе пачки не ради передачи, а ради векторного преобразования (core.BATCH_MIN):
+        # меньшие пачки разбирались бы по одной записи
+        chunk_size = max(self.chunk_size, BATCH_MIN)
+        chunk = []
+        for item in items:
+            if isinstance(item, PhotoRecord):
+                yield item
+                continue
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield from process_batch(chunk, self.stats, self.tags)
+                chunk = []
+        if chunk:
+            yield from process_batch(chunk, self.stats, self.tags)
+
+    def _collect_done(self, pending):
+        # Забираем уже готовые пачки, не блокируясь
+        for fut in [f for f in pending if f.done()]:
+            yield from self._result(fut, pending.pop(fut))
+
+    def _drain(self, pending, return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for fut in done:
+            yield from self._result(fut, pending.pop(fut))
+
+    def _result(self, fut, chunk):
+        try:
+            results = fut.result()
+        except Exception as e:
+            self.stats.error("pool", e)
+            return process_batch(chunk, self.stats, self.tags)
+        if self._task is process_batch_stats:
+            results, worker_stats = results
+            self.stats.merge(worker_stats)
+        return results
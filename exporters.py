@@ -0,0 +1,388 @@
+import csv
+import datetime
+import html
+import json
+import os
+import re
+from urllib.parse import quote
+
+# ЭКСПОРТ ОТЧЕТОВ
+# Не зависит от tkinter: используется и окном приложения, и консольным режимом (cli.py).
+# Строки пишутся в файл по одной через буферизованный поток - отчет целиком в памяти
+# не собирается. HTML разбивается на страницы по HTML_PAGE_SIZE строк.
+# JSON Lines и Parquet/Arrow - для дальнейшей обработки: пишутся из "сырых" записей
+# (PhotoRecord) с типами - размер числом, дата меткой времени, координаты float, все теги details.
+
+CSV_HEADER = ["Имя файла", "Путь", "Дата", "Широта", "Долгота", "Камера"]
+# Колонка только для прогона с поиском дубликатов (dedup.py): без него CSV - прежнего формата
+DUPLICATE_HEADER = "Копия файла"
+HTML_PAGE_SIZE = 5000
+WRITE_BUFFER = 1024 * 1024
+PROGRESS_EVERY = 1000
+# Строк в одной группе Parquet / пачке Arrow: столько записей держится в памяти при экспорте
+ROW_GROUP_SIZE = 65536
+# Все до последнего разделителя пути (как os.path.basename): имя файла в Parquet/Arrow
+_DIR_PREFIX = "^.*[" + re.escape(os.sep + (os.altsep or "")) + "]"
+
+
+def csv_header(tag_columns=(), duplicates=False):
+    return CSV_HEADER + ([DUPLICATE_HEADER] if duplicates else []) + list(tag_columns)
+
+
+def csv_row(item, tag_columns=(), duplicates=False):
+    # tag_columns - короткие имена тегов details (core.detail_key): колонки после основных;
+    # duplicates - добавить колонку "Копия файла" (см. csv_header)
+    row = [item['filename'], item['path'], item['date'], item['lat'], item['lon'], item['camera']]
+    if duplicates:
+        row.append(item['duplicate_of'])
+    for key in tag_columns:
+        row.append(item['details'].get(key, ""))
+    return row
+
+
+def write_csv(rows, f, progress=None, tag_columns=(), duplicates=False):
+    # f - текстовый файл, открытый с newline=''
+    writer = csv.writer(f)
+    writer.writerow(csv_header(tag_columns, duplicates))
+    for i, item in enumerate(rows, 1):
+        writer.writerow(csv_row(item, tag_columns, duplicates))
+        if progress and i % PROGRESS_EVERY == 0: progress(i)
+
+
+def export_csv(rows, path, progress=None, tag_columns=(), duplicates=False):
+    with open(path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        write_csv(rows, f, progress, tag_columns, duplicates)
+    return [path]
+
+
+# JSON LINES: одна запись - одна строка JSON
+def _iso_date(ts):
+    return (datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=ts)).isoformat()
+
+
+def _coord(value):
+    # Округляем до 6 знаков, как в таблице и CSV
+    return None if value is None else round(value, 6)
+
+
+def jsonl_row(rec, duplicate_of=""):
+    return {
+        "path": rec.path,
+        "filename": os.path.basename(rec.path),
+        "size": rec.size,
+        "date": None if rec.date is None else _iso_date(rec.date),
+        "date_raw": rec.date_raw,
+        "lat": _coord(rec.lat),
+        "lon": _coord(rec.lon),
+        "camera": rec.camera or None,
+        "duplicate_of": duplicate_of or None,
+        "details": rec.details,
+    }
+
+
+def write_jsonl(records, f, duplicates=None, progress=None):
+    # records - PhotoRecord (поток из конвейера или store.record(i)); duplicates - копия -> оригинал
+    duplicates = duplicates or {}
+    for i, rec in enumerate(records, 1):
+        f.write(json.dumps(jsonl_row(rec, duplicates.get(rec.path)), ensure_ascii=False))
+        f.write("\n")
+        if progress and i % PROGRESS_EVERY == 0: progress(i)
+
+
+def export_jsonl(records, path, duplicates=None, progress=None):
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        write_jsonl(records, f, duplicates, progress)
+    return [path]
+
+
+# PARQUET / ARROW: колонки с типами, запись группами по ROW_GROUP_SIZE строк.
+# pyarrow - необязательная зависимость и импортируется только здесь
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Для экспорта в Parquet/Arrow нужен pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def arrow_schema(detail_keys=()):
+    pa = _pyarrow()
+    fields = [
+        pa.field("path", pa.string(), nullable=False),
+        pa.field("filename", pa.string(), nullable=False),
+        pa.field("size", pa.int64(), nullable=False),
+        pa.field("date", pa.timestamp('s')),
+        pa.field("date_raw", pa.string()),
+        pa.field("lat", pa.float64()),
+        pa.field("lon", pa.float64()),
+        pa.field("camera", pa.string()),
+        pa.field("duplicate_of", pa.string()),
+    ]
+    fields += [pa.field(key, pa.string()) for key in detail_keys]
+    return pa.schema(fields)
+
+
+def _record_batch(pa, schema, records, detail_keys, duplicates):
+    # Поэлементно - только сбор значений из записей; имя файла и округление координат - векторно
+    pc = pa.compute
+    paths = pa.array([rec.path for rec in records], pa.string())
+    columns = [
+        paths,
+        pc.replace_substring_regex(paths, _DIR_PREFIX, ''),
+        pa.array([rec.size for rec in records], pa.int64()),
+        pa.array([rec.date for rec in records], pa.timestamp('s')),
+        pa.array([rec.date_raw for rec in records], pa.string()),
+        pc.round(pa.array([rec.lat for rec in records], pa.float64()), 6),
+        pc.round(pa.array([rec.lon for rec in records], pa.float64()), 6),
+        pa.array([rec.camera or None for rec in records], pa.string()),
+        pa.array([duplicates.get(rec.path) for rec in records], pa.string()),
+    ]
+    columns += [pa.array([rec.details.get(key) for rec in records], pa.string()) for key in detail_keys]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def export_columnar(records, path, detail_keys=(), duplicates=None, progress=None, fmt=None):
+    # fmt 'parquet' - Parquet (сжатие, группы строк); 'arrow' - файл Arrow IPC (.arrow/.feather),
+    # который читается через memory map без разбора: pyarrow.ipc.open_file(pyarrow.memory_map(path)).
+    # Без fmt - по расширению. detail_keys - колонки тегов (схема нужна до первой записи)
+    pa = _pyarrow()
+    schema = arrow_schema(detail_keys)
+    duplicates = duplicates or {}
+    if fmt is None:
+        fmt = 'parquet' if path.lower().endswith('.parquet') else 'arrow'
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    write = writer.write_batch
+    done = 0
+    try:
+        chunk = []
+        for rec in records:
+            chunk.append(rec)
+            if len(chunk) >= ROW_GROUP_SIZE:
+                write(_record_batch(pa, schema, chunk, detail_keys, duplicates))
+                done += len(chunk)
+                chunk = []
+                if progress: progress(done)
+        if chunk or not done:
+            write(_record_batch(pa, schema, chunk, detail_keys, duplicates))
+            done += len(chunk)
+    finally:
+        writer.close()
+    if progress: progress(done)
+    return [path]
+
+
+# HTML
+HTML_HEAD = """
+    <!DOCTYPE html>
+    <html lang="ru">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Отчет GeoAnalyzer</title>
+        <style>
+            body {{
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                background-color: #f4f7f6;
+                color: #333;
+                margin: 0;
+                padding: 40px;
+            }}
+            .container {{
+                max-width: 1200px;
+                margin: 0 auto;
+                background: #fff;
+                padding: 30px;
+                border-radius: 12px;
+                box-shadow: 0 4px 15px rgba(0,0,0,0.05);
+            }}
+            h1 {{
+                color: #2c3e50;
+                border-bottom: 2px solid #5c6bc0;
+                padding-bottom: 15px;
+                margin-top: 0;
+                font-size: 24px;
+            }}
+            .summary {{
+                background-color: #e8eaf6;
+                padding: 15px;
+                border-radius: 8px;
+                margin-bottom: 25px;
+                font-size: 14px;
+                color: #555;
+                display: flex;
+                justify-content: space-between;
+            }}
+            table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin-top: 10px;
+            }}
+            th, td {{
+                padding: 12px 15px;
+                text-align: left;
+                border-bottom: 1px solid #eee;
+            }}
+            th {{
+                background-color: #5c6bc0;
+                color: white;
+                font-weight: 600;
+                text-transform: uppercase;
+                font-size: 12px;
+                letter-spacing: 0.5px;
+            }}
+            tr:hover {{
+                background-color: #f8f9fa;
+            }}
+            .gps-btn {{
+                display: inline-block;
+                padding: 4px 10px;
+                background-color: #fff;
+                border: 1px solid #5c6bc0;
+                color: #5c6bc0;
+                border-radius: 4px;
+                text-decoration: none;
+                font-size: 12px;
+                font-weight: bold;
+                transition: all 0.2s;
+            }}
+            .gps-btn:hover {{
+                background-color: #5c6bc0;
+                color: #fff;
+            }}
+            .no-data {{
+                color: #ccc;
+                font-style: italic;
+            }}
+            .pager {{
+                margin: 20px 0;
+                font-size: 14px;
+                color: #555;
+            }}
+            .pager a {{
+                color: #5c6bc0;
+                margin: 0 4px;
+                text-decoration: none;
+            }}
+            .pager .current {{
+                font-weight: bold;
+                margin: 0 4px;
+            }}
+            .footer {{
+                margin-top: 40px;
+                text-align: center;
+                font-size: 12px;
+                color: #aaa;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>📸 Отчет анализа метаданных</h1>
+
+            <div class="summary">
+                <span><strong>Дата генерации:</strong> {generated}</span>
+                <span><strong>Всего файлов:</strong> {total}</span>
+                <span><strong>Страница:</strong> {page} из {pages}</span>
+            </div>
+{pager}
+
+            <table>
+                <thead>
+                    <tr>
+                        <th style="width: 25%">Имя файла</th>
+                        <th style="width: 15%">Дата съемки</th>
+                        <th style="width: 25%">Камера</th>
+                        <th style="width: 20%">GPS Координаты</th>
+                        <th style="width: 15%">Карта</th>
+                    </tr>
+                </thead>
+                <tbody>
+"""
+
+HTML_TAIL = """
+                </tbody>
+            </table>
+{pager}
+
+            <div class="footer">
+                Сгенерировано с помощью EXIF GeoAnalyzer Pro
+            </div>
+        </div>
+    </body>
+    </html>
+"""
+
+
+def html_row(item):
+    # Формирование ссылки на карты
+    if item['lat']:
+        gps_text = f"{item['lat']:.5f}, {item['lon']:.5f}"
+        # Ссылка на Google Maps
+        gmaps_url = f"https://www.google.com/maps?q={item['lat']},{item['lon']}"
+        gps_html = gps_text
+        link_html = f'<a href="{gmaps_url}" target="_blank" class="gps-btn">Открыть на карте</a>'
+    else:
+        gps_html = '<span class="no-data">Нет данных</span>'
+        link_html = '<span class="no-data">-</span>'
+
+    return f"""
+            <tr>
+                <td style="font-weight: 500; color: #333;">{html.escape(item['filename'])}</td>
+                <td>{html.escape(item['date'])}</td>
+                <td>{html.escape(item['camera'])}</td>
+                <td style="font-family: monospace; color: #555;">{gps_html}</td>
+                <td>{link_html}</td>
+            </tr>
+        """
+
+
+def html_page_paths(path, pages):
+    # report.html, report_2.html, report_3.html, ...
+    base, ext = os.path.splitext(path)
+    return [path] + [f"{base}_{n}{ext}" for n in range(2, pages + 1)]
+
+
+def _pager(names, page):
+    if len(names) < 2:
+        return ""
+    links = []
+    for n, name in enumerate(names, 1):
+        if n == page:
+            links.append(f'<span class="current">{n}</span>')
+        else:
+            links.append(f'<a href="{html.escape(quote(name))}">{n}</a>')
+    return '            <div class="pager">' + " ".join(links) + "</div>\n"
+
+
+def write_html(rows, f, total, page=1, page_names=None, progress=None, start=0):
+    # Одна страница отчета: rows - строки этой страницы, total - всего строк в отчете
+    page_names = page_names or []
+    pager = _pager(page_names, page)
+    f.write(HTML_HEAD.format(generated=datetime.datetime.now().strftime("%d.%m.%Y %H:%M"),
+                             total=total, page=page, pages=max(1, len(page_names)), pager=pager))
+    done = start
+    for item in rows:
+        f.write(html_row(item))
+        done += 1
+        if progress and done % PROGRESS_EVERY == 0: progress(done)
+    f.write(HTML_TAIL.format(pager=pager))
+    return done
+
+
+def export_html(rows, path, total, page_size=HTML_PAGE_SIZE, progress=None):
+    # Постраничный экспорт: возвращает список записанных файлов
+    pages = max(1, -(-total // page_size))
+    paths = html_page_paths(path, pages)
+    names = [os.path.basename(p) for p in paths]
+    rows = iter(rows)
+    done = 0
+    for page, page_path in enumerate(paths, 1):
+        page_rows = (item for _, item in zip(range(page_size), rows))
+        with open(page_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+            done = write_html(page_rows, f, total, page, names, progress, done)
+    return paths
@@ -0,0 +1,333 @@
+import struct
+from math import gcd
+
+# Быстрый разбор EXIF только по заголовку файла.
+# Читаем одно окно в начале файла (один read), разбираем JPEG APP1 / TIFF IFD0,
+# ExifIFD и GPS IFD и достаем только нужные нам теги.
+# Имена и текстовые значения совпадают с exifread ("EXIF Flash" -> "Flash fired, ..."),
+# поэтому core может работать с любым из двух источников одинаково.
+
+HEADER_WINDOW = 64 * 1024
+
+IFD0_TAGS = {
+    0x010F: 'Image Make',
+    0x0110: 'Image Model',
+    0x0112: 'Image Orientation',
+    0x0131: 'Image Software',
+    0x0132: 'Image DateTime',
+    0x013B: 'Image Artist',
+    0x8298: 'Image Copyright',
+}
+EXIF_TAGS = {
+    0x829A: 'EXIF ExposureTime',
+    0x829D: 'EXIF FNumber',
+    0x8822: 'EXIF ExposureProgram',
+    0x8827: 'EXIF ISOSpeedRatings',
+    0x9003: 'EXIF DateTimeOriginal',
+    0x9204: 'EXIF ExposureBiasValue',
+    0x9207: 'EXIF MeteringMode',
+    0x9209: 'EXIF Flash',
+    0x920A: 'EXIF FocalLength',
+    0xA002: 'EXIF ExifImageWidth',
+    0xA003: 'EXIF ExifImageLength',
+    0xA403: 'EXIF WhiteBalance',
+    0xA405: 'EXIF FocalLengthIn35mmFilm',
+    0xA431: 'EXIF BodySerialNumber',
+    0xA433: 'EXIF LensMake',
+    0xA434: 'EXIF LensModel',
+}
+GPS_TAGS = {
+    0x0001: 'GPS GPSLatitudeRef',
+    0x0002: 'GPS GPSLatitude',
+    0x0003: 'GPS GPSLongitudeRef',
+    0x0004: 'GPS GPSLongitude',
+    0x0006: 'GPS GPSAltitude',
+}
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+
+# Все имена тегов, которые умеет читать быстрый путь (core берет из них только нужные)
+WANTED_TAGS = tuple(IFD0_TAGS.values()) + tuple(EXIF_TAGS.values()) + tuple(GPS_TAGS.values())
+# Для координат нужны сами дроби, а не строка
+RATIONAL_TAGS = ('GPS GPSLatitude', 'GPS GPSLongitude')
+
+# Расшифровка EXIF Flash (как в exifread)
+FLASH_MODES = {
+    0: "Flash did not fire",
+    1: "Flash fired",
+    5: "Strobe return light not detected",
+    7: "Strobe return light detected",
+    9: "Flash fired, compulsory flash mode",
+    13: "Flash fired, compulsory flash mode, return light not detected",
+    15: "Flash fired, compulsory flash mode, return light detected",
+    16: "Flash did not fire, compulsory flash mode",
+    24: "Flash did not fire, auto mode",
+    25: "Flash fired, auto mode",
+    29: "Flash fired, auto mode, return light not detected",
+    31: "Flash fired, auto mode, return light detected",
+    32: "No flash function",
+    65: "Flash fired, red-eye reduction mode",
+    69: "Flash fired, red-eye reduction mode, return light not detected",
+    71: "Flash fired, red-eye reduction mode, return light detected",
+    73: "Flash fired, compulsory flash mode, red-eye reduction mode",
+    77: "Flash fired, compulsory flash mode, red-eye reduction mode, return light not detected",
+    79: "Flash fired, compulsory flash mode, red-eye reduction mode, return light detected",
+    89: "Flash fired, auto mode, red-eye reduction mode",
+    93: "Flash fired, auto mode, return light not detected, red-eye reduction mode",
+    95: "Flash fired, auto mode, return light detected, red-eye reduction mode",
+}
+
+# Расшифровка остальных перечислений - тоже как в exifread
+ENUM_VALUES = {
+    'Image Orientation': {
+        1: "Horizontal (normal)",
+        2: "Mirrored horizontal",
+        3: "Rotated 180",
+        4: "Mirrored vertical",
+        5: "Mirrored horizontal then rotated 90 CCW",
+        6: "Rotated 90 CW",
+        7: "Mirrored horizontal then rotated 90 CW",
+        8: "Rotated 90 CCW",
+    },
+    'EXIF ExposureProgram': {
+        0: "Unidentified",
+        1: "Manual",
+        2: "Program Normal",
+        3: "Aperture Priority",
+        4: "Shutter Priority",
+        5: "Program Creative",
+        6: "Program Action",
+        7: "Portrait Mode",
+        8: "Landscape Mode",
+    },
+    'EXIF MeteringMode': {
+        0: "Unidentified",
+        1: "Average",
+        2: "CenterWeightedAverage",
+        3: "Spot",
+        4: "MultiSpot",
+        5: "Pattern",
+        6: "Partial",
+        255: "other",
+    },
+    'EXIF WhiteBalance': {0: "Auto", 1: "Manual"},
+}
+
+# Типы полей TIFF: размер элемента и формат struct
+_ASCII = 2
+_RATIONAL_TYPES = (5, 10)
+_FIELD_FORMATS = {
+    1: (1, 'B'), 2: (1, 'B'), 3: (2, 'H'), 4: (4, 'L'), 5: (8, 'L'),
+    6: (1, 'b'), 8: (2, 'h'), 9: (4, 'l'), 10: (8, 'l'),
+}
+
+
+class HeaderError(ValueError):
+    # Заголовок не удалось разобрать быстрым путем - нужен полный exifread
+    pass
+
+
+class WindowError(HeaderError):
+    # Нужные данные лежат дальше прочитанного окна (readers.py может дочитать файл)
+    pass
+
+
+def read_header(filepath, size=HEADER_WINDOW):
+    # Один системный вызов read без буферизации Python
+    with open(filepath, 'rb', buffering=0) as f:
+        return f.read(size)
+
+
+def read_tags(filepath, names=None):
+    return parse_header(read_header(filepath), names)
+
+
+def parse_header(buf, names=None):
+    # names - множество имен тегов, которые нужны (None - все из WANTED_TAGS):
+    # значения остальных тегов не разбираются вовсе
+    if buf[:2] == b'\xff\xd8':
+        start = _find_jpeg_exif(buf)
+        if start is None:
+            return {}
+        return parse_tiff(buf, start, names)
+    if buf[:4] in (b'II*\x00', b'MM\x00*'):
+        return parse_tiff(buf, 0, names)
+    raise HeaderError("unsupported format")
+
+
+def _find_jpeg_exif(buf):
+    pos = 2
+    size = len(buf)
+    while pos + 4 <= size:
+        if buf[pos] != 0xFF:
+            raise HeaderError("bad JPEG marker")
+        marker = buf[pos + 1]
+        if marker == 0xFF:
+            # Заполняющий байт
+            pos += 1
+            continue
+        if marker == 0xDA or marker == 0xD9:
+            # Дошли до данных изображения: EXIF в файле нет
+            return None
+        length = (buf[pos + 2] << 8) | buf[pos + 3]
+        if marker == 0xE1 and buf[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return pos + 10
+        pos += 2 + length
+    raise WindowError("EXIF segment is outside of the header window")
+
+
+def _tiff_endian(buf, start):
+    if len(buf) < start + 8:
+        raise WindowError("truncated TIFF header")
+    order = buf[start:start + 2]
+    if order == b'II':
+        return '<'
+    if order == b'MM':
+        return '>'
+    raise HeaderError("bad byte order")
+
+
+def parse_tiff(buf, start=0, names=None):
+    # Структура TIFF с позиции start (заголовок JPEG APP1, файл TIFF, блок EXIF из PNG/WebP/HEIC)
+    endian = _tiff_endian(buf, start)
+    tags = {}
+    ifd0 = struct.unpack_from(endian + 'L', buf, start + 4)[0]
+    pointers = _read_ifd(buf, start, endian, ifd0, IFD0_TAGS, tags, names)
+    if EXIF_IFD_POINTER in pointers:
+        _read_ifd(buf, start, endian, pointers[EXIF_IFD_POINTER], EXIF_TAGS, tags, names)
+    if GPS_IFD_POINTER in pointers:
+        _read_ifd(buf, start, endian, pointers[GPS_IFD_POINTER], GPS_TAGS, tags, names)
+    return tags
+
+
+# МИНИАТЮРА EXIF (IFD1: JPEGInterchangeFormat / JPEGInterchangeFormatLength)
+THUMB_OFFSET_TAG = 0x0201
+THUMB_LENGTH_TAG = 0x0202
+
+
+def find_thumbnail(buf):
+    # -> (смещение от начала файла, длина) встроенной JPEG-миниатюры или None
+    if buf[:2] == b'\xff\xd8':
+        start = _find_jpeg_exif(buf)
+        if start is None:
+            return None
+    elif buf[:4] in (b'II*\x00', b'MM\x00*'):
+        start = 0
+    else:
+        return None
+    return tiff_thumbnail(buf, start)
+
+
+def tiff_thumbnail(buf, start=0):
+    # То же для структуры TIFF с позиции start: смещение - от начала buf
+    endian = _tiff_endian(buf, start)
+
+    # Смещение IFD1 записано сразу после записей IFD0
+    ifd0 = start + struct.unpack_from(endian + 'L', buf, start + 4)[0]
+    if ifd0 + 2 > len(buf):
+        raise WindowError("IFD0 is outside of the header window")
+    count = struct.unpack_from(endian + 'H', buf, ifd0)[0]
+    next_pos = ifd0 + 2 + count * 12
+    if next_pos + 4 > len(buf):
+        raise WindowError("IFD0 is outside of the header window")
+    ifd1 = struct.unpack_from(endian + 'L', buf, next_pos)[0]
+    if not ifd1:
+        return None
+
+    pos = start + ifd1
+    if pos + 2 > len(buf):
+        raise WindowError("IFD1 is outside of the header window")
+    count = struct.unpack_from(endian + 'H', buf, pos)[0]
+    if pos + 2 + count * 12 > len(buf):
+        raise WindowError("IFD1 is outside of the header window")
+    offset = length = None
+    for i in range(count):
+        tag, field_type = struct.unpack_from(endian + 'HH', buf, pos + 2 + i * 12)
+        fmt = 'H' if field_type == 3 else 'L'
+        value = struct.unpack_from(endian + fmt, buf, pos + 2 + i * 12 + 8)[0]
+        if tag == THUMB_OFFSET_TAG:
+            offset = value
+        elif tag == THUMB_LENGTH_TAG:
+            length = value
+    if offset is None or not length:
+        return None
+    return start + offset, length
+
+
+def _read_ifd(buf, start, endian, offset, wanted, tags, names=None):
+    pos = start + offset
+    if pos + 2 > len(buf):
+        raise WindowError("IFD is outside of the header window")
+    count = struct.unpack_from(endian + 'H', buf, pos)[0]
+    pos += 2
+    if pos + count * 12 > len(buf):
+        raise WindowError("IFD is outside of the header window")
+
+    pointers = {}
+    for _ in range(count):
+        tag, field_type, n = struct.unpack_from(endian + 'HHL', buf, pos)
+        if tag in wanted:
+            if names is None or wanted[tag] in names:
+                tags[wanted[tag]] = _read_value(buf, start, endian, pos, wanted[tag], field_type, n)
+        elif tag == EXIF_IFD_POINTER or tag == GPS_IFD_POINTER:
+            pointers[tag] = struct.unpack_from(endian + 'L', buf, pos + 8)[0]
+        pos += 12
+    return pointers
+
+
+def _read_value(buf, start, endian, entry, name, field_type, count):
+    # Ограничение на число значений - только для чисел; строка (Artist, Copyright, Software)
+    # может быть длинной, ее ограничивает окно заголовка
+    if field_type not in _FIELD_FORMATS or (field_type != _ASCII and count > 50):
+        raise HeaderError(f"unsupported field for {name}")
+    item_size, fmt = _FIELD_FORMATS[field_type]
+    length = item_size * count
+    if length > HEADER_WINDOW:
+        raise HeaderError(f"{name} is larger than the header window")
+    if length <= 4:
+        pos = entry + 8
+    else:
+        pos = start + struct.unpack_from(endian + 'L', buf, entry + 8)[0]
+    if pos + length > len(buf):
+        raise WindowError(f"value of {name} is outside of the header window")
+
+    if field_type == _ASCII:
+        raw = bytes(buf[pos:pos + length]).split(b'\x00', 1)[0]
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            raise HeaderError(f"bad string in {name}")
+
+    if field_type in _RATIONAL_TYPES:
+        raw = struct.unpack_from(f"{endian}{count * 2}{fmt}", buf, pos)
+        values = [_reduce(raw[i], raw[i + 1]) for i in range(0, len(raw), 2)]
+        if name in RATIONAL_TAGS:
+            return values
+        return _printable([_ratio_str(v) for v in values])
+
+    values = struct.unpack_from(f"{endian}{count}{fmt}", buf, pos)
+    if name == 'EXIF Flash':
+        return "".join(FLASH_MODES.get(v, repr(v)) for v in values)
+    if name in ENUM_VALUES:
+        return "".join(ENUM_VALUES[name].get(v, repr(v)) for v in values)
+    return _printable([str(v) for v in values])
+
+
+def _reduce(num, den):
+    if den == 0:
+        raise HeaderError("zero denominator")
+    if den < 0:
+        num, den = -num, -den
+    g = gcd(num, den)
+    return num // g, den // g
+
+
+def _ratio_str(value):
+    num, den = value
+    return str(num) if den == 1 else f"{num}/{den}"
+
+
+def _printable(items):
+    if len(items) == 1:
+        return items[0]
+    return "[" + ", ".join(items) + "]"
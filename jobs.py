@@ -0,0 +1,174 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from pipeline import extract
+from scan_cache import cache_path_for, default_cache_dir, roots_key, tags_suffix
+from scanner import Scanner
+
+# ЗАДАНИЯ АНАЛИЗА: остановка, пауза и продолжение после сбоя
+# Контрольная точка - база ScanCache с результатами уже обработанных файлов: при включенном
+# кэше это сам кэш папки, без кэша - отдельная база задания (удаляется после завершения).
+# Рядом - описание задания job_*.json: параметры, сколько обработано, состояние.
+# Повторный запуск с теми же параметрами берет обработанные файлы из контрольной точки
+# (проверяются размер и mtime), так что после сбоя на 900 тыс. из миллиона работа не теряется.
+
+SAVE_EVERY = 5.0        # описание задания обновляется не чаще раза в столько секунд
+FINISHED = ("done",)
+
+
+def job_key(root, target_exts, recursive, tags=None, shard=None):
+    text = "|".join([roots_key(root), ",".join(sorted(target_exts)), str(bool(recursive))])
+    text += tags_suffix(tags)
+    if shard: text += "|shard %d/%d" % tuple(shard)
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+
+
+def _load(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def interrupted_jobs(cache_dir=None):
+    # Незавершенные задания (упали, остановлены, приложение закрыто), новые первыми
+    jobs = []
+    for path in glob.glob(os.path.join(cache_dir or default_cache_dir(), "job_*.json")):
+        info = _load(path)
+        if info and info.get("state") not in FINISHED and info.get("processed"):
+            jobs.append(info)
+    return sorted(jobs, key=lambda info: -info.get("updated", 0))
+
+
+def discard_job(info, cache_dir=None):
+    # Отказ от продолжения: удаляются описание и собственная контрольная точка задания
+    AnalysisJob(info["root"], tuple(info["exts"]), info["recursive"], use_cache=info.get("use_cache", True),
+                cache_dir=cache_dir, tags=info.get("tags"), shard=info.get("shard")).remove_checkpoint()
+
+
+class AnalysisJob:
+    def __init__(self, root, target_exts, recursive=True, workers=None, use_cache=True, io_concurrency=0,
+                 stats=None, dedup=None, log=print, cache_dir=None, tags=None, shard=None):
+        # root - папка или список папок; shard - (K, N): только часть K из N (scanner.shard_of)
+        self.root = root
+        self.target_exts = target_exts
+        self.recursive = recursive
+        self.workers = workers
+        self.use_cache = use_cache
+        self.io_concurrency = io_concurrency
+        self.stats = stats
+        self.dedup = dedup
+        self.log = log
+        self.tags = tags
+        self.shard = shard
+
+        key = job_key(root, target_exts, recursive, tags, shard)
+        base = cache_dir or default_cache_dir()
+        self.info_path = os.path.join(base, f"job_{key}.json")
+        # Без кэша результаты все равно пишутся - в базу задания (удаляется после завершения)
+        if not use_cache:
+            self.checkpoint_path = os.path.join(base, f"job_{key}.sqlite")
+        elif shard:
+            self.checkpoint_path = cache_path_for(root, cache_dir, tags, shard)
+        else:
+            self.checkpoint_path = None
+
+        self.state = "new"
+        self.processed = 0
+        self.scanner = None
+        self._cancel = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._saved = 0.0
+
+    # УПРАВЛЕНИЕ (из любого потока)
+    def cancel(self):
+        self._cancel.set()
+        self._running.set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    # ВЫПОЛНЕНИЕ
+    def run(self):
+        # Генератор PhotoRecord, как pipeline.extract. На паузе новые результаты не забираются:
+        # пул дорабатывает уже отправленные пачки и простаивает, сканер упирается в свою очередь
+        previous = _load(self.info_path)
+        if previous and previous.get("state") not in FINISHED and previous.get("processed"):
+            self.log(f"Продолжение прерванного анализа: ранее обработано {previous['processed']}")
+        self.state = "running"
+        self._save(force=True)
+
+        self.scanner = Scanner(self.root, self.target_exts, self.recursive, stats=self.stats, shard=self.shard)
+        results = extract(self.scanner, self.root, workers=self.workers, use_cache=True, log=self.log,
+                          io_concurrency=self.io_concurrency, stats=self.stats, dedup=self.dedup,
+                          cache_path=self.checkpoint_path, tags=self.tags)
+        try:
+            for rec in results:
+                if not self._running.is_set():
+                    self.state = "paused"
+                    self._save(force=True)
+                    self._running.wait()
+                    self.state = "running"
+                if self._cancel.is_set():
+                    break
+                self.processed += 1
+                self._save()
+                yield rec
+            else:
+                self.state = "done"
+        except Exception:
+            self.state = "failed"
+            raise
+        finally:
+            self.scanner.stop()
+            results.close()
+            if self.state == "done":
+                self.remove_checkpoint()
+            else:
+                # Отмена, ошибка или закрытие генератора: контрольная точка остается
+                if self.state != "failed": self.state = "cancelled"
+                self._save(force=True)
+
+    def _save(self, force=False):
+        now = time.time()
+        if not force and now - self._saved < SAVE_EVERY:
+            return
+        self._saved = now
+        info = {"root": self.root, "exts": list(self.target_exts), "recursive": self.recursive,
+                "use_cache": self.use_cache, "tags": self.tags, "shard": self.shard, "state": self.state, "processed": self.processed,
+                "found": self.scanner.found if self.scanner else 0, "updated": now}
+        try:
+            os.makedirs(os.path.dirname(self.info_path), exist_ok=True)
+            tmp = self.info_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(info, f, ensure_ascii=False)
+            os.replace(tmp, self.info_path)
+        except OSError as e:
+            self.log(f"Не удалось сохранить состояние задания: {e}")
+
+    def remove_checkpoint(self):
+        paths = [self.info_path]
+        if not self.use_cache:
+            paths += [self.checkpoint_path + suffix for suffix in ("", "-wal", "-shm")]
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
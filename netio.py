@@ -0,0 +1,116 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import PhotoRecord, process_image
+from fastexif import read_header
+from stats import NULL_STATS
+
+# ПРЕДВЫБОРКА ЗАГОЛОВКОВ ДЛЯ СЕТЕВЫХ ДИСКОВ (SMB/NFS)
+# На сетевой папке время уходит на задержку каждого open/read, а не на процессор.
+# Asyncio держит "в полете" сразу много чтений заголовков (пул потоков делает
+# сами блокирующие вызовы), а разбор идет уже по байтам в памяти.
+# Интерфейс тот же, что у ExtractionEngine.run: результаты в порядке готовности.
+
+DEFAULT_CONCURRENCY = 32
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(out, item, stop):
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+class AsyncPrefetchEngine:
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, stats=None, tags=None):
+        self.concurrency = max(1, concurrency)
+        self.stats = stats or NULL_STATS
+        self.tags = tags
+
+    def run(self, items):
+        # items: записи сканера (путь, размер, mtime_ns) или пути;
+        # готовые PhotoRecord (из кэша) проходят насквозь
+        out = queue.Queue(maxsize=self.concurrency * 4)
+        stop = threading.Event()
+        thread = threading.Thread(target=lambda: asyncio.run(self._pump(items, out, stop)), daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            # Фоновый цикл сам завершится: запись в очередь проверяет stop
+            stop.set()
+
+    async def _pump(self, items, out, stop):
+        loop = asyncio.get_running_loop()
+        io_pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="header-io")
+        # Отдельный поток для чтения входа (сканер может блокироваться) и записи в очередь
+        feed_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="header-feed")
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        stats = self.stats
+        tags = self.tags
+
+        async def emit(item):
+            await loop.run_in_executor(feed_pool, _put, out, item, stop)
+
+        async def extract(entry):
+            try:
+                if isinstance(entry, str):
+                    path, size = entry, None
+                else:
+                    path, size = entry[0], entry[1]
+                started = time.perf_counter()
+                try:
+                    header = await loop.run_in_executor(io_pool, read_header, path)
+                    stats.add("bytes_read", len(header))
+                except OSError as e:
+                    stats.error("read_header", e, path)
+                    header = None
+                # Задержка сети: время от запроса до получения заголовка (включая ожидание пула)
+                stats.add_time("read_header", time.perf_counter() - started)
+                stats.gauge("io_in_flight", len(tasks))
+                # Разбор по буферу; при неудаче быстрого пути exifread читает файл сам
+                rec = await loop.run_in_executor(io_pool, process_image, path, size, header, stats, tags)
+            finally:
+                slots.release()
+            if not stop.is_set():
+                await emit(rec)
+
+        try:
+            it = iter(items)
+            while not stop.is_set():
+                item = await loop.run_in_executor(feed_pool, next, it, _DONE)
+                if item is _DONE:
+                    break
+                if isinstance(item, PhotoRecord):
+                    await emit(item)
+                    continue
+                await slots.acquire()
+                task = loop.create_task(extract(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            await emit(_DONE)
+        except Exception as e:
+            await emit(_Failure(e))
+        finally:
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            feed_pool.shutdown(wait=False, cancel_futures=True)
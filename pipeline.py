@@ -0,0 +1,216 @@
+import itertools
+import queue
+import threading
+import time
+
+from core import format_bytes, process_batch
+from engine import ExtractionEngine
+from scan_cache import ScanCache
+from scanner import as_roots
+from stats import NULL_STATS
+from watcher import POLL_INTERVAL, create_watcher
+
+# ОБЩИЙ КОНВЕЙЕР АНАЛИЗА
+# Сканер -> кэш -> пул процессов (или асинхронная предвыборка для сетевых дисков).
+# Без tkinter: им пользуются и окно, и cli.py
+
+# Глубина очереди сканера замеряется раз в столько записей
+QUEUE_SAMPLE_EVERY = 256
+# Пачки меньше этого разбираются в текущем процессе: пул ради пары файлов дороже самого разбора
+WATCH_POOL_MIN = 64
+
+
+def make_engine(workers=None, io_concurrency=0, stats=None, tags=None):
+    # io_concurrency > 0 - режим сетевого диска: много параллельных чтений заголовков
+    if io_concurrency:
+        # asyncio загружается только для этого режима
+        from netio import AsyncPrefetchEngine
+        return AsyncPrefetchEngine(io_concurrency, stats=stats, tags=tags)
+    return ExtractionEngine(workers=workers, stats=stats, tags=tags)
+
+
+def extract(entries, root, workers=None, use_cache=True, log=print, io_concurrency=0, stats=None,
+            dedup=None, cache_path=None, tags=None):
+    # Генератор результатов process_image (PhotoRecord) по мере готовности.
+    # entries - записи (путь, размер, mtime_ns), обычно потоковый Scanner.
+    # Неизмененные файлы берутся из кэша, остальные уходят в пул процессов.
+    # stats - RunStats прогона (счетчики кэша, времена этапов, ошибки)
+    # dedup - DedupIndex: копии уже встреченного содержимого не разбираются, а получают
+    # метаданные оригинала (группы копий остаются в dedup.original)
+    # cache_path - другая база вместо кэша папки (контрольная точка задания без кэша, jobs.py)
+    # tags - колонки details (core.TAG_COLUMNS), None - набор по умолчанию
+    run_stats = stats or NULL_STATS
+    cache = None
+    if use_cache:
+        try:
+            with run_stats.timer("cache_load"):
+                cache = ScanCache(root, cache_path, tags)
+                cache.load()
+        except Exception as e:
+            log(f"Кэш недоступен: {e}")
+            run_stats.error("cache", e)
+            cache = None
+
+    counts = {"cached": 0, "parsed": 0}
+    keys = {}
+    if dedup:
+        # Записи разобранных оригиналов для копий: из кэша, без него их держит сам DedupIndex
+        dedup.source = cache.get if cache else None
+
+    def work():
+        for n, entry in enumerate(entries):
+            if n % QUEUE_SAMPLE_EVERY == 0 and hasattr(entries, "qsize"):
+                run_stats.gauge("scan_queue", entries.qsize())
+            hit = cache.lookup(*entry) if cache else None
+            original = None
+            if dedup:
+                # Файл из кэша тоже регистрируется: его копии, найденные позже, возьмут запись из него;
+                # его отпечатки уже посчитаны в прошлых прогонах
+                if hit is not None: dedup.seed(entry[0], *cache.digests(entry[0]))
+                original = dedup.match(entry[0], entry[1])
+            if hit is not None:
+                counts["cached"] += 1
+                run_stats.add("cache_hits")
+                yield hit
+                continue
+            if cache:
+                keys[entry[0]] = entry[1:]
+                run_stats.add("cache_misses")
+            if original is not None:
+                run_stats.add("dedup_skipped")
+                # Копия выйдет вместе с оригиналом (dedup.add) или из copies() ниже
+                dedup.defer(entry, original)
+                continue
+            yield entry
+
+    def finish(records):
+        for rec in records:
+            key = keys.pop(rec.path, None)
+            if key is not None:
+                counts["parsed"] += 1
+                started = time.perf_counter()
+                cache.put(rec.path, *key, rec)
+                run_stats.add_time("cache_write", time.perf_counter() - started)
+            yield rec
+
+    def copies():
+        # Копии уже разобранных оригиналов (запись оригинала в кэше уже есть - записана в finish);
+        # не нашлась - копия разбирается сама
+        records, unresolved = [], []
+        for entry, original in dedup.take_ready():
+            rec = dedup.record(original)
+            if rec is None:
+                unresolved.append(entry)
+            else:
+                records.append(rec._replace(path=entry[0]))
+        return records + process_batch(unresolved, run_stats, tags) if unresolved else records
+
+    try:
+        engine = make_engine(workers, io_concurrency, stats, tags)
+        for rec in engine.run(work()):
+            if dedup:
+                yield from finish(dedup.add(rec))
+                yield from finish(copies())
+            else:
+                yield from finish((rec,))
+        if dedup:
+            yield from finish(copies())
+            yield from finish(process_batch(dedup.take_waiting(), run_stats, tags))
+            n_groups, n_copies, wasted = dedup.summary()
+            if n_copies:
+                log(f"Дубликатов: {n_copies} в {n_groups} группах ({format_bytes(wasted)} лишних)")
+
+        if cache:
+            if dedup: cache.put_digests(dedup.new_digests())
+            removed = cache.prune()
+            run_stats.add("cache_pruned", removed)
+            log(f"Из кэша: {counts['cached']}, новых/измененных: {counts['parsed']}, удалено: {removed}")
+    finally:
+        if cache:
+            cache.close()
+            if dedup: dedup.source = None
+
+
+def _changes(watchers, stop):
+    # Пачки изменений всех корневых папок: у каждого наблюдателя свой поток, пачки - в общую очередь
+    if len(watchers) == 1:
+        yield from watchers[0].changes(stop)
+        return
+    batches = queue.Queue()
+
+    def pump(watcher):
+        try:
+            for batch in watcher.changes(stop):
+                batches.put(batch)
+        except Exception as e:
+            batches.put(e)
+
+    for watcher in watchers:
+        threading.Thread(target=pump, args=(watcher,), daemon=True).start()
+    while not stop.is_set():
+        try:
+            batch = batches.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if isinstance(batch, Exception):
+            raise batch
+        yield batch
+
+
+def watch(root, target_exts, recursive=True, stop=None, workers=None, use_cache=True, log=print,
+          io_concurrency=0, interval=POLL_INTERVAL, tags=None, dedup=None, cache_path=None):
+    # Генератор событий ("upsert", PhotoRecord) и ("remove", путь) до установки stop.
+    # Через конвейер идут только новые/измененные файлы, кэш обновляется на ходу.
+    # root, dedup, cache_path, tags - те же, что у анализа перед наблюдением (extract):
+    # root - папка или список папок (одна база кэша на весь набор), dedup - его DedupIndex,
+    # копия уже известного содержимого берет запись оригинала из кэша
+    stop = stop or threading.Event()
+    watchers = [create_watcher(r, target_exts, recursive, interval, polling=bool(io_concurrency))
+                for r in as_roots(root)]
+    log(f"Наблюдение за папкой ({watchers[0].name})")
+    cache = None
+    if use_cache:
+        try:
+            cache = ScanCache(root, cache_path, tags)
+        except Exception as e:
+            log(f"Кэш недоступен: {e}")
+    if dedup: dedup.source = cache.get if cache else None
+
+    try:
+        for changed, deleted in _changes(watchers, stop):
+            for path in deleted:
+                if dedup: dedup.forget(path)
+                yield "remove", path
+            if cache and deleted:
+                cache.delete(deleted)
+
+            keys = {entry[0]: entry[1:] for entry in changed}
+            parse, copies = [], []
+            for entry in changed:
+                original = None
+                if dedup:
+                    dedup.forget(entry[0])
+                    original = dedup.match(entry[0], entry[1])
+                # Оригинал из этой же пачки еще не разобран (в кэше - прежнее содержимое)
+                rec = dedup.record(original) if original is not None and original not in keys else None
+                if rec is None:
+                    parse.append(entry)
+                else:
+                    copies.append(rec._replace(path=entry[0]))
+
+            engine = make_engine(workers if len(parse) >= WATCH_POOL_MIN else 1, io_concurrency, tags=tags)
+            for rec in itertools.chain(copies, engine.run(parse)):
+                if dedup: dedup.add(rec)
+                if cache:
+                    cache.put(rec.path, *keys[rec.path], rec)
+                yield "upsert", rec
+            if cache:
+                if dedup: cache.put_digests(dedup.new_digests())
+                cache.flush()
+            log(f"Изменения в папке: новых/измененных {len(changed)}, удалено {len(deleted)}")
+    finally:
+        for watcher in watchers:
+            watcher.close()
+        if cache:
+            cache.close()
+            if dedup: dedup.source = None
@@ -0,0 +1,287 @@
+import datetime
+import math
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from startup import optional
+from store import NO_DATE
+
+# ФИЛЬТРЫ, СОРТИРОВКА И ПОИСК ПО ХРАНИЛИЩУ РЕЗУЛЬТАТОВ
+# Индекс строится по колонкам ResultStore один раз после анализа (повторного обхода нет):
+# - порядок строк для каждой колонки таблицы (сортировка по заголовку - готовая перестановка,
+#   пустые значения всегда в конце);
+# - камера: код строки -> номера строк (фильтр по подстроке проверяет только сотни
+#   различных значений, а не миллион строк);
+# - даты: номера строк, упорядоченные по дате, диапазон дат - отрезок двоичным поиском;
+# - GPS: номера строк с координатами;
+# - имена файлов: одна строка-склейка в нижнем регистре, поиск подстроки - str.find по ней.
+# С NumPy фильтры сочетаются векторными масками, без него - множествами номеров строк.
+
+SORT_COLUMNS = ("filename", "size", "date", "camera", "lat", "lon")
+_SEP = "\n"
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_date(text, end=False):
+    # 'ДД.ММ.ГГГГ', 'ГГГГ-ММ-ДД' или 'ГГГГ' -> секунды, как в колонке дат (ValueError, если не дата).
+    # end=True - последняя секунда этого дня (года): граница "по" включительно
+    text = text.strip()
+    if len(text) == 4 and text.isdigit():
+        start = datetime.datetime(int(text), 1, 1)
+        stop = datetime.datetime(int(text) + 1, 1, 1)
+    else:
+        fmt = '%Y-%m-%d' if '-' in text else '%d.%m.%Y'
+        start = datetime.datetime.strptime(text, fmt)
+        stop = start + datetime.timedelta(days=1)
+    moment = stop - datetime.timedelta(seconds=1) if end else start
+    return int((moment - _EPOCH).total_seconds())
+
+
+class ResultIndex:
+    def __init__(self, store):
+        # NumPy или None - один раз на индекс: перестановки и запросы к ним с одним типом массивов
+        self._np = optional("numpy")
+        self.store = store
+        self.count = len(store)
+        self._orders = {}       # колонка -> (упорядоченные строки со значением, строки без значения)
+        self._cameras = None
+        self._dates = None
+        self._gps = None
+        self._names = None
+
+    # СОРТИРОВКА
+    def order(self, column):
+        cached = self._orders.get(column)
+        if cached is None:
+            cached = self._orders[column] = self._build_order(column)
+        return cached
+
+    def prepare(self, cancel=None):
+        # Все перестановки заранее (фоновый поток после анализа): клик по заголовку - без ожидания.
+        # cancel - threading.Event: хранилище сейчас изменится, оставшиеся шаги не нужны
+        steps = [lambda column=column: self.order(column) for column in SORT_COLUMNS]
+        steps += [self._camera_rows, self._date_rows, self._gps_rows, self._name_blob]
+        for step in steps:
+            if cancel is not None and cancel.is_set():
+                return
+            step()
+
+    def _build_order(self, column):
+        np = self._np
+        store = self.store
+        n = self.count
+        if column == "filename":
+            # Строки сортирует Python: массив NumPy из строк занял бы n * (длина самого длинного имени) * 4 байт
+            keys = [os.path.basename(p).casefold() for p in store.paths[:n]]
+            order = sorted(range(n), key=keys.__getitem__)
+            return (order if np is None else np.asarray(order, dtype=np.int64)), []
+        if column == "size":
+            if np is not None:
+                return np.argsort(np.asarray(store.sizes[:n]), kind="stable"), []
+            return sorted(range(n), key=store.sizes.__getitem__), []
+        if column == "date":
+            rows, dates = self._date_rows()
+            missing = [i for i in range(n) if store.dates[i] == NO_DATE] if np is None else \
+                np.flatnonzero(np.asarray(store.dates[:n]) == NO_DATE)
+            return rows, missing
+        if column == "camera":
+            # Ранг кода камеры в алфавитном порядке ее названия
+            names = store.cameras.values
+            rank = array('q', bytes(8 * len(names)))
+            for r, code in enumerate(sorted(range(1, len(names)), key=lambda c: names[c].casefold()), 1):
+                rank[code] = r
+            codes = store.camera_codes[:n]
+            if np is not None:
+                keys = np.asarray(rank, dtype=np.int64)[np.asarray(codes, dtype=np.int64)]
+                order = np.argsort(keys, kind="stable")
+                valid = keys[order] > 0
+                return order[valid], order[~valid]
+            with_camera = [i for i in range(n) if codes[i]]
+            return sorted(with_camera, key=lambda i: rank[codes[i]]), [i for i in range(n) if not codes[i]]
+        # Широта / долгота: NaN - нет координат
+        values = store.lats if column == "lat" else store.lons
+        if np is not None:
+            col = np.asarray(values[:n], dtype=np.float64)
+            valid = ~np.isnan(col)
+            rows = np.flatnonzero(valid)
+            return rows[np.argsort(col[rows], kind="stable")], np.flatnonzero(~valid)
+        rows = [i for i in range(n) if not math.isnan(values[i])]
+        return sorted(rows, key=values.__getitem__), [i for i in range(n) if math.isnan(values[i])]
+
+    # ИНДЕКСЫ ФИЛЬТРОВ
+    def _camera_rows(self):
+        # код камеры -> номера строк
+        np = self._np
+        if self._cameras is None:
+            codes = self.store.camera_codes[:self.count]
+            if np is not None:
+                codes = np.asarray(codes, dtype=np.int64)
+                order = np.argsort(codes, kind="stable")
+                bounds = np.searchsorted(codes[order], np.arange(len(self.store.cameras.values) + 1))
+                self._cameras = (order, bounds)
+            else:
+                postings = {}
+                for i, code in enumerate(codes):
+                    postings.setdefault(code, []).append(i)
+                self._cameras = postings
+        return self._cameras
+
+    def _date_rows(self):
+        # (строки с датой по возрастанию даты, сами даты в том же порядке)
+        np = self._np
+        if self._dates is None:
+            dates = self.store.dates[:self.count]
+            if np is not None:
+                col = np.asarray(dates, dtype=np.int64)
+                rows = np.flatnonzero(col != NO_DATE)
+                rows = rows[np.argsort(col[rows], kind="stable")]
+                self._dates = (rows, col[rows])
+            else:
+                rows = sorted((i for i in range(self.count) if dates[i] != NO_DATE), key=dates.__getitem__)
+                self._dates = (rows, [dates[i] for i in rows])
+        return self._dates
+
+    def _gps_rows(self):
+        np = self._np
+        if self._gps is None:
+            lats = self.store.lats[:self.count]
+            if np is not None:
+                self._gps = ~np.isnan(np.asarray(lats, dtype=np.float64))
+            else:
+                self._gps = set(i for i in range(self.count) if not math.isnan(lats[i]))
+        return self._gps
+
+    def _name_blob(self):
+        # "имя1\nимя2\n..." в нижнем регистре и смещения начала каждого имени.
+        # Для NumPy - байты UTF-8: подстрока в тексте <=> та же подстрока в его байтах
+        np = self._np
+        if self._names is None:
+            blob = _SEP.join(os.path.basename(p).casefold() for p in self.store.paths[:self.count]) + _SEP
+            if np is not None:
+                data = np.frombuffer(blob.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+                ends = np.flatnonzero(data == ord(_SEP))
+                self._names = (data, np.concatenate([[0], ends[:-1] + 1]))
+            else:
+                offsets = array('q')
+                pos = 0
+                for name in blob.split(_SEP)[:-1]:
+                    offsets.append(pos)
+                    pos += len(name) + 1
+                self._names = (blob, offsets)
+        return self._names
+
+    # ЗАПРОСЫ
+    def camera_rows(self, text):
+        np = self._np
+        needle = text.casefold()
+        values = self.store.cameras.values
+        codes = [c for c in range(1, len(values)) if needle in values[c].casefold()]
+        index = self._camera_rows()
+        if np is not None:
+            order, bounds = index
+            parts = [order[bounds[c]:bounds[c + 1]] for c in codes]
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        return [i for c in codes for i in index.get(c, ())]
+
+    def date_rows(self, start=None, end=None):
+        # start/end - секунды (см. core.parse_exif_timestamp), границы включительно
+        np = self._np
+        rows, dates = self._date_rows()
+        if np is not None:
+            lo = 0 if start is None else np.searchsorted(dates, start, side="left")
+            hi = len(dates) if end is None else np.searchsorted(dates, end, side="right")
+        else:
+            lo = 0 if start is None else bisect_left(dates, start)
+            hi = len(dates) if end is None else bisect_right(dates, end)
+        return rows[lo:hi]
+
+    def name_rows(self, text):
+        np = self._np
+        blob, offsets = self._name_blob()
+        needle = text.casefold()
+        if not needle or _SEP in needle:
+            return []
+        if np is not None:
+            # Кандидаты - позиции первого байта, дальше отсеиваются по остальным байтам
+            pattern = needle.encode('utf-8', 'surrogatepass')
+            found = np.flatnonzero(blob[:len(blob) - len(pattern) + 1] == pattern[0])
+            for k in range(1, len(pattern)):
+                found = found[blob[found + k] == pattern[k]]
+            rows = np.searchsorted(offsets, found, side="right") - 1
+            # rows уже по возрастанию: повторы (несколько совпадений в одном имени) идут подряд
+            return rows[np.concatenate([[True], rows[1:] != rows[:-1]])]
+        found = []
+        pos = blob.find(needle)
+        while pos >= 0:
+            row = bisect_right(offsets, pos) - 1
+            found.append(row)
+            # Следующее совпадение ищем уже со следующего имени
+            pos = blob.find(needle, offsets[row + 1] if row + 1 < len(offsets) else len(blob))
+        return found
+
+    def select(self, rows=None, camera=None, date_from=None, date_to=None, has_gps=None, name=None,
+               sort=None, descending=False):
+        # Номера строк выборки. rows - исходная выборка (поиск по месту, дубликаты) или None - все.
+        # Без сортировки порядок исходной выборки сохраняется; None - "все строки как есть"
+        filtered = camera or date_from is not None or date_to is not None or has_gps is not None or name
+        if rows is None and not filtered and sort is None:
+            return None
+        if self._np is not None:
+            return self._select_np(rows, camera, date_from, date_to, has_gps, name, sort, descending)
+
+        keep = None if rows is None else set(rows)
+
+        def narrow(keep, found):
+            found = set(found)
+            return found if keep is None else keep & found
+
+        if camera: keep = narrow(keep, self.camera_rows(camera))
+        if date_from is not None or date_to is not None:
+            keep = narrow(keep, self.date_rows(date_from, date_to))
+        if has_gps is True: keep = narrow(keep, self._gps_rows())
+        if has_gps is False:
+            gps = self._gps_rows()
+            keep = narrow(keep, (i for i in range(self.count) if i not in gps))
+        if name: keep = narrow(keep, self.name_rows(name))
+
+        if sort is None:
+            if rows is not None:
+                return [i for i in rows if i in keep]
+            return sorted(keep)
+        ordered, missing = self.order(sort)
+        if descending: ordered = ordered[::-1]
+        if keep is None:
+            return list(ordered) + list(missing)
+        return [i for i in ordered if i in keep] + [i for i in missing if i in keep]
+
+    def _select_np(self, rows, camera, date_from, date_to, has_gps, name, sort, descending):
+        np = self._np
+        n = self.count
+        if rows is None:
+            mask = np.ones(n, dtype=bool)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            mask = np.zeros(n, dtype=bool)
+            mask[rows] = True
+
+        def narrow(found):
+            hit = np.zeros(n, dtype=bool)
+            hit[np.asarray(found, dtype=np.int64)] = True
+            mask[:] &= hit
+
+        if camera: narrow(self.camera_rows(camera))
+        if date_from is not None or date_to is not None: narrow(self.date_rows(date_from, date_to))
+        if has_gps is not None: mask &= self._gps_rows() if has_gps else ~self._gps_rows()
+        if name: narrow(self.name_rows(name))
+
+        if sort is None:
+            if rows is not None:
+                return rows[mask[rows]].tolist()
+            return np.flatnonzero(mask).tolist()
+        ordered, missing = self.order(sort)
+        ordered = np.asarray(ordered, dtype=np.int64)
+        missing = np.asarray(missing, dtype=np.int64)
+        if descending: ordered = ordered[::-1]
+        return np.concatenate([ordered[mask[ordered]], missing[mask[missing]]]).tolist()
+
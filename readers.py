@@ -0,0 +1,401 @@
+import mmap
+import re
+import struct
+import zlib
+from collections import namedtuple
+
+import fastexif
+from fastexif import HEADER_WINDOW, HeaderError, WindowError
+from stats import NULL_STATS
+from tagdump import xmp_properties
+
+# ЧИТАТЕЛИ ФОРМАТОВ
+# Формат определяется по первым байтам файла (не по расширению: .png с iPhone бывает HEIC),
+# каждый читатель достает блок EXIF своим способом и отдает его разбору fastexif:
+#   JPEG - сегмент APP1 в заголовке; TIFF - IFD прямо из файла (если не влезли в заголовок -
+#   через mmap, читаются только нужные страницы); PNG - заголовки чанков до IDAT, данные только
+#   у eXIf/tEXt/zTXt/iTXt; WebP - чанки RIFF EXIF/XMP; HEIC/AVIF - элемент Exif по iinf/iloc.
+# Что читатель не смог разобрать (HeaderError) - как и раньше, уходит в exifread.
+# Свой формат: register(name, match, tags, thumbnail) - позже зарегистрированный проверяется раньше.
+
+Reader = namedtuple("Reader", "name match tags thumbnail")
+_READERS = []
+
+# Текстовые чанки PNG больше этого не читаются (там уже не метаданные)
+MAX_TEXT_CHUNK = 1024 * 1024
+
+
+def register(name, match, tags, thumbnail=None):
+    # match(header) -> bool; tags(src, names) -> {имя тега: значение} как у fastexif;
+    # thumbnail(src) -> байты JPEG-миниатюры или None
+    _READERS.insert(0, Reader(name, match, tags, thumbnail))
+
+
+def find_reader(header):
+    for reader in _READERS:
+        if reader.match(header):
+            return reader
+    return None
+
+
+class Source:
+    # Байты файла для читателя: сначала из уже прочитанного заголовка, дальше - чтением
+    # с нужной позиции (файл открывается, только если заголовка не хватило)
+    def __init__(self, filepath, header, stats=NULL_STATS):
+        self.path = filepath
+        self.buf = header
+        self.stats = stats
+        self._file = None
+        self._map = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'rb', buffering=0)
+        return self._file
+
+    def read(self, offset, length):
+        end = offset + length
+        if end <= len(self.buf):
+            return self.buf[offset:end]
+        f = self._open()
+        f.seek(offset)
+        data = f.read(length)
+        self.stats.add("bytes_read", len(data))
+        return data
+
+    def whole(self):
+        # Весь файл без чтения целиком: mmap подгружает только затронутые страницы
+        if self._map is None:
+            self._map = mmap.mmap(self._open().fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def close(self):
+        if self._map is not None: self._map.close()
+        if self._file is not None: self._file.close()
+        self._map = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_tags(filepath, header, names=None, stats=NULL_STATS):
+    # Теги по заголовку файла; формат не знаком ни одному читателю - HeaderError
+    reader = find_reader(header)
+    if reader is None:
+        raise HeaderError("unsupported format")
+    stats.add(f"format: {reader.name}")
+    with Source(filepath, header, stats) as src:
+        try:
+            return reader.tags(src, names)
+        except IndexError as e:
+            raise HeaderError(f"truncated {reader.name}") from e
+
+
+def embedded_thumbnail(filepath):
+    # Байты встроенной JPEG-миниатюры или None
+    header = fastexif.read_header(filepath)
+    reader = find_reader(header)
+    if reader is None or reader.thumbnail is None:
+        return None
+    with Source(filepath, header) as src:
+        return reader.thumbnail(src)
+
+
+def _block_thumbnail(block):
+    # Миниатюра из отдельного блока EXIF (смещения - внутри блока)
+    if not block:
+        return None
+    found = fastexif.tiff_thumbnail(block)
+    if found is None:
+        return None
+    offset, length = found
+    return block[offset:offset + length]
+
+
+def _strip_exif_prefix(block):
+    # Некоторые программы оставляют в блоке заголовок APP1 "Exif\0\0"
+    return block[6:] if block[:6] == b'Exif\x00\x00' else block
+
+
+# XMP: только то, что есть и в EXIF (дополняет EXIF, но не заменяет его)
+XMP_TAGS = {
+    'XMP tiff:Make': 'Image Make',
+    'XMP tiff:Model': 'Image Model',
+    'XMP xmp:CreatorTool': 'Image Software',
+    'XMP exif:DateTimeOriginal': 'EXIF DateTimeOriginal',
+    'XMP xmp:CreateDate': 'Image DateTime',
+    'XMP exifEX:LensModel': 'EXIF LensModel',
+    'XMP aux:Lens': 'EXIF LensModel',
+}
+_XMP_DATE = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d)(?::(\d\d))?')
+
+
+def _xmp_tags(data, names):
+    tags = {}
+    for prop, value in xmp_properties(data).items():
+        name = XMP_TAGS.get(prop)
+        if name is None or (names is not None and name not in names):
+            continue
+        if 'Date' in name:
+            # '2008-05-30T15:56:01+03:00' -> '2008:05:30 15:56:01' (как в EXIF)
+            m = _XMP_DATE.match(value)
+            if m is None: continue
+            y, mo, d, h, mi, sec = m.groups()
+            value = f"{y}:{mo}:{d} {h}:{mi}:{sec or '00'}"
+        tags[name] = value
+    return tags
+
+
+def _exif_with_xmp(block, xmp, names):
+    tags = _xmp_tags(xmp, names) if xmp else {}
+    if block:
+        tags.update(fastexif.parse_tiff(_strip_exif_prefix(block), 0, names))
+    return tags
+
+
+# JPEG И TIFF
+def _jpeg_tags(src, names):
+    return fastexif.parse_header(src.buf, names)
+
+
+def _tiff_tags(src, names):
+    try:
+        return fastexif.parse_tiff(src.buf, 0, names)
+    except WindowError:
+        if len(src.buf) < HEADER_WINDOW:
+            raise
+    # IFD или значения лежат дальше заголовка (обычно IFD0 - после данных изображения)
+    try:
+        return fastexif.parse_tiff(src.whole(), 0, names)
+    except (OSError, ValueError) as e:
+        if isinstance(e, HeaderError): raise
+        raise HeaderError(f"mmap failed: {e}") from e
+
+
+def _header_thumbnail(src):
+    found = fastexif.find_thumbnail(src.buf)
+    if found is None:
+        return None
+    offset, length = found
+    return src.read(offset, length)
+
+
+# PNG
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_TEXT = (b'tEXt', b'zTXt', b'iTXt')
+
+
+def _png_chunks(src):
+    # (тип, позиция данных, длина) по заголовкам чанков; данные изображения не читаются:
+    # метаданные, которые нужны для разбора, идут до первого IDAT
+    pos = len(PNG_SIGNATURE)
+    while True:
+        head = src.read(pos, 8)
+        if len(head) < 8:
+            return
+        length, kind = struct.unpack('>L4s', head)
+        if kind in (b'IDAT', b'IEND'):
+            return
+        yield kind, pos + 8, length
+        pos += 12 + length
+
+
+def _png_text(kind, data):
+    # Чанк tEXt/zTXt/iTXt -> (ключевое слово, текст в байтах)
+    keyword, _, text = data.partition(b'\x00')
+    if kind == b'zTXt':
+        text = zlib.decompress(text[1:])
+    elif kind == b'iTXt':
+        compressed, text = text[0], text[2:]
+        text = text.split(b'\x00', 2)[-1]   # язык и перевод ключевого слова
+        if compressed: text = zlib.decompress(text)
+    return keyword.decode('latin-1'), text
+
+
+def _raw_profile(text):
+    # "Raw profile type exif" (ImageMagick): "\nexif\n   <длина>\n<hex по строкам>"
+    parts = text.split()
+    return bytes.fromhex(b''.join(parts[2:]).decode('ascii'))
+
+
+def _png_blocks(src):
+    # -> (блок EXIF или None, пакет XMP или None)
+    block = profile = xmp = None
+    for kind, pos, length in _png_chunks(src):
+        if kind == b'eXIf':
+            block = src.read(pos, length)
+        elif kind in _PNG_TEXT and length <= MAX_TEXT_CHUNK:
+            try:
+                keyword, text = _png_text(kind, src.read(pos, length))
+                if keyword in ('Raw profile type exif', 'Raw profile type APP1'):
+                    profile = _raw_profile(text)
+                elif keyword == 'XML:com.adobe.xmp':
+                    xmp = text
+            except (ValueError, zlib.error):
+                # Испорченный текстовый чанк - просто без него
+                pass
+    return block or profile, xmp
+
+
+def _png_tags(src, names):
+    return _exif_with_xmp(*_png_blocks(src), names)
+
+
+def _png_thumbnail(src):
+    block, _ = _png_blocks(src)
+    return _block_thumbnail(_strip_exif_prefix(block)) if block else None
+
+
+# WEBP (RIFF): метаданные - только в расширенном формате (первый чанк VP8X с флагами)
+_WEBP_EXIF_FLAG = 0x08
+_WEBP_XMP_FLAG = 0x04
+
+
+def _webp_blocks(src):
+    head = src.read(12, 9)
+    if head[:4] != b'VP8X' or not head[8] & (_WEBP_EXIF_FLAG | _WEBP_XMP_FLAG):
+        return None, None
+    block = xmp = None
+    pos = 12
+    while block is None or xmp is None:
+        chunk = src.read(pos, 8)
+        if len(chunk) < 8:
+            break
+        kind, length = struct.unpack('<4sL', chunk)
+        if kind == b'EXIF':
+            block = src.read(pos + 8, length)
+        elif kind == b'XMP ':
+            xmp = src.read(pos + 8, length)
+        pos += 8 + length + (length & 1)
+    return block, xmp
+
+
+def _webp_tags(src, names):
+    return _exif_with_xmp(*_webp_blocks(src), names)
+
+
+def _webp_thumbnail(src):
+    block, _ = _webp_blocks(src)
+    return _block_thumbnail(_strip_exif_prefix(block)) if block else None
+
+
+# HEIC / AVIF (ISO BMFF): meta -> iinf (какой элемент - Exif) -> iloc (где он лежит в файле)
+HEIF_BRANDS = (b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx', b'mif1', b'msf1', b'avif', b'avis')
+
+
+def _boxes(src, pos, end=None):
+    # (тип, начало данных, конец) боксов подряд с позиции pos до end (None - до конца файла)
+    while end is None or pos + 8 <= end:
+        head = src.read(pos, 8)
+        if len(head) < 8:
+            return
+        size, kind = struct.unpack('>L4s', head)
+        start = pos + 8
+        if size == 1:
+            size = struct.unpack('>Q', src.read(start, 8))[0]
+            start += 8
+        elif size == 0:
+            # До конца файла (или родителя) - последний бокс
+            yield kind, start, end
+            return
+        if size < start - pos:
+            raise HeaderError("bad box size")
+        yield kind, start, pos + size
+        pos += size
+
+
+def _uint(data, pos, size):
+    return int.from_bytes(data[pos:pos + size], 'big')
+
+
+def _heif_exif_item(data):
+    # iinf -> номер элемента типа Exif или None
+    version = data[0]
+    pos = 4 + (2 if version == 0 else 4)
+    while pos + 8 <= len(data):
+        size, kind = struct.unpack_from('>L4s', data, pos)
+        if size < 8:
+            break
+        if kind == b'infe' and data[pos + 8] >= 2:
+            id_size = 2 if data[pos + 8] == 2 else 4
+            item = _uint(data, pos + 12, id_size)
+            if data[pos + 14 + id_size:pos + 18 + id_size] == b'Exif':
+                return item
+        pos += size
+    return None
+
+
+def _heif_extents(data, wanted):
+    # iloc -> [(смещение в файле, длина)] элемента wanted
+    version = data[0]
+    offset_size, length_size = data[4] >> 4, data[4] & 15
+    base_size, index_size = data[5] >> 4, (data[5] & 15 if version in (1, 2) else 0)
+    id_size = 2 if version < 2 else 4
+    count = _uint(data, 6, id_size)
+    pos = 6 + id_size
+    for _ in range(count):
+        item = _uint(data, pos, id_size)
+        pos += id_size
+        method = 0
+        if version in (1, 2):
+            method = _uint(data, pos, 2) & 15
+            pos += 2
+        pos += 2    # data_reference_index
+        base = _uint(data, pos, base_size)
+        pos += base_size
+        extent_count = _uint(data, pos, 2)
+        pos += 2
+        extents = []
+        for _ in range(extent_count):
+            pos += index_size
+            offset = _uint(data, pos, offset_size)
+            pos += offset_size
+            extents.append((base + offset, _uint(data, pos, length_size)))
+            pos += length_size
+        if item == wanted:
+            if method != 0:
+                # Данные внутри бокса idat - редкость, разбирает exifread
+                raise HeaderError("unsupported iloc construction method")
+            return extents
+    return None
+
+
+def _heif_block(src):
+    for kind, start, end in _boxes(src, 0):
+        if kind == b'meta':
+            break
+    else:
+        return None
+    item = iloc = None
+    for kind, pos, box_end in _boxes(src, start + 4, end):    # meta - "полный" бокс: версия и флаги
+        if kind == b'iinf':
+            item = _heif_exif_item(src.read(pos, box_end - pos))
+        elif kind == b'iloc':
+            iloc = src.read(pos, box_end - pos)
+    if item is None or iloc is None:
+        return None
+    extents = _heif_extents(iloc, item)
+    if not extents:
+        return None
+    data = b''.join(src.read(offset, length) for offset, length in extents)
+    # Первые 4 байта - смещение заголовка TIFF от их конца
+    return data[4 + struct.unpack_from('>L', data)[0]:]
+
+
+def _heif_tags(src, names):
+    block = _heif_block(src)
+    return fastexif.parse_tiff(block, 0, names) if block else {}
+
+
+def _heif_thumbnail(src):
+    return _block_thumbnail(_heif_block(src))
+
+
+register("webp", lambda buf: buf[:4] == b'RIFF' and buf[8:12] == b'WEBP', _webp_tags, _webp_thumbnail)
+register("heif", lambda buf: buf[4:8] == b'ftyp' and buf[8:12] in HEIF_BRANDS, _heif_tags, _heif_thumbnail)
+register("png", lambda buf: buf[:8] == PNG_SIGNATURE, _png_tags, _png_thumbnail)
+register("tiff", lambda buf: buf[:4] in (b'II*\x00', b'MM\x00*'), _tiff_tags, _header_thumbnail)
+register("jpeg", lambda buf: buf[:2] == b'\xff\xd8', _jpeg_tags, _header_thumbnail)
@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import time
+
+from core import DETAIL_TAGS, PhotoRecord
+from scanner import as_roots
+
+# Постоянный кэш результатов анализа.
+# Ключ - (путь, размер, mtime_ns): если файл не менялся, EXIF повторно не разбираем.
+# Для каждой корневой папки своя база SQLite в пользовательской папке кэша;
+# для другого набора колонок details (core.TAG_COLUMNS) - отдельная база той же папки.
+# Рядом с результатом - отпечатки содержимого для поиска дубликатов (dedup.py), если файл
+# с кем-то совпал по размеру: повторный прогон их не пересчитывает.
+
+# Увеличивать при изменении формата результата process_image (PhotoRecord)
+CACHE_VERSION = 3
+COMMIT_EVERY = 500
+# ...и не реже, чем раз в столько секунд: база служит контрольной точкой долгого анализа (jobs.py)
+COMMIT_SECONDS = 10
+
+
+def default_cache_dir():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'exif-metadata-analyzer')
+
+
+def tags_suffix(tags):
+    # Часть ключа базы для набора колонок: пусто для набора по умолчанию (прежние имена баз)
+    if tags is None or sorted(tags) == sorted(DETAIL_TAGS):
+        return ""
+    return "|" + ",".join(sorted(tags))
+
+
+def roots_key(root):
+    # Одна папка - прежний ключ, несколько - все пути по порядку
+    return "|".join(os.path.abspath(r) for r in sorted(as_roots(root)))
+
+
+def cache_path_for(root, cache_dir=None, tags=None, shard=None):
+    # У каждой части (shard) своя база: части, запущенные параллельно на одной машине, не делят запись
+    text = roots_key(root) + tags_suffix(tags)
+    if shard: text += "|shard %d/%d" % tuple(shard)
+    key = hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+    return os.path.join(cache_dir or default_cache_dir(), f"scan_{key}.sqlite")
+
+
+class ScanCache:
+    def __init__(self, root, db_path=None, tags=None):
+        self.root = root
+        self.db_path = db_path or cache_path_for(root, tags=tags)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 2:
+            # Версия 2 отличается только отсутствием отпечатков: добавляем колонки, результаты остаются
+            self.conn.execute("ALTER TABLE files ADD COLUMN quick BLOB")
+            self.conn.execute("ALTER TABLE files ADD COLUMN full BLOB")
+            self.conn.execute(f"PRAGMA user_version={CACHE_VERSION}")
+        elif version != CACHE_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute(f"PRAGMA user_version={CACHE_VERSION}")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS files (
+                                 path TEXT PRIMARY KEY,
+                                 size INTEGER NOT NULL,
+                                 mtime_ns INTEGER NOT NULL,
+                                 data TEXT NOT NULL,
+                                 quick BLOB,
+                                 full BLOB
+                             ) WITHOUT ROWID""")
+        self.conn.commit()
+        self._pending = 0
+        self._committed = time.monotonic()
+        self._known = {}
+        self._digests = {}
+
+    def load(self):
+        # Загружаем известные записи один раз за прогон, дальше lookup - поиск в словаре
+        self._known = {}
+        self._digests = {}
+        for path, size, mtime_ns, data, quick, full in self.conn.execute(
+                "SELECT path, size, mtime_ns, data, quick, full FROM files"):
+            self._known[path] = (size, mtime_ns, data)
+            if quick is not None or full is not None:
+                self._digests[path] = (quick, full)
+        return len(self._known)
+
+    def lookup(self, path, size, mtime_ns):
+        # Результат из кэша или None, если файла нет в кэше или он изменился
+        row = self._known.pop(path, None)
+        if row is not None and row[0] == size and row[1] == mtime_ns:
+            return PhotoRecord(*json.loads(row[2]))
+        return None
+
+    def get(self, path):
+        # Запись из базы по пути (с еще не зафиксированными put того же соединения) или None
+        row = self.conn.execute("SELECT data FROM files WHERE path = ?", (path,)).fetchone()
+        return PhotoRecord(*json.loads(row[0])) if row else None
+
+    def digests(self, path):
+        # Отпечатки (быстрый, полный) файла из кэша; верны, только если lookup его вернул
+        return self._digests.pop(path, (None, None))
+
+    def put_digests(self, rows):
+        # rows - (быстрый, полный, путь); None не затирает уже сохраненный отпечаток
+        self.conn.executemany("UPDATE files SET quick = COALESCE(?, quick), full = COALESCE(?, full) "
+                              "WHERE path = ?", rows)
+        self.conn.commit()
+
+    def prune(self):
+        # Файлы, которые за прогон ни разу не встретились: удаляем те, которых больше нет на диске
+        # (остальные просто не попали под текущие фильтры). Возвращает число удаленных
+        gone = [(p,) for p in self._known if not os.path.exists(p)]
+        if gone:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", gone)
+            self.conn.commit()
+        self._known = {}
+        self._digests = {}
+        return len(gone)
+
+    def put(self, path, size, mtime_ns, rec):
+        self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                          (path, size, mtime_ns, json.dumps(rec, ensure_ascii=False)))
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY or time.monotonic() - self._committed >= COMMIT_SECONDS:
+            self.flush()
+
+    def delete(self, paths):
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+        self.conn.commit()
+
+    def flush(self):
+        if self._pending:
+            self.conn.commit()
+            self._pending = 0
+        self._committed = time.monotonic()
+
+    def clear(self):
+        self.conn.execute("DELETE FROM files")
+        self.conn.commit()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,136 @@
+import os
+import queue
+import threading
+import time
+import zlib
+
+from stats import NULL_STATS
+
+# ПОТОКОВЫЙ ПОИСК ФАЙЛОВ
+# Обход через os.scandir: файлы отдаются сразу, как найдены, а размер и mtime
+# берутся из уже полученного DirEntry.stat() без лишнего os.path.getsize.
+# Корневых папок может быть несколько (разные тома), а один логический анализ можно
+# разделить на N частей (shard): файл попадает в часть по хэшу пути относительно своей
+# корневой папки, поэтому разбиение одинаково на любой машине, где бы ни был смонтирован том.
+
+QUEUE_SIZE = 10000
+_DONE = object()
+
+
+def as_roots(root):
+    # Одна корневая папка (строка) или несколько
+    return [root] if isinstance(root, str) else list(root)
+
+
+def shard_of(relpath, count):
+    # Номер части 0..count-1 для пути относительно корня (разделители приводятся к '/')
+    return zlib.crc32(relpath.replace('\\', '/').encode('utf-8', 'surrogatepass')) % count
+
+
+def parse_shard(text):
+    # 'K/N' -> (K, N), 0 <= K < N (ValueError, если не так)
+    index, count = (int(part) for part in text.split('/'))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Часть {text}: нужно K/N, 0 <= K < N")
+    return index, count
+
+
+def iter_images(root, target_exts, recursive=True, stats=NULL_STATS, shard=None):
+    # Генератор записей (путь, размер, mtime_ns); shard - (K, N): только файлы части K из N
+    # (чужие файлы отсеиваются по имени, без stat)
+    prefix = len(os.path.join(root, ''))
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            it = os.scandir(folder)
+        except OSError as e:
+            # Недоступную корневую папку сообщаем, вложенные пропускаем (как os.walk)
+            if folder == root: raise
+            stats.error("scan", e, folder)
+            continue
+        stats.add("dirs_scanned")
+        subdirs = []
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive: subdirs.append(entry.path)
+                        continue
+                    if not entry.name.lower().endswith(target_exts):
+                        continue
+                    if shard and shard_of(entry.path[prefix:], shard[1]) != shard[0]:
+                        continue
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError as e:
+                    stats.error("scan", e, entry.path)
+                    continue
+                stats.add("files_scanned")
+                yield entry.path, st.st_size, st.st_mtime_ns
+        # Обходим подпапки в алфавитном порядке, как os.walk
+        stack.extend(reversed(sorted(subdirs)))
+
+
+class Scanner:
+    # Обход папки в отдельном потоке с ограниченной очередью:
+    # поиск файлов идет параллельно с разбором, а память не растет на миллионах файлов.
+    def __init__(self, root, target_exts, recursive=True, maxsize=QUEUE_SIZE, stats=None, shard=None):
+        # root - папка или список папок (обходятся по очереди)
+        self.root = root
+        self.target_exts = target_exts
+        self.recursive = recursive
+        self.stats = stats or NULL_STATS
+        self.shard = shard
+        self.found = 0
+        self.finished = False
+        self.error = None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            for root in as_roots(self.root):
+                for entry in iter_images(root, self.target_exts, self.recursive, self.stats, self.shard):
+                    self.found += 1
+                    if not self._put(entry):
+                        return
+        except Exception as e:
+            self.error = e
+            self.stats.error("scan", e, self.root)
+        finally:
+            # Время обхода включает ожидание, когда очередь полна (разбор не успевает)
+            self.stats.add_time("scan", time.perf_counter() - started)
+            self.finished = True
+            self._put(_DONE)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self.stop()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,223 @@
+import argparse
+import glob
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+
+from core import PhotoRecord, format_record
+from exporters import WRITE_BUFFER, export_columnar, export_html, write_csv, write_jsonl
+
+# РАСПРЕДЕЛЕННЫЙ АНАЛИЗ: ЧАСТИЧНЫЕ ФАЙЛЫ РЕЗУЛЬТАТОВ И ИХ СЛИЯНИЕ
+# Один логический анализ делится на N частей (cli.py --shard K/N, см. scanner.shard_of):
+# части запускаются отдельными процессами или на разных машинах, каждая пишет свой
+# самодостаточный файл результатов (--partial FILE): SQLite с записями и описанием прогона
+# (корневые папки, форматы, колонки тегов, номер части, машина, завершен ли прогон).
+# Слияние собирает части в один файл; одинаковые пути (пересекающиеся папки, повторный
+# прогон части) остаются в одном экземпляре - из части, завершенной позже.
+#   python -m shards merge part_*.sqlite -o archive.sqlite
+#   python -m shards export archive.sqlite -f parquet -o archive.parquet
+
+COMMIT_EVERY = 1000
+EXPORT_FORMATS = ('csv', 'html', 'jsonl', 'parquet', 'arrow')
+
+
+class ResultFile:
+    def __init__(self, path, create=False):
+        # create=True - новый файл (прежнее содержимое удаляется)
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        if create:
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute("DROP TABLE IF EXISTS meta")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS files (
+                                 path TEXT PRIMARY KEY,
+                                 data TEXT NOT NULL,
+                                 duplicate_of TEXT
+                             ) WITHOUT ROWID""")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.commit()
+        self._pending = []
+
+    # ОПИСАНИЕ ПРОГОНА
+    def set_meta(self, **meta):
+        self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              [(k, json.dumps(v, ensure_ascii=False)) for k, v in meta.items()])
+        self.conn.commit()
+
+    @property
+    def meta(self):
+        return {k: json.loads(v) for k, v in self.conn.execute("SELECT key, value FROM meta")}
+
+    # ЗАПИСИ
+    def put(self, rec, duplicate_of=None):
+        self._pending.append((rec.path, json.dumps(rec, ensure_ascii=False), duplicate_of or None))
+        if len(self._pending) >= COMMIT_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.conn.executemany("INSERT OR REPLACE INTO files (path, data, duplicate_of) VALUES (?, ?, ?)",
+                                  self._pending)
+            self.conn.commit()
+            self._pending = []
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def records(self):
+        # PhotoRecord по порядку путей
+        for (data,) in self.conn.execute("SELECT data FROM files ORDER BY path"):
+            yield PhotoRecord(*json.loads(data))
+
+    def duplicates(self):
+        # копия -> оригинал (dedup.py)
+        return dict(self.conn.execute("SELECT path, duplicate_of FROM files WHERE duplicate_of IS NOT NULL"))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_partial(path, records, roots, target_exts, recursive, tags=None, shard=None, duplicates=None):
+    # Результаты одной части в файл; complete=True пишется только после последней записи
+    with ResultFile(path, create=True) as out:
+        out.set_meta(roots=[os.path.abspath(r) for r in roots], exts=list(target_exts), recursive=recursive,
+                     tags=tags, shard=list(shard) if shard else None, host=socket.gethostname(),
+                     dedup=duplicates is not None, started=time.time(), complete=False)
+        count = 0
+        for rec in records:
+            out.put(rec, duplicates.get(rec.path) if duplicates else None)
+            count += 1
+        out.flush()
+        out.set_meta(finished=time.time(), count=count, complete=True)
+    return count
+
+
+# СЛИЯНИЕ
+def check_parts(metas, log=print):
+    # Предупреждения о наборе частей: незавершенные, разные параметры, пропущенные номера.
+    # Возвращает True, если набор полный
+    ok = True
+    for path, meta in metas:
+        if not meta.get("complete"):
+            log(f"Часть не завершена: {path}")
+            ok = False
+    params = {(tuple(m.get("exts") or ()), m.get("recursive"), tuple(m.get("tags") or ())) for _, m in metas}
+    if len(params) > 1:
+        log("Части собраны с разными параметрами (форматы, рекурсия или колонки тегов)")
+    shards = [tuple(m["shard"]) for _, m in metas if m.get("shard")]
+    for count in sorted({n for _, n in shards}):
+        missing = sorted(set(range(count)) - {k for k, n in shards if n == count})
+        if missing:
+            log(f"Нет частей {', '.join(f'{k}/{count}' for k in missing)}")
+            ok = False
+    return ok
+
+
+def merge(paths, out_path, log=print):
+    # Части -> один файл результатов. Части добавляются в порядке завершения:
+    # при повторе пути остается запись из более поздней. Возвращает (записей, повторов)
+    parts = []
+    for path in paths:
+        with ResultFile(path) as part:
+            parts.append((path, part.meta, len(part)))
+    complete = check_parts([(p, m) for p, m, _ in parts], log)
+    parts.sort(key=lambda item: item[1].get("finished") or 0)
+
+    with ResultFile(out_path, create=True) as out:
+        for path, meta, count in parts:
+            out.conn.execute("ATTACH DATABASE ? AS part", (path,))
+            out.conn.execute("INSERT OR REPLACE INTO files (path, data, duplicate_of) "
+                             "SELECT path, data, duplicate_of FROM part.files")
+            out.conn.commit()
+            out.conn.execute("DETACH DATABASE part")
+            log(f"{path}: {count} записей")
+        total = len(out)
+        roots = sorted({r for _, m, _ in parts for r in m.get("roots") or ()})
+        tags = [t for _, m, _ in parts for t in (m.get("tags") or ())]
+        out.set_meta(roots=roots, exts=sorted({e for _, m, _ in parts for e in m.get("exts") or ()}),
+                     tags=list(dict.fromkeys(tags)) or None, parts=[os.path.abspath(p) for p, _, _ in parts],
+                     hosts=sorted({m.get("host", "") for _, m, _ in parts}),
+                     dedup=any(m.get("dedup") for _, m, _ in parts), finished=time.time(),
+                     count=total, complete=complete)
+    return total, sum(count for _, _, count in parts) - total
+
+
+def export(path, fmt, output):
+    # Файл результатов (часть или слияние) -> отчет в одном из форматов cli.py
+    with ResultFile(path) as src:
+        duplicates = src.duplicates()
+        total = len(src)
+        if fmt == "csv":
+            rows = (dict(format_record(rec), duplicate_of=duplicates.get(rec.path, "")) for rec in src.records())
+            with open(output, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+                write_csv(rows, f, duplicates=bool(src.meta.get("dedup")))
+        elif fmt == "html":
+            rows = (dict(format_record(rec), duplicate_of=duplicates.get(rec.path, "")) for rec in src.records())
+            export_html(rows, output, total)
+        elif fmt == "jsonl":
+            with open(output, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+                write_jsonl(src.records(), f, duplicates)
+        else:
+            # Колонки тегов - все, что встречаются в записях (схема нужна заранее: один проход по details)
+            keys = {}
+            for rec in src.records():
+                keys.update(dict.fromkeys(rec.details))
+            export_columnar(src.records(), output, list(keys), duplicates, fmt=fmt)
+    return total
+
+
+def expand(patterns):
+    # Шаблоны вида part_*.sqlite разворачиваются сами (cmd.exe этого не делает)
+    paths = []
+    for pattern in patterns:
+        found = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(found)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m shards",
+                                     description="Слияние частичных файлов результатов (cli.py --partial)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p_merge = commands.add_parser("merge", help="собрать части в один файл результатов")
+    p_merge.add_argument("parts", nargs="+", help="файлы частей (можно шаблон: part_*.sqlite)")
+    p_merge.add_argument("-o", "--output", required=True, help="файл результатов слияния")
+    p_export = commands.add_parser("export", help="выгрузить файл результатов в отчет")
+    p_export.add_argument("source", help="файл результатов (часть или слияние)")
+    p_export.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="csv", help="формат отчета")
+    p_export.add_argument("-o", "--output", required=True, help="файл отчета")
+    args = parser.parse_args(argv)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    try:
+        if args.command == "merge":
+            parts = expand(args.parts)
+            if os.path.abspath(args.output) in {os.path.abspath(p) for p in parts}:
+                parser.error("файл слияния не может быть одной из частей")
+            total, repeated = merge(parts, args.output, log)
+            log(f"Записей: {total}, повторяющихся путей убрано: {repeated}. Сохранено: {args.output}")
+        else:
+            total = export(args.source, args.format, args.output)
+            log(f"Записей: {total}. Отчет сохранен: {args.output}")
+    except (OSError, sqlite3.Error, ImportError) as e:
+        log(f"Ошибка: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+from startup import optional
+
+# ПРОСТРАНСТВЕННЫЙ ИНДЕКС ПО GPS
+# Сетка из ячеек CELL_DEG x CELL_DEG градусов: точки отсортированы по ключу ячейки
+# (строка сетки * COLUMNS + столбец), поэтому одна строка сетки в пределах
+# прямоугольника - один непрерывный отрезок, который находится двоичным поиском.
+# Точная проверка (границы прямоугольника, расстояние по гаверсинусу) идет только
+# по кандидатам из этих отрезков. С NumPy проверка векторная, без него - обычным циклом.
+
+CELL_DEG = 0.05                 # ~5.5 км по широте
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+COLUMNS = int(math.ceil(360 / CELL_DEG)) + 1
+
+
+def _cell_row(lat, cell):
+    return int(math.floor((lat + 90) / cell))
+
+
+def _cell_col(lon, cell):
+    return int(math.floor((lon + 180) / cell))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    def __init__(self, lats, lons, cell=CELL_DEG):
+        # lats/lons - колонки ResultStore (NaN - нет координат); в индексе хранятся номера строк
+        # NumPy (если есть) запоминается: запросы идут по массивам того же типа, что и при построении
+        np = self._np = optional("numpy")
+        self.cell = cell
+        if np is not None:
+            lat = np.asarray(lats, dtype=np.float64)
+            lon = np.asarray(lons, dtype=np.float64)
+            rows = np.flatnonzero(~np.isnan(lat))
+            lat, lon = lat[rows], lon[rows]
+            keys = (np.floor((lat + 90) / cell).astype(np.int64) * COLUMNS +
+                    np.floor((lon + 180) / cell).astype(np.int64))
+            order = np.argsort(keys, kind="stable")
+            self.keys, self.rows = keys[order], rows[order]
+            self.lats, self.lons = lat[order], lon[order]
+        else:
+            points = sorted((_cell_row(la, cell) * COLUMNS + _cell_col(lo, cell), i, la, lo)
+                            for i, (la, lo) in enumerate(zip(lats, lons)) if not math.isnan(la))
+            self.keys = array('q', (p[0] for p in points))
+            self.rows = array('q', (p[1] for p in points))
+            self.lats = array('d', (p[2] for p in points))
+            self.lons = array('d', (p[3] for p in points))
+
+    @classmethod
+    def from_store(cls, store, cell=CELL_DEG):
+        return cls(store.lats, store.lons, cell)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ЗАПРОСЫ
+    def bbox(self, south, west, north, east):
+        # Номера строк внутри прямоугольника; west > east - прямоугольник через 180-й меридиан
+        np = self._np
+        if west > east:
+            return sorted(self.bbox(south, west, north, 180.0) + self.bbox(south, -180.0, north, east))
+        spans = self._spans(south, west, north, east)
+        if np is not None:
+            idx = self._gather(spans)
+            la, lo = self.lats[idx], self.lons[idx]
+            hit = (la >= south) & (la <= north) & (lo >= west) & (lo <= east)
+            return np.sort(self.rows[idx[hit]]).tolist()
+        found = []
+        for start, end in spans:
+            for i in range(start, end):
+                if south <= self.lats[i] <= north and west <= self.lons[i] <= east:
+                    found.append(self.rows[i])
+        return sorted(found)
+
+    def within(self, lat, lon, radius_km):
+        # Строки не дальше radius_km от точки: список (номер строки, расстояние в км), ближние первыми
+        np = self._np
+        dlat = radius_km / KM_PER_DEG
+        south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+        if north >= 90 or south <= -90 or cos_lat * 180 <= dlat:
+            boxes = [(-180.0, 180.0)]      # у полюса подходит любая долгота
+        else:
+            dlon = dlat / cos_lat
+            west, east = lon - dlon, lon + dlon
+            if west < -180:
+                boxes = [(west + 360, 180.0), (-180.0, east)]
+            elif east > 180:
+                boxes = [(west, 180.0), (-180.0, east - 360)]
+            else:
+                boxes = [(west, east)]
+        spans = []
+        for west, east in boxes:
+            spans.extend(self._spans(south, west, north, east))
+
+        if np is not None:
+            idx = self._gather(spans)
+            p1, p2 = math.radians(lat), np.radians(self.lats[idx])
+            dl = np.radians(self.lons[idx] - lon)
+            a = np.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+            dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            hit = dist <= radius_km
+            rows, dist = self.rows[idx[hit]], dist[hit]
+            order = np.argsort(dist, kind="stable")
+            return list(zip(rows[order].tolist(), dist[order].tolist()))
+        found = []
+        for start, end in spans:
+            for i in range(start, end):
+                d = haversine_km(lat, lon, self.lats[i], self.lons[i])
+                if d <= radius_km:
+                    found.append((self.rows[i], d))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def _spans(self, south, west, north, east):
+        # Отрезки [start, end) отсортированного массива для каждой строки сетки прямоугольника
+        np = self._np
+        cell = self.cell
+        row0, row1 = _cell_row(max(-90.0, south), cell), _cell_row(min(90.0, north), cell)
+        col0, col1 = _cell_col(max(-180.0, west), cell), _cell_col(min(180.0, east), cell)
+        spans = []
+        for row in range(row0, row1 + 1):
+            lo, hi = row * COLUMNS + col0, row * COLUMNS + col1
+            if np is not None:
+                start = int(np.searchsorted(self.keys, lo, "left"))
+                end = int(np.searchsorted(self.keys, hi, "right"))
+            else:
+                start = bisect_left(self.keys, lo)
+                end = bisect_right(self.keys, hi)
+            if start < end:
+                spans.append((start, end))
+        return spans
+
+    def _gather(self, spans):
+        np = self._np
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in spans])
+
+
+def parse_point(text):
+    # "55.75, 37.62" -> (55.75, 37.62)
+    lat, lon = (float(part) for part in text.replace(';', ',').split(','))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Координаты вне диапазона: {text}")
+    return lat, lon
@@ -0,0 +1,117 @@
+import importlib
+import os
+import sys
+import time
+
+# ОТЛОЖЕННЫЕ ИМПОРТЫ И ВРЕМЯ ЗАПУСКА
+# Тяжелые модули загружаются при первом использовании: воркеру пула нужен только разбор (core),
+# консольному режиму - не нужны окно и Pillow, NumPy - только на больших пачках и индексах,
+# exifread - только когда быстрый путь не справился.
+# python main.py --startup-profile [FILE] - замер запуска (JSON):
+# - импорт каждой точки входа в чистом интерпретаторе: время, самые дорогие модули
+#   (python -X importtime) и какие тяжелые модули оказались загружены;
+# - запуск процесса пула до первого результата (так платит каждый воркер);
+# - построение окна в текущем процессе (если есть дисплей).
+# Модуль импортируется из core (ради optional), поэтому все, что нужно только замеру, - внутри функций.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("numpy", "exifread", "PIL", "tkinter", "pyarrow", "asyncio", "sqlite3")
+# Точка входа -> модуль: воркер пула импортирует только core
+ENTRY_POINTS = {"worker": "core", "cli": "cli", "window": "app"}
+TOP_MODULES = 10
+
+_optional = {}
+
+
+def optional(name):
+    # Необязательный модуль (NumPy, pillow_heif) при первом обращении; None - не установлен
+    if name not in _optional:
+        try:
+            _optional[name] = importlib.import_module(name)
+        except ImportError:
+            _optional[name] = None
+    return _optional[name]
+
+
+def loaded_heavy():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def _python(*args):
+    import subprocess
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=HERE)
+
+
+def measure_import(module, top=TOP_MODULES):
+    # Импорт модуля в чистом интерпретаторе (кэш ОС прогрет первым запуском)
+    import json
+    code = (f"import time; t = time.perf_counter(); import {module}; t = time.perf_counter() - t; "
+            f"import startup, json; print(json.dumps([t, startup.loaded_heavy()]))")
+    _python("-c", code)
+    started = time.perf_counter()
+    proc = _python("-c", code)
+    process_s = time.perf_counter() - started
+    if proc.returncode != 0:
+        return {"module": module, "error": proc.stderr.strip().splitlines()[-1:]}
+    import_s, heavy = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Разбивка по модулям: "import time: self [us] | cumulative | имя"
+    times = []
+    for line in _python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and line.startswith("import time:") and parts[1].strip().isdigit():
+            self_us = int(parts[0].split(":")[1])
+            times.append((parts[2].strip(), self_us / 1000, int(parts[1]) / 1000))
+    times.sort(key=lambda item: -item[1])
+    return {"module": module, "import_ms": round(import_s * 1000, 1), "process_ms": round(process_s * 1000, 1),
+            "heavy_loaded": heavy, "modules": len(times),
+            "top_self_ms": [[name, round(s, 1), round(c, 1)] for name, s, c in times[:top]]}
+
+
+def _worker_probe():
+    # Выполняется в процессе пула: что успело загрузиться до первой пачки
+    from core import process_batch
+    process_batch([])
+    return loaded_heavy()
+
+
+def measure_worker(method=None):
+    # Старт одного процесса пула и первый результат; spawn - как на Windows (модуль __main__
+    # и core импортируются заново в каждом воркере)
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    method = method or multiprocessing.get_start_method()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context(method)) as pool:
+        heavy = pool.submit(_worker_probe).result()
+        first_s = time.perf_counter() - started
+    return {"start_method": method, "first_result_ms": round(first_s * 1000, 1), "heavy_loaded": heavy}
+
+
+def startup_report(window=None):
+    # window() - построить и закрыть окно в текущем процессе (main.py); None - без этого замера
+    import multiprocessing
+    report = {"python": sys.version.split()[0],
+              "imports": {entry: measure_import(module) for entry, module in ENTRY_POINTS.items()},
+              "workers": [measure_worker()]}
+    if multiprocessing.get_start_method() != "spawn":
+        report["workers"].append(measure_worker("spawn"))
+    if window is not None:
+        started = time.perf_counter()
+        try:
+            window()
+            report["window_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            report["window_error"] = str(e) or type(e).__name__
+        report["window_heavy_loaded"] = loaded_heavy()
+    return report
+
+
+def write_report(report, path=None):
+    import json
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
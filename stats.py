@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# СТАТИСТИКА ПРОГОНА
+# Счетчики (файлы, байты, попадания в кэш), суммарное время по этапам, максимумы
+# (глубина очередей) и ошибки по типам. Воркеры пула собирают свою RunStats и
+# отдают snapshot() вместе с результатами пачки, родитель делает merge().
+# NULL_STATS - заглушка с тем же интерфейсом: код этапов не проверяет "включена ли статистика".
+
+MAX_ERROR_SAMPLES = 20
+
+
+class RunStats:
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self.gauges = {}        # имя -> максимальное значение
+        self.errors = {}        # "этап: Тип" -> число
+        self.error_samples = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def gauge(self, name, value):
+        with self._lock:
+            if value > self.gauges.get(name, value - 1):
+                self.gauges[name] = value
+
+    def error(self, stage, exc, path=None):
+        key = f"{stage}: {type(exc).__name__}"
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            if len(self.error_samples) < MAX_ERROR_SAMPLES:
+                self.error_samples.append({"stage": stage, "type": type(exc).__name__,
+                                           "message": str(exc), "path": path})
+
+    def merge(self, data):
+        # data - snapshot() другой RunStats (например, воркера пула)
+        for name, n in data.get("counters", {}).items():
+            self.add(name, n)
+        for name, seconds in data.get("timers_s", {}).items():
+            self.add_time(name, seconds)
+        for name, value in data.get("gauges", {}).items():
+            self.gauge(name, value)
+        with self._lock:
+            for key, n in data.get("errors", {}).items():
+                self.errors[key] = self.errors.get(key, 0) + n
+            room = MAX_ERROR_SAMPLES - len(self.error_samples)
+            self.error_samples.extend(data.get("error_samples", [])[:max(0, room)])
+
+    def snapshot(self):
+        with self._lock:
+            return {"elapsed_s": round(time.time() - self.started, 3),
+                    "counters": dict(self.counters),
+                    "timers_s": {k: round(v, 4) for k, v in self.timers.items()},
+                    "gauges": dict(self.gauges),
+                    "errors": dict(self.errors),
+                    "error_samples": list(self.error_samples)}
+
+    def summary(self):
+        # Одна строка для строки состояния окна / stderr
+        c = self.counters
+        mb = c.get("bytes_read", 0) / 2 ** 20
+        parts = [f"файлов: {c.get('files_scanned', 0)}",
+                 f"разобрано: {c.get('files_parsed', 0)}",
+                 f"из кэша: {c.get('cache_hits', 0)}",
+                 f"прочитано: {mb:.1f} МБ",
+                 f"ошибок: {sum(self.errors.values())}"]
+        if "scan_queue" in self.gauges:
+            parts.append(f"очередь: {self.gauges['scan_queue']}")
+        return ", ".join(parts)
+
+    def format(self):
+        # Подробный текст для окна статистики
+        data = self.snapshot()
+        lines = [f"Время прогона: {data['elapsed_s']:.2f} с", "", "[СЧЕТЧИКИ]"]
+        lines += [f"{k}: {v}" for k, v in sorted(data["counters"].items())]
+        lines += ["", "[ВРЕМЯ ПО ЭТАПАМ, с] (у пула - сумма по всем процессам)"]
+        lines += [f"{k}: {v:.3f}" for k, v in sorted(data["timers_s"].items(), key=lambda kv: -kv[1])]
+        if data["gauges"]:
+            lines += ["", "[МАКСИМУМЫ]"] + [f"{k}: {v}" for k, v in sorted(data["gauges"].items())]
+        lines += ["", "[ОШИБКИ]"]
+        lines += [f"{k}: {v}" for k, v in sorted(data["errors"].items())] or ["нет"]
+        for sample in data["error_samples"]:
+            lines.append(f"  {sample['stage']}: {sample['type']}: {sample['message']} ({sample['path']})")
+        return "\n".join(lines)
+
+    def save_json(self, path, extra=None):
+        data = self.snapshot()
+        if extra: data.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class _NullStats:
+    def add(self, name, n=1): pass
+    def add_time(self, name, seconds): pass
+    def timer(self, name): return nullcontext()
+    def gauge(self, name, value): pass
+    def error(self, stage, exc, path=None): pass
+    def merge(self, data): pass
+
+
+NULL_STATS = _NullStats()
+
+
+def profile_call(path, func, *args):
+    # cProfile вызова func (в текущем потоке; воркеры пула не профилируются).
+    # Профиль сохраняется в path (смотреть: python -m pstats path), возвращается (результат, топ функций)
+    import cProfile
+    import io
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args)
+    finally:
+        profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+    return result, out.getvalue()
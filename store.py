@@ -0,0 +1,185 @@
+import math
+import sys
+from array import array
+
+from core import PhotoRecord, format_record
+
+# КОЛОНОЧНОЕ ХРАНИЛИЩЕ РЕЗУЛЬТАТОВ
+# Вместо списка словарей - массивы по колонкам с "сырыми" значениями:
+# размер (int64), дата (секунды, int64), широта/долгота (float64 - те же цифры, что и при потоковой записи), камера и
+# значения details - коды в таблицах интернированных строк (uint32).
+# Строка для таблицы/отчета собирается только при обращении store[i].
+
+NO_DATE = -(2 ** 63)
+NAN = float('nan')
+
+
+class StringTable:
+    # Интернирование строк: одинаковые значения хранятся один раз, в колонке - код.
+    # Код 0 зарезервирован под "нет значения".
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values = [None]
+        self._codes = {}
+
+    def code(self, value):
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(sys.intern(value))
+        return code
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values) - 1
+
+
+class ResultStore:
+    __slots__ = ("paths", "sizes", "dates", "lats", "lons", "cameras", "camera_codes",
+                 "strings", "details", "raw_dates", "duplicates", "_index")
+
+    def __init__(self):
+        self.paths = []
+        self.sizes = array('q')
+        self.dates = array('q')
+        self.lats = array('d')
+        self.lons = array('d')
+        self.cameras = StringTable()
+        self.camera_codes = array('I')
+        self.strings = StringTable()
+        self.details = {}       # тег -> array('I') кодов в self.strings
+        self.raw_dates = {}     # индекс -> исходная строка даты, которую не удалось разобрать
+        self.duplicates = {}    # путь копии -> путь оригинала с тем же содержимым (dedup.py)
+        self._index = None      # путь -> индекс; строится только при первом index_of
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        # Отформатированная строка (словарь), как раньше в found_data
+        item = format_record(self.record(index))
+        item['duplicate_of'] = self.duplicates.get(self.paths[index], "")
+        return item
+
+    def __iter__(self):
+        for index in range(len(self.paths)):
+            yield self[index]
+
+    def append(self, rec):
+        index = len(self.paths)
+        self.paths.append(rec.path)
+        if self._index is not None:
+            self._index[rec.path] = index
+        self.sizes.append(rec.size)
+        self.dates.append(NO_DATE if rec.date is None else rec.date)
+        if rec.date_raw is not None:
+            self.raw_dates[index] = rec.date_raw
+        self.lats.append(NAN if rec.lat is None else rec.lat)
+        self.lons.append(NAN if rec.lon is None else rec.lon)
+        self.camera_codes.append(self.cameras.code(rec.camera or None))
+
+        for key, value in rec.details.items():
+            column = self.details.get(key)
+            if column is None:
+                # Новый тег: колонка заполняется "нет значения" для уже добавленных строк
+                column = self.details[key] = array('I', bytes(4 * index))
+            column.append(self.strings.code(value))
+        for key, column in self.details.items():
+            if len(column) == index:
+                column.append(0)
+
+    # ОБНОВЛЕНИЕ НА МЕСТЕ (режим наблюдения за папкой)
+    def index_of(self, path):
+        if self._index is None:
+            self._index = {p: i for i, p in enumerate(self.paths)}
+        return self._index.get(path)
+
+    def set(self, index, rec):
+        if self._index is not None and self.paths[index] != rec.path:
+            self._index.pop(self.paths[index], None)
+            self._index[rec.path] = index
+        self.paths[index] = rec.path
+        self.sizes[index] = rec.size
+        self.dates[index] = NO_DATE if rec.date is None else rec.date
+        if rec.date_raw is not None:
+            self.raw_dates[index] = rec.date_raw
+        else:
+            self.raw_dates.pop(index, None)
+        self.lats[index] = NAN if rec.lat is None else rec.lat
+        self.lons[index] = NAN if rec.lon is None else rec.lon
+        self.camera_codes[index] = self.cameras.code(rec.camera or None)
+
+        count = len(self.paths)
+        for key in rec.details:
+            if key not in self.details:
+                self.details[key] = array('I', bytes(4 * count))
+        for key, column in self.details.items():
+            column[index] = self.strings.code(rec.details.get(key))
+
+    def upsert(self, rec):
+        # Новый файл добавляется в конец, измененный обновляется на своем месте
+        index = self.index_of(rec.path)
+        if index is None:
+            self.append(rec)
+            return len(self.paths) - 1
+        self.set(index, rec)
+        return index
+
+    def remove(self, index):
+        # Удаление за O(1): на место удаленной строки переносится последняя
+        last = len(self.paths) - 1
+        path = self.paths[index]
+        if index != last:
+            self.set(index, self.record(last))
+        self.paths.pop()
+        self.sizes.pop()
+        self.dates.pop()
+        self.lats.pop()
+        self.lons.pop()
+        self.camera_codes.pop()
+        for column in self.details.values():
+            column.pop()
+        self.raw_dates.pop(last, None)
+        if self._index is not None:
+            self._index.pop(path, None)
+            if index != last:
+                self._index[self.paths[index]] = index
+
+    def remove_path(self, path):
+        index = self.index_of(path)
+        if index is not None:
+            self.remove(index)
+        self.duplicates.pop(path, None)
+        return index
+
+    def extend(self, records):
+        for rec in records:
+            self.append(rec)
+
+    def record(self, index):
+        date = self.dates[index]
+        lat = self.lats[index]
+        has_gps = not math.isnan(lat)
+        details = {}
+        for key, column in self.details.items():
+            code = column[index]
+            if code: details[key] = self.strings[code]
+        return PhotoRecord(
+            self.paths[index],
+            self.sizes[index],
+            None if date == NO_DATE else date,
+            self.raw_dates.get(index),
+            lat if has_gps else None,
+            self.lons[index] if has_gps else None,
+            self.cameras[self.camera_codes[index]] or '',
+            details,
+        )
+
+    def clear(self):
+        self.__init__()
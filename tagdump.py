@@ -0,0 +1,133 @@
+import os
+import re
+import queue
+import threading
+from collections import OrderedDict
+
+# ПОЛНЫЙ НАБОР ТЕГОВ ОДНОГО ФАЙЛА (боковая панель)
+# При анализе читаются только выбранные колонки (core.TAG_COLUMNS), а все остальное -
+# MakerNote, объектив, XMP - разбирается только для выбранного в таблице файла и только
+# по запросу. Готовые наборы хранятся в LRU: повторный выбор той же строки файл не читает.
+
+CACHE_ITEMS = 256
+# XMP ищется в начале файла (в JPEG пакет XMP - сегмент APP1 рядом с EXIF)
+XMP_WINDOW = 1024 * 1024
+MAX_VALUE_CHARS = 300
+
+# Бинарные и служебные теги: в тексте панели от них пользы нет
+_SKIP = ('JPEGThumbnail', 'TIFFThumbnail', 'Filename', 'EXIF MakerNote', 'Image ApplicationNotes')
+_XMP_NAME = r'[A-Za-z][\w.-]*:[A-Za-z][\w.-]*'
+_XMP_ATTR = re.compile(rf'\s({_XMP_NAME})="([^"]*)"')
+_XMP_TEXT = re.compile(rf'<({_XMP_NAME})>([^<]+)</\1>')
+_XMP_LIST = re.compile(rf'<({_XMP_NAME})>\s*<rdf:(?:Alt|Seq|Bag)>(.*?)</rdf:(?:Alt|Seq|Bag)>', re.S)
+_XMP_ITEM = re.compile(r'<rdf:li[^>]*>([^<]*)</rdf:li>')
+
+
+def _short(text):
+    text = " ".join(str(text).split())
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + "..."
+
+
+def xmp_properties(data):
+    # Свойства пакета XMP: {"XMP префикс:имя": значение}; списки (rdf:Alt/Seq/Bag) - через "; "
+    start = data.find(b'<x:xmpmeta')
+    if start < 0:
+        return {}
+    end = data.find(b'</x:xmpmeta>', start)
+    text = data[start:end if end > 0 else len(data)].decode('utf-8', 'replace')
+    props = {}
+    for name, value in _XMP_ATTR.findall(text):
+        if not name.startswith(('xmlns:', 'xml:', 'x:', 'rdf:')) and value.strip():
+            props[f"XMP {name}"] = _short(value)
+    for name, value in _XMP_TEXT.findall(text):
+        if not name.startswith('rdf:') and value.strip():
+            props[f"XMP {name}"] = _short(value)
+    for name, items in _XMP_LIST.findall(text):
+        values = [v.strip() for v in _XMP_ITEM.findall(items) if v.strip()]
+        if values:
+            props[f"XMP {name}"] = _short("; ".join(values))
+    return props
+
+
+def full_tags(path):
+    # Все теги файла: EXIF вместе с MakerNote (exifread), затем XMP
+    import exifread
+    with open(path, 'rb') as f:
+        tags = exifread.process_file(f, details=True, extract_thumbnail=False)
+        f.seek(0)
+        head = f.read(XMP_WINDOW)
+    dump = {name: _short(tag.printable) for name, tag in sorted(tags.items())
+            if name not in _SKIP and hasattr(tag, 'printable')}
+    dump.update(xmp_properties(head))
+    return dump
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class TagDumpLoader:
+    # request(path) - разобрать файл в фоне; poll() - забрать готовые (path, теги или None, ошибка)
+    # в главном потоке. get(path) - набор из LRU, если файл с тех пор не менялся.
+    def __init__(self, max_items=CACHE_ITEMS):
+        self.max_items = max_items
+        self._items = OrderedDict()     # путь -> ((размер, mtime_ns), теги)
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._done = queue.Queue()
+        self._wanted = None
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def get(self, path):
+        with self._lock:
+            item = self._items.get(path)
+        if item is None or item[0] != _stamp(path):
+            return None
+        with self._lock:
+            if path in self._items: self._items.move_to_end(path)
+        return item[1]
+
+    def request(self, path):
+        # Нужен только последний запрос: пользователь мог уже перейти к другой строке
+        self._wanted = path
+        self._requests.put(path)
+
+    def poll(self):
+        ready = []
+        try:
+            while True:
+                ready.append(self._done.get_nowait())
+        except queue.Empty:
+            pass
+        return ready
+
+    def _put(self, path, stamp, tags):
+        with self._lock:
+            self._items.pop(path, None)
+            self._items[path] = (stamp, tags)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _work(self):
+        while True:
+            path = self._requests.get()
+            if path != self._wanted:
+                continue
+            tags = self.get(path)
+            error = None
+            if tags is None:
+                stamp = _stamp(path)
+                try:
+                    tags = full_tags(path)
+                    self._put(path, stamp, tags)
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+            self._done.put((path, tags, error))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,31 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench import generate_corpus, run_benchmark
+
+
+# Чтение воркеров пула засчитывается процессу, когда они завершены: этап engine должен
+# дождаться их сам, иначе их байты попадают в mb_read следующего этапа
+@unittest.skipUnless(os.path.exists("/proc/self/io"), "нужен /proc/self/io (Linux)")
+class StageReadTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="exif-bench-test-")
+        generate_corpus(self.root, 40, size=(64, 48))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_engine_reads_not_counted_in_export(self):
+        report = run_benchmark(self.root, workers=2, stages=("engine", "export"))
+        stages = report["stages"]
+        self.assertGreater(stages["engine"]["mb_read"], 0)
+        self.assertLess(stages["export"]["mb_read"], 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
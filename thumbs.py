@@ -0,0 +1,181 @@
+import io
+import os
+import queue
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+
+import readers
+from startup import optional
+
+# МИНИАТЮРЫ ДЛЯ ПРЕДПРОСМОТРА
+# 1. Встроенная EXIF-миниатюра (читается из заголовка, без декодирования фото).
+# 2. Иначе JPEG декодируется в уменьшенном масштабе (Image.draft), остальные форматы - полностью.
+#    Встроенная миниатюра ищется в EXIF любого формата из readers.py (PNG eXIf, WebP, HEIC).
+# Загрузка идет в фоновых потоках, готовые миниатюры хранятся в LRU с лимитом по памяти
+# и (по желанию) на диске. Соседние строки подгружаются заранее.
+# Pillow загружается при первой миниатюре: окно открывается без него.
+
+THUMB_SIZE = (300, 300)
+MEMORY_BUDGET = 64 * 1024 * 1024
+PREFETCH = 2
+# Совсем крошечные встроенные миниатюры (бывают 68x46) хуже уменьшенного JPEG - их пропускаем
+EMBEDDED_MIN_SIDE = 160
+
+
+def _pil():
+    from PIL import Image, ImageFile
+    if not ImageFile.LOAD_TRUNCATED_IMAGES:
+        # Разрешаем загрузку обрезанных или странных изображений (фикс проблемы с предпросмотром)
+        ImageFile.LOAD_TRUNCATED_IMAGES = True
+        # HEIC открывается для предпросмотра, только если установлен pillow_heif (метаданные читаются и без него)
+        heif = optional("pillow_heif")
+        if heif is not None: heif.register_heif_opener()
+    return Image
+
+
+def load_thumbnail(path, size=THUMB_SIZE):
+    Image = _pil()
+    img = _embedded_thumbnail(path)
+    if img is None:
+        with open(path, 'rb') as f:
+            img = Image.open(f)
+            # Для JPEG декодер сразу уменьшает изображение в 2/4/8 раз
+            img.draft('RGB', size)
+            img.load()
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    img.thumbnail(size)
+    return img
+
+
+def _embedded_thumbnail(path):
+    try:
+        data = readers.embedded_thumbnail(path)
+        if data is None:
+            return None
+        img = _pil().open(io.BytesIO(data))
+        if max(img.size) < EMBEDDED_MIN_SIDE:
+            return None
+        img.load()
+        return img
+    except Exception:
+        return None
+
+
+def _image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+class ThumbnailCache:
+    # LRU миниатюр с лимитом по байтам; потокобезопасный
+    def __init__(self, max_bytes=MEMORY_BUDGET):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            img = self._items.get(key)
+            if img is not None:
+                self._items.move_to_end(key)
+            return img
+
+    def put(self, key, img):
+        size = _image_bytes(img)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.used -= _image_bytes(old)
+            self._items[key] = img
+            self.used += size
+            while self.used > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.used -= _image_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.used = 0
+
+
+class ThumbnailLoader:
+    # request(path, neighbours) - поставить в очередь (текущий файл первым);
+    # poll() - забрать готовые (path, image или None) в главном потоке.
+    def __init__(self, size=THUMB_SIZE, max_bytes=MEMORY_BUDGET, disk_dir=None, workers=2):
+        self.size = size
+        self.cache = ThumbnailCache(max_bytes)
+        self.disk_dir = disk_dir
+        self._requests = queue.PriorityQueue()
+        self._done = queue.Queue()
+        self._wanted = set()
+        self._seq = itertools.count()
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def get(self, path):
+        return self.cache.get(path)
+
+    def request(self, path, neighbours=()):
+        # Устаревшие запросы (строки, от которых пользователь уже ушел) пропускаются
+        self._wanted = {path, *neighbours}
+        self._requests.put((0, next(self._seq), path))
+        for distance, other in enumerate(neighbours, 1):
+            self._requests.put((distance, next(self._seq), other))
+
+    def poll(self):
+        ready = []
+        try:
+            while True:
+                ready.append(self._done.get_nowait())
+        except queue.Empty:
+            pass
+        return ready
+
+    def _work(self):
+        while True:
+            priority, _, path = self._requests.get()
+            if path not in self._wanted:
+                continue
+            img = self.cache.get(path)
+            if img is None:
+                img = self._load(path)
+                if img is not None:
+                    self.cache.put(path, img)
+            if priority == 0:
+                self._done.put((path, img))
+
+    def _load(self, path):
+        disk_path = self._disk_path(path)
+        if disk_path and os.path.exists(disk_path):
+            try:
+                with _pil().open(disk_path) as img:
+                    img.load()
+                    return img.copy()
+            except Exception:
+                pass
+        try:
+            img = load_thumbnail(path, self.size)
+        except Exception:
+            return None
+        if disk_path:
+            try:
+                os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+                img.convert('RGB').save(disk_path, 'JPEG', quality=85)
+            except Exception:
+                pass
+        return img
+
+    def _disk_path(self, path):
+        # Имя файла зависит от пути, размера и времени изменения: правка фото дает новую миниатюру
+        if not self.disk_dir:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = f"{path}|{st.st_size}|{st.st_mtime_ns}|{self.size[0]}x{self.size[1]}"
+        digest = hashlib.sha1(key.encode('utf-8', 'surrogatepass')).hexdigest()
+        return os.path.join(self.disk_dir, digest[:2], digest + ".jpg")
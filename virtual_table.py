@@ -0,0 +1,143 @@
+from tkinter import ttk
+
+# ВИРТУАЛЬНАЯ ТАБЛИЦА
+# Treeview держит только видимые строки (несколько десятков), а данные берутся
+# из внешнего хранилища по индексу. Прокрутка, колесо мыши и клавиатура двигают
+# "окно" по индексам, поэтому миллион строк стоит столько же, сколько сотня.
+
+
+class VirtualTable(ttk.Frame):
+    def __init__(self, master, headers, widths, on_select=None, on_heading=None, row_height=25, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+        self.on_heading = on_heading     # клик по заголовку колонки (сортировка), аргумент - имя колонки
+        self.headers = dict(headers)
+        self.row_height = row_height
+        self.row_count = lambda: 0
+        self.get_row = None
+
+        self.top = 0              # индекс первой видимой строки
+        self.visible = 1          # сколько строк помещается в окно
+        self.selected_index = None
+        self._items = []          # переиспользуемые строки Treeview
+
+        columns = tuple(headers)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="none")
+        for i, (col, name) in enumerate(headers.items()):
+            self.tree.heading(col, text=name, command=lambda c=col: self.on_heading and self.on_heading(c))
+            self.tree.column(col, width=widths[i], anchor="w")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="top", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y", in_=self.tree)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self.visible))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self.visible))
+        self.tree.bind("<Home>", lambda e: self._select_index(0))
+        self.tree.bind("<End>", lambda e: self._select_index(self.row_count() - 1))
+
+    def set_source(self, row_count, get_row):
+        # row_count() -> число строк; get_row(i) -> кортеж значений для колонок
+        self.row_count = row_count
+        self.get_row = get_row
+        self.reset()
+
+    def reset(self):
+        self.top = 0
+        self.selected_index = None
+        self.refresh()
+
+    def set_sort(self, column=None, descending=False):
+        # Стрелка в заголовке колонки, по которой отсортирована таблица
+        for col, name in self.headers.items():
+            mark = (" ▼" if descending else " ▲") if col == column else ""
+            self.tree.heading(col, text=name + mark)
+
+    def selection_style(self, background, foreground="#ffffff"):
+        self.tree.tag_configure("selected", background=background, foreground=foreground)
+
+    # ОТРИСОВКА
+    def refresh(self):
+        # Перерисовка видимого окна; вызывать после добавления/изменения данных
+        count = self.row_count()
+        self.top = max(0, min(self.top, count - self.visible))
+        shown = max(0, min(self.visible, count - self.top))
+
+        while len(self._items) < shown:
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > shown:
+            self.tree.delete(self._items.pop())
+
+        for offset, item_id in enumerate(self._items):
+            index = self.top + offset
+            tags = ("selected",) if index == self.selected_index else ()
+            self.tree.item(item_id, values=self.get_row(index), tags=tags)
+
+        if count:
+            self.scrollbar.set(self.top / count, (self.top + shown) / count)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll(self, rows):
+        self.top = max(0, self.top + rows)
+        self.refresh()
+
+    def see(self, index):
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.visible:
+            self.top = index - self.visible + 1
+        self.refresh()
+
+    # СОБЫТИЯ
+    def _on_resize(self, event):
+        # Высота заголовка примерно равна высоте строки
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_scrollbar(self, *args):
+        count = self.row_count()
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * count)
+            self.refresh()
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_click(self, event):
+        # Клики по заголовкам (изменение ширины колонок) отдаем стандартному обработчику
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        self.tree.focus_set()
+        item_id = self.tree.identify_row(event.y)
+        if item_id in self._items:
+            self._select_index(self.top + self._items.index(item_id))
+        return "break"
+
+    def _move_selection(self, step):
+        current = self.selected_index if self.selected_index is not None else self.top - step
+        self._select_index(current + step)
+        return "break"
+
+    def _select_index(self, index):
+        count = self.row_count()
+        if not count:
+            return "break"
+        index = max(0, min(index, count - 1))
+        self.selected_index = index
+        self.see(index)
+        if self.on_select:
+            self.on_select(index)
+        return "break"
@@ -0,0 +1,262 @@
+import os
+import sys
+
+# НАБЛЮДЕНИЕ ЗА ПАПКОЙ
+# После первого анализа отслеживаются только изменения: новые, измененные и удаленные файлы.
+# Linux + установлен inotify_simple - события ядра (inotify), иначе опрос:
+#  - каждый цикл проверяется только mtime папок (появление/удаление файла меняет mtime папки),
+#    заново читаются лишь изменившиеся папки;
+#  - раз в FULL_RESCAN_EVERY циклов читаются все папки (правка файла на месте mtime папки не меняет);
+#  - новый/измененный файл отдается, когда размер и mtime не менялись целый цикл
+#    (файл в папке-приемнике может еще копироваться).
+# Сетевые диски (SMB/NFS) - только опрос: inotify не видит изменений с других машин.
+
+POLL_INTERVAL = 2.0
+FULL_RESCAN_EVERY = 30
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+def _scan_dir(folder, target_exts, recursive):
+    # Одна папка без обхода вглубь: ({путь: (размер, mtime_ns)}, [подпапки])
+    files = {}
+    subdirs = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive: subdirs.append(entry.path)
+                    continue
+                if not entry.name.lower().endswith(target_exts) or not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files[entry.path] = (st.st_size, st.st_mtime_ns)
+    return files, subdirs
+
+
+def create_watcher(root, target_exts, recursive=True, interval=POLL_INTERVAL, polling=False):
+    if not polling and INotify is not None and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, target_exts, recursive)
+        except OSError:
+            # Например, исчерпан лимит fs.inotify.max_user_watches
+            pass
+    return PollingWatcher(root, target_exts, recursive, interval)
+
+
+class PollingWatcher:
+    name = "опрос"
+
+    def __init__(self, root, target_exts, recursive=True, interval=POLL_INTERVAL,
+                 full_every=FULL_RESCAN_EVERY):
+        self.root = root
+        self.target_exts = target_exts
+        self.recursive = recursive
+        self.interval = interval
+        self.full_every = max(1, full_every)
+        self.dirs = {}        # папка -> [mtime_ns, {путь: (размер, mtime_ns)}, [подпапки]]
+        self._settling = {}   # путь -> (папка, размер, mtime_ns): ждут, пока файл перестанет меняться
+        self._polls = 0
+        # Стартовый снимок: эти файлы уже разобраны первым анализом
+        self._add_tree(root, None)
+
+    def changes(self, stop):
+        # Генератор пачек (измененные записи (путь, размер, mtime_ns), удаленные пути)
+        while not stop.wait(self.interval):
+            changed, deleted = self.poll()
+            if changed or deleted:
+                yield changed, deleted
+
+    def poll(self):
+        self._polls += 1
+        full = self._polls % self.full_every == 0
+        changed, deleted = [], []
+        self._check_settling(changed)
+
+        for folder in list(self.dirs):
+            state = self.dirs.get(folder)
+            if state is None:
+                continue  # уже удалена вместе с родительской папкой
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+            except OSError:
+                self._forget(folder, deleted)
+                continue
+            if full or mtime != state[0]:
+                self._rescan(folder, deleted)
+        return changed, deleted
+
+    def close(self):
+        pass
+
+    def _add_tree(self, root, settle):
+        # settle=None - запомнить как уже известные, иначе - как новые (через ожидание)
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+                files, subdirs = _scan_dir(folder, self.target_exts, self.recursive)
+            except OSError:
+                if folder == self.root and settle is None: raise
+                continue
+            if settle is None:
+                self.dirs[folder] = [mtime, files, subdirs]
+            else:
+                self.dirs[folder] = [mtime, {}, subdirs]
+                for path, (size, file_mtime) in files.items():
+                    settle[path] = (folder, size, file_mtime)
+            stack.extend(subdirs)
+
+    def _rescan(self, folder, deleted):
+        state = self.dirs[folder]
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+            files, subdirs = _scan_dir(folder, self.target_exts, self.recursive)
+        except OSError:
+            self._forget(folder, deleted)
+            return
+        known = state[1]
+        for path, value in files.items():
+            pending = self._settling.get(path)
+            if known.get(path) != value and (pending is None or pending[1:] != value):
+                self._settling[path] = (folder, *value)
+        for path in [p for p in known if p not in files]:
+            del known[path]
+            deleted.append(path)
+        for path in [p for p, s in self._settling.items() if s[0] == folder and p not in files]:
+            del self._settling[path]
+
+        old_subdirs = set(state[2])
+        for sub in subdirs:
+            if sub not in old_subdirs:
+                self._add_tree(sub, self._settling)
+        for sub in old_subdirs.difference(subdirs):
+            self._forget(sub, deleted)
+        state[0] = mtime
+        state[2] = subdirs
+
+    def _check_settling(self, changed):
+        for path, (folder, size, mtime) in list(self._settling.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._settling[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != (size, mtime):
+                self._settling[path] = (folder, *current)
+                continue
+            del self._settling[path]
+            state = self.dirs.get(folder)
+            if state is not None:
+                state[1][path] = current
+                changed.append((path, *current))
+
+    def _forget(self, folder, deleted):
+        state = self.dirs.pop(folder, None)
+        if state is None:
+            return
+        deleted.extend(state[1])
+        for path in [p for p, s in self._settling.items() if s[0] == folder]:
+            del self._settling[path]
+        for sub in state[2]:
+            self._forget(sub, deleted)
+
+
+class InotifyWatcher:
+    name = "inotify"
+
+    def __init__(self, root, target_exts, recursive=True):
+        self.root = root
+        self.target_exts = target_exts
+        self.recursive = recursive
+        self.inotify = INotify()
+        self.mask = (flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE |
+                     flags.CREATE | flags.DELETE_SELF)
+        self.dirs = {}      # wd -> папка
+        self.files = {}     # папка -> {путь: (размер, mtime_ns)}
+        try:
+            self._add_tree(root, None)
+        except OSError:
+            self.inotify.close()
+            raise
+
+    def changes(self, stop):
+        while not stop.is_set():
+            changed, deleted = self.poll()
+            if changed or deleted:
+                yield changed, deleted
+
+    def poll(self, timeout_ms=500):
+        changed, deleted = {}, []
+        # read_delay собирает события пачкой: копирование тысячи файлов - одна пачка
+        for event in self.inotify.read(timeout=timeout_ms, read_delay=100):
+            folder = self.dirs.get(event.wd)
+            if folder is None or not event.name:
+                if event.mask & flags.IGNORED:
+                    self.dirs.pop(event.wd, None)
+                continue
+            path = os.path.join(folder, event.name)
+            is_dir = event.mask & flags.ISDIR
+            if event.mask & (flags.DELETE | flags.MOVED_FROM):
+                if is_dir:
+                    self._forget(path, deleted)
+                elif self.files.get(folder, {}).pop(path, None) is not None:
+                    changed.pop(path, None)
+                    deleted.append(path)
+            elif is_dir:
+                if self.recursive and event.mask & (flags.CREATE | flags.MOVED_TO):
+                    added = {}
+                    try:
+                        self._add_tree(path, added)
+                    except OSError:
+                        continue
+                    changed.update(added)
+            elif event.mask & (flags.CLOSE_WRITE | flags.MOVED_TO):
+                if not event.name.lower().endswith(self.target_exts):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                self.files.setdefault(folder, {})[path] = (st.st_size, st.st_mtime_ns)
+                changed[path] = (path, st.st_size, st.st_mtime_ns)
+        return list(changed.values()), deleted
+
+    def close(self):
+        self.inotify.close()
+
+    def _add_tree(self, root, added):
+        # Файлы, попавшие в новую папку до установки наблюдения, отдаются сразу
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            try:
+                wd = self.inotify.add_watch(folder, self.mask)
+                files, subdirs = _scan_dir(folder, self.target_exts, self.recursive)
+            except OSError:
+                if folder == self.root: raise
+                continue
+            self.dirs[wd] = folder
+            self.files[folder] = files
+            if added is not None:
+                for path, (size, mtime) in files.items():
+                    added[path] = (path, size, mtime)
+            stack.extend(subdirs)
+
+    def _forget(self, folder, deleted):
+        prefix = folder + os.sep
+        for known in [d for d in self.files if d == folder or d.startswith(prefix)]:
+            deleted.extend(self.files.pop(known))
+        for wd in [w for w, d in self.dirs.items() if d == folder or d.startswith(prefix)]:
+            del self.dirs[wd]
+            try:
+                self.inotify.rm_watch(wd)
+            except OSError:
+                pass